@@ -7,6 +7,7 @@ Theme: Editorial / Magazine — cream bg, dark dish cards, Playfair Display
 
 import streamlit as st
 import json
+import os
 import sys
 import time
 import pandas as pd
@@ -14,9 +15,18 @@ import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
 from datetime import datetime
+from dotenv import load_dotenv
 
 sys.path.insert(0, str(Path(__file__).parent))
 
+from jobs.job_queue import ACTIVE, claim_save, job_queue, report_stage
+from jobs.singleflight import pipelines, scrapes
+from reports.catalog import reports_between
+from reports.renderer import output_hash, render_cached
+from reports.retention import load_report_json
+
+load_dotenv()
+
 # ── Page Config ──────────────────────────────────────────────
 st.set_page_config(
     page_title="TrendAgent — Hyper-Local Food Intelligence",
@@ -400,6 +410,8 @@ section[data-testid="stSidebar"] { background: #EDEAD4 !important; border-right:
 
 
 # ── Sidebar ────────────────────────────────────────────────────
+PREVIOUS_REPORTS = 5     # saved runs listed per city in the sidebar
+
 with st.sidebar:
     st.markdown("""
     <div class="sidebar-logo">
@@ -434,6 +446,25 @@ with st.sidebar:
     st.markdown("---")
     scan_btn = st.button("📡 Scan Trends", use_container_width=True, type="secondary")
     gen_btn  = st.button("🤖 Generate Specials", use_container_width=True, type="primary")
+    refresh  = st.checkbox("🔄 Skip shared cache", help="Re-scan / re-generate even if another session just did")
+
+    # Saved runs for the selected city, from the report catalog (newest first)
+    with st.expander("🗂 Previous reports"):
+        previous = reports_between(city=city)[::-1][:PREVIOUS_REPORTS]
+        if not previous:
+            st.caption(f"No saved reports for {city} yet")
+        for row in previous:
+            label = f"{row['ts'][:16].replace('T', ' ')} · {row['restaurant_type'] or '—'}"
+            if st.button(f"📂 {label}", key=f"previous_{row['report_id']}", use_container_width=True):
+                try:
+                    saved_output = load_report_json(row)
+                except (OSError, KeyError, ValueError) as e:
+                    st.error(f"❌ Could not open that report: {e}")
+                else:
+                    st.session_state.analysis   = saved_output["trend_analysis"]
+                    st.session_state.specials   = saved_output["specials"]
+                    st.session_state.report_txt = saved_output["weekly_report"]
+                    st.session_state.shown_city = saved_output.get("city") or row["city"]
     st.markdown("---")
     st.caption("**Stack:** Python · BeautifulSoup · Claude AI")
     st.caption("**Sources:** Google · Zomato · Times Food · Instagram")
@@ -444,6 +475,112 @@ if "scraped"    not in st.session_state: st.session_state.scraped    = None
 if "analysis"   not in st.session_state: st.session_state.analysis   = None
 if "specials"   not in st.session_state: st.session_state.specials   = None
 if "report_txt" not in st.session_state: st.session_state.report_txt = None
+if "shown_city" not in st.session_state: st.session_state.shown_city = None   # the city the shown output was made for
+# Job ids live in the URL until their result is shown, so a reload picks running jobs back up
+if "scan_job"   not in st.session_state: st.session_state.scan_job   = st.query_params.get("scan_job")
+if "gen_job"    not in st.session_state: st.session_state.gen_job    = st.query_params.get("gen_job")
+
+
+# ── Shared Result Cache ────────────────────────────────────────
+# One server process serves every browser session. A scan or generation for
+# the same city + config that any session ran within the TTL is returned from
+# here instead of re-running the 30 s scrape / minute-long pipeline.
+SCRAPE_TTL    = int(os.getenv("FOOD_AGENT_SCRAPE_TTL", "3600"))      # seconds
+PIPELINE_TTL  = int(os.getenv("FOOD_AGENT_PIPELINE_TTL", "21600"))   # seconds
+CACHE_ENTRIES = int(os.getenv("FOOD_AGENT_CACHE_ENTRIES", "64"))     # per function, oldest evicted first
+JOB_POLL_S    = float(os.getenv("FOOD_AGENT_JOB_POLL_S", "1"))       # page refresh while a job runs
+
+
+@st.cache_resource
+def _cache_state() -> dict:
+    """Process-wide: refresh generations per key."""
+    return {"generations": {}}
+
+
+def _generation(key: tuple, bump: bool) -> int:
+    """Part of the cache key; bumping it makes this call miss and replaces the shared entry."""
+    gens = _cache_state()["generations"]
+    if bump:
+        gens[key] = gens.get(key, 0) + 1
+    return gens.get(key, 0)
+
+
+@st.cache_data(ttl=SCRAPE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def cached_scrape(city: str, generation: int = 0) -> dict:
+    from scraper.trend_scraper import scrape_all_trends
+    # Sessions missing the cache for the same city at once share one scrape
+    scraped, _ = scrapes.do((city,), scrape_all_trends, city, verbose=False, on_stage=report_stage)
+    return scraped
+
+
+@st.cache_data(ttl=PIPELINE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def cached_pipeline(city: str, rtype: str, price: str, season: str, scraped_at: str,
+                    _scraped: dict, generation: int = 0) -> dict:
+    """Keyed by city + config + the scan it was built from (`_scraped` itself isn't hashed)."""
+    from llm.dish_generator import run_full_pipeline
+    # …and the same city + config + scan share one Claude pipeline run
+    output, _ = pipelines.do(
+        (city, rtype, price, season, scraped_at),
+        run_full_pipeline,
+        scraped_data    = _scraped,
+        restaurant_type = rtype,
+        price_range     = price,
+        season          = season,
+        verbose         = False,
+        on_stage        = report_stage,
+    )
+    return output
+
+
+def generate_specials(city: str, rtype: str, price: str, season: str, scraped_at: str,
+                      _scraped: dict, generation: int = 0) -> dict:
+    """
+    Job body: the (cached) pipeline, then the reports — saved only by the
+    first job to get this output; coalesced and cached copies skip the save.
+    """
+    output = cached_pipeline(city, rtype, price, season, scraped_at, _scraped, generation)
+    saved  = None
+    if claim_save(output_hash(output)):
+        from reports.report_generator import report_writer
+        try:
+            saved = report_writer().submit(output).result()
+        except Exception as e:
+            saved = {"error": f"{type(e).__name__}: {e}"}
+    return {"output": output, "saved": saved}
+
+
+def _poll_job(slot: str, label: str) -> dict | None:
+    """
+    Progress bar while the session's `slot` job runs. Returns the job once,
+    when it has finished (with its "result" unless it failed), and frees the
+    slot and its URL parameter, so a later reload doesn't attach to it again.
+    """
+    job_id = st.session_state[slot]
+    job    = job_queue().status(job_id) if job_id else None
+    if job is None:
+        st.session_state[slot] = None
+        st.query_params.pop(slot, None)
+        return None
+    if job["status"] in ACTIVE:
+        stage = f" — {job['stage']} ({job['step']}/{job['steps']})" if job["stage"] else ""
+        st.progress(job["progress"], text=f"{label}{stage}")
+        return None
+    st.session_state[slot] = None
+    st.query_params.pop(slot, None)
+    if job["status"] == "done":
+        job["result"] = job_queue().result(job_id)
+    return job
+
+
+def _age(iso: str) -> str:
+    mins = int((datetime.now() - datetime.fromisoformat(iso)).total_seconds() // 60)
+    return "just now" if mins < 1 else f"{mins} min ago"
+
+
+# Import the Claude SDK and build the client while the user picks options,
+# not on the first "Generate Specials" click (no-op after the first rerun)
+from llm.dish_generator import prewarm
+prewarm()
 
 
 # ── Hero Banner ───────────────────────────────────────────────
@@ -458,12 +595,20 @@ st.markdown(f"""
 
 # ── SCAN TRENDS ───────────────────────────────────────────────
 if scan_btn:
-    from scraper.trend_scraper import scrape_all_trends
-    with st.spinner(f"📡 Scanning Google, Zomato & Instagram for {city}..."):
-        scraped = scrape_all_trends(city, verbose=False)
-        st.session_state.scraped = scraped
+    generation = _generation(("scrape", city), refresh)
+    st.session_state.scan_job = job_queue().submit(
+        "scrape", cached_scrape, {"city": city, "generation": generation}, key=f"scrape:{city}:{generation}",
+    )
+    st.query_params["scan_job"] = st.session_state.scan_job
+
+job = _poll_job("scan_job", "📡 Scanning Google, Zomato & Instagram...")
+if job is not None and job["status"] == "failed":
+    st.error(f"❌ Scan failed: {job['error']}")
+elif job is not None:
+    scraped = st.session_state.scraped = job["result"]
     total = sum(len(v) for k, v in scraped.items() if isinstance(v, list))
-    st.success(f"✅ Collected {total} data points from {city}. Now click **Generate Specials** →")
+    st.success(f"✅ Collected {total} data points from {scraped['city']} (scanned {_age(scraped['scraped_at'])}). "
+               f"Now click **Generate Specials** →")
 
 
 # ── SCRAPED DATA PREVIEW ──────────────────────────────────────
@@ -526,22 +671,35 @@ if gen_btn:
     if not st.session_state.scraped:
         st.warning("⚠️ Please scan trends first!")
     else:
-        from llm.dish_generator import run_full_pipeline
-        with st.spinner("🤖 Claude AI is analyzing trends and crafting weekend specials..."):
-            output = run_full_pipeline(
-                scraped_data    = st.session_state.scraped,
-                restaurant_type = rtype,
-                price_range     = price,
-                season          = season,
-                verbose         = False,
-            )
-        st.session_state.analysis   = output["trend_analysis"]
-        st.session_state.specials   = output["specials"]
-        st.session_state.report_txt = output["weekly_report"]
-
-        from reports.report_generator import save_all
-        save_all(output)
+        scraped    = st.session_state.scraped
+        generation = _generation(("pipeline", city, rtype, price, season), refresh)
+        st.session_state.gen_job = job_queue().submit(
+            "generate", generate_specials,
+            {"city": city, "rtype": rtype, "price": price, "season": season,
+             "scraped_at": scraped["scraped_at"], "_scraped": scraped, "generation": generation},
+            key=f"generate:{city}:{rtype}:{price}:{season}:{scraped['scraped_at']}:{generation}",
+        )
+        st.query_params["gen_job"] = st.session_state.gen_job
+
+# Runs in the job queue — reruns and page reloads just pick the job back up
+job = _poll_job("gen_job", "🤖 Claude AI is analyzing trends and crafting weekend specials...")
+if job is not None and job["status"] == "failed":
+    st.error(f"❌ Generation failed: {job['error']}")
+elif job is not None:
+    output, saved = job["result"]["output"], job["result"]["saved"]
+    st.session_state.analysis   = output["trend_analysis"]
+    st.session_state.specials   = output["specials"]
+    st.session_state.report_txt = output["weekly_report"]
+    st.session_state.shown_city = output["city"]
+
+    # A shared output is saved once, by whichever session's job got it first
+    if saved is None:
+        st.success("✅ Weekend specials loaded from the shared cache (reports already saved).")
+    elif "error" in saved:
+        st.error(f"❌ Could not save reports: {saved['error']}")
+    else:
         st.success("✅ Weekend specials generated! Reports saved as JSON + TXT + CSV.")
+        st.toast(f"💾 Reports saved: {Path(saved['txt']).name}")
 
 
 # ── TABS ──────────────────────────────────────────────────────
@@ -734,45 +892,14 @@ with tab2:
 
         left_col, right_col = st.columns([1, 1])
 
-        for i, dish in enumerate(dishes):
-            cat = dish.get("category", "")
-            if   "margin"    in cat.lower(): badge_lbl, badge_cls, card_cls = "💰 High Margin",    "badge-margin",    "margin"
-            elif "premium"   in cat.lower(): badge_lbl, badge_cls, card_cls = "👑 Premium Upsell",  "badge-premium",   "premium"
-            elif "instagram" in cat.lower(): badge_lbl, badge_cls, card_cls = "📸 Reels-Worthy",   "badge-insta",     "insta"
-            else:                            badge_lbl, badge_cls, card_cls = "🔥 Weekend Hit",     "badge-performer", "performer"
-
-            demand = dish.get("predicted_demand", "Medium")
-            d_cls  = "demand-high" if demand == "High" else ("demand-medium" if demand == "Medium" else "demand-low")
-            margin_cls = "margin-high" if demand == "High" else ("margin-medium" if demand == "Medium" else "margin-low")
-
-            # Build ingredient tags html
-            ing_tags = "".join([
-                f'<span class="dish-tag-dark">{t}</span>'
-                for t in dish.get("ingredients_needed", [])[:4]
-            ])
+        shown_city = st.session_state.shown_city or city
+        rendered = render_cached({"city": shown_city, "specials": specials, "weekly_report": st.session_state.report_txt or ""})
 
+        for i, (dish, card_html) in enumerate(zip(dishes, rendered["dish_cards"])):
             # Dark card (left side for odd, right for even)
             target_col = left_col if i % 2 == 0 else right_col
             with target_col:
-                st.markdown(f"""
-                <div class="dish-card-dark">
-                  <div class="dish-wm">Ψ</div>
-                  <div class="dish-num">0{i+1} SUGGESTION</div>
-                  <div class="dish-dark-name">{dish.get('dish_name','')}</div>
-                  <div class="dish-dark-desc">{dish.get('description','')}</div>
-                  <div class="dish-tags-row">{ing_tags}</div>
-                  <div class="dish-footer-dark">
-                    <div>
-                      <div class="dish-target-lbl">Target</div>
-                      <div class="dish-target-txt">{dish.get('why_it_will_trend','')[:100]}</div>
-                    </div>
-                    <div style="text-align:right">
-                      <div class="margin-lbl">Margin</div>
-                      <div class="{margin_cls}">{demand}</div>
-                    </div>
-                  </div>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(card_html, unsafe_allow_html=True)
 
                 # Detail expander below each card
                 with st.expander(f"📋 Details — {dish.get('dish_name','')}"):
@@ -790,14 +917,8 @@ with tab2:
                     st.markdown(f"**🎬 Reels Tip:** {dish.get('reels_tip','')}")
 
         # ── Strategic Insight ──
-        if specials.get("strategic_insight"):
-            st.markdown(f"""
-            <div class="insight-box">
-              <div class="insight-lbl">💡 Strategic Insight for {specials.get('city','')}</div>
-              <div class="insight-txt">{specials.get('strategic_insight','')}</div>
-              <div class="insight-rev">📈 Revenue Projection: {specials.get('revenue_projection','')}</div>
-            </div>
-            """, unsafe_allow_html=True)
+        if rendered["insight_html"]:
+            st.markdown(rendered["insight_html"], unsafe_allow_html=True)
 
         # ── Download CSV ──
         if dishes:
@@ -815,7 +936,7 @@ with tab2:
             } for d in dishes])
             csv_data = df_dishes.to_csv(index=False)
             st.download_button("⬇ Download Dishes CSV", csv_data,
-                               file_name=f"weekend_specials_{city.lower()}.csv",
+                               file_name=f"weekend_specials_{shown_city.lower()}.csv",
                                mime="text/csv")
 
 
@@ -831,11 +952,14 @@ with tab3:
         </div>
         """, unsafe_allow_html=True)
     else:
+        shown_city = st.session_state.shown_city or city
+        rendered = render_cached({"city": shown_city, "specials": st.session_state.specials or {},
+                                  "weekly_report": st.session_state.report_txt})
         c1, c2 = st.columns([3, 1])
         with c1:
             st.markdown(f"""
             <div style="font-family:'Playfair Display',serif;font-size:26px;font-style:italic;font-weight:700;color:#0D0D0D">
-              Weekly Food Trend Report — {city}
+              Weekly Food Trend Report — {shown_city}
             </div>
             <div style="font-size:11px;color:#888;margin-top:4px;font-weight:300">
               Generated: {datetime.now().strftime('%A, %d %B %Y at %I:%M %p')}
@@ -844,21 +968,30 @@ with tab3:
         with c2:
             st.download_button(
                 "⬇ Download Report",
-                st.session_state.report_txt,
-                file_name=f"weekly_report_{city.lower()}.txt",
+                rendered["txt"],
+                file_name=f"weekly_report_{shown_city.lower()}.txt",
                 mime="text/plain",
                 use_container_width=True,
             )
+            st.download_button(
+                "⬇ Markdown",
+                rendered["md"],
+                file_name=f"weekly_report_{shown_city.lower()}.md",
+                mime="text/markdown",
+                use_container_width=True,
+            )
+            st.download_button(
+                "⬇ HTML",
+                rendered["html"],
+                file_name=f"weekly_report_{shown_city.lower()}.html",
+                mime="text/html",
+                use_container_width=True,
+            )
 
         st.markdown("---")
 
         # Report in a styled panel
-        st.markdown(f"""
-        <div style="background:white;border-radius:20px;padding:28px 32px;border:1.5px solid #E0DDD7;
-                    font-size:13.5px;line-height:1.9;color:#444;font-weight:300;">
-          {st.session_state.report_txt.replace(chr(10), '<br>')}
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(rendered["report_html"], unsafe_allow_html=True)
 
         # Summary table
         if st.session_state.specials:
@@ -874,3 +1007,10 @@ with tab3:
                     "Demand":       d.get("predicted_demand",""),
                 } for d in dishes])
                 st.dataframe(df3, use_container_width=True, hide_index=True)
+
+
+# ── Poll running jobs ─────────────────────────────────────────
+# The page is already drawn; refresh it until the session's jobs finish
+if st.session_state.scan_job or st.session_state.gen_job:
+    time.sleep(JOB_POLL_S)
+    st.rerun()
@@ -0,0 +1,343 @@
+"""
+jobs/job_queue.py
+━━━━━━━━━━━━━━━━━
+Background jobs for the long steps (scrape, Claude pipeline), so the
+Streamlit script thread only submits and polls:
+
+  job_id = job_queue().submit("scrape", scrape_all_trends, {"city": "Pune"}, key="scrape:Pune")
+  job_queue().status(job_id)    # {"status": "running", "stage": "zomato", "step": 2, "steps": 4, ...}
+  job_queue().result(job_id)    # the return value, once status == "done"
+
+  • a pool of FOOD_AGENT_JOB_WORKERS threads runs the jobs
+  • status, per-stage progress and results are kept in SQLite, so any
+    session (or a reloaded page) can look a job up by its id
+  • submitting a `key` that is already queued / running returns that job
+  • inside a job, report_stage(stage, step, total) updates its progress —
+    pass it as on_stage= to scrape_all_trends / run_full_pipeline; jobs
+    waiting on that run through follow_job() get the same updates
+  • claim_save(key) lets exactly one job save a given output, however many
+    jobs (sessions) end up with it
+
+Jobs run in the server process: a restart marks its unfinished jobs as
+failed ("interrupted") instead of leaving them running forever.
+
+  python -m jobs.job_queue                  # recent jobs
+  python -m jobs.job_queue --prune 7        # delete jobs older than 7 days
+
+Configure via environment variables:
+  FOOD_AGENT_JOB_WORKERS    jobs run at once (default 2)
+  FOOD_AGENT_JOBS_DB        (default data/jobs.sqlite)
+  FOOD_AGENT_JOB_KEEP_DAYS  finished jobs older than this are pruned at startup (default 7)
+"""
+
+import argparse
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable
+
+from dotenv import load_dotenv
+
+from reports.serialization import decode_json, encode_json
+
+load_dotenv()
+
+JOB_WORKERS   = int(os.getenv("FOOD_AGENT_JOB_WORKERS", "2"))
+JOB_KEEP_DAYS = int(os.getenv("FOOD_AGENT_JOB_KEEP_DAYS", "7"))
+JOBS_DB       = Path(os.getenv(
+    "FOOD_AGENT_JOBS_DB",
+    Path(__file__).resolve().parent.parent / "data" / "jobs.sqlite",
+))
+
+ACTIVE   = ("queued", "running")
+FINISHED = ("done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id   TEXT PRIMARY KEY,
+    kind     TEXT NOT NULL,
+    key      TEXT,
+    status   TEXT NOT NULL,
+    stage    TEXT,
+    step     INTEGER NOT NULL DEFAULT 0,
+    steps    INTEGER NOT NULL DEFAULT 0,
+    params   TEXT,
+    result   BLOB,
+    error    TEXT,
+    saved    TEXT,
+    pid      INTEGER NOT NULL,
+    created  TEXT NOT NULL,
+    started  TEXT,
+    finished TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_key     ON jobs (key) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created);
+"""
+
+_current        = threading.local()   # job_id of the job running on this worker thread
+_followers      = {}                  # job_id → {id: db path} of jobs waiting on its single-flight run
+_followers_lock = threading.Lock()
+
+
+@contextmanager
+def _db(path: Path | None = None):
+    path = Path(path or JOBS_DB)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path, timeout=10, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    try:
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(_SCHEMA)
+        if "saved" not in {r["name"] for r in db.execute("PRAGMA table_info(jobs)")}:
+            try:
+                db.execute("ALTER TABLE jobs ADD COLUMN saved TEXT")    # databases from before claim_save()
+            except sqlite3.OperationalError:
+                pass                                                    # another connection just added it
+        db.execute("CREATE INDEX IF NOT EXISTS jobs_saved ON jobs (saved) WHERE saved IS NOT NULL")
+        yield db
+    finally:
+        db.close()
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def current_job() -> str | None:
+    """Id of the job running on this thread; None outside a job."""
+    return getattr(_current, "job_id", None)
+
+
+def report_stage(stage: str, step: int, total: int) -> None:
+    """
+    Record the current job's progress, and that of every job following it
+    (see follow_job); a no-op outside a job (e.g. CLI runs).
+    """
+    job_id = current_job()
+    if job_id is None:
+        return
+    with _followers_lock:
+        followers = dict(_followers.get(job_id, {}))
+    by_db = {getattr(_current, "path", None): [job_id]}
+    for follower, path in followers.items():
+        by_db.setdefault(path, []).append(follower)
+    for path, ids in by_db.items():
+        with _db(path) as db:
+            db.execute(f"UPDATE jobs SET stage = ?, step = ?, steps = ? WHERE job_id IN ({', '.join('?' * len(ids))})",
+                       (stage, step, total, *ids))
+
+
+@contextmanager
+def follow_job(leader: str | None):
+    """
+    While the current job waits on work `leader` is doing for it (e.g. a
+    coalesced single-flight run), mirror the leader's stage updates onto the
+    current job's row. A no-op outside a job or without a leader job.
+    """
+    job_id = current_job()
+    if leader is None or job_id is None or leader == job_id:
+        yield
+        return
+    path = getattr(_current, "path", None)
+    with _followers_lock:
+        _followers.setdefault(leader, {})[job_id] = path
+    try:
+        with _db(path) as db:       # catch up with the stage the leader has already reached
+            db.execute("UPDATE jobs SET (stage, step, steps) = (SELECT stage, step, steps FROM jobs WHERE job_id = ?) "
+                       "WHERE job_id = ? AND EXISTS (SELECT 1 FROM jobs WHERE job_id = ?)", (leader, job_id, leader))
+        yield
+    finally:
+        with _followers_lock:
+            waiting = _followers.get(leader, {})
+            waiting.pop(job_id, None)
+            if not waiting:
+                _followers.pop(leader, None)
+
+
+def claim_save(key: str) -> bool:
+    """
+    True if the current job is the first to save the output identified by
+    `key` (recorded on its row, so claims are pruned with the jobs); False if
+    another job already did. Always True outside a job.
+    """
+    job_id = current_job()
+    if job_id is None:
+        return True
+    with _db(getattr(_current, "path", None)) as db:
+        return db.execute(
+            "UPDATE jobs SET saved = ? WHERE job_id = ? AND NOT EXISTS (SELECT 1 FROM jobs WHERE saved = ?)",
+            (key, job_id, key),
+        ).rowcount == 1
+
+
+class JobQueue:
+    """
+    Runs submitted callables on a worker pool and keeps their status in SQLite.
+    Jobs are fire-and-forget for the caller: poll status() / result() by id.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS, path: Path | None = None):
+        self.path      = path
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="food-agent-job")
+        self._lock     = threading.Lock()
+        self.recover()
+        self.prune(JOB_KEEP_DAYS)
+
+    def submit(self, kind: str, fn: Callable, params: dict | None = None, key: str | None = None) -> str:
+        """
+        Queue fn(**params); returns the job id. Parameters starting with "_"
+        are passed to fn but not persisted (large inputs, like a scrape).
+        """
+        params = params or {}
+        with self._lock, _db(self.path) as db:
+            if key:
+                row = db.execute(
+                    "SELECT job_id FROM jobs WHERE key = ? AND status IN ('queued', 'running') AND pid = ?",
+                    (key, os.getpid()),
+                ).fetchone()
+                if row:
+                    return row["job_id"]
+            job_id = f"{kind}-{datetime.now():%Y%m%d_%H%M%S}-{secrets.token_hex(3)}"
+            db.execute(
+                "INSERT INTO jobs (job_id, kind, key, status, params, pid, created) VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, key, json.dumps({k: v for k, v in params.items() if not k.startswith("_")},
+                                               ensure_ascii=False, default=str), os.getpid(), _now()),
+            )
+        self._executor.submit(self._run, job_id, fn, params)
+        return job_id
+
+    def _run(self, job_id: str, fn: Callable, params: dict) -> None:
+        with _db(self.path) as db:
+            db.execute("UPDATE jobs SET status = 'running', started = ? WHERE job_id = ?", (_now(), job_id))
+        _current.job_id, _current.path = job_id, self.path
+        status, blob, error = "failed", None, None
+        try:
+            blob   = encode_json(fn(**params), "compact")
+            status = "done"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        except BaseException as e:
+            error = f"interrupted: {type(e).__name__}"    # SystemExit / KeyboardInterrupt in the job
+            raise
+        finally:
+            # Whatever happened, the row must not stay 'running' while this process lives
+            _current.job_id = _current.path = None
+            with _db(self.path) as db:
+                db.execute("UPDATE jobs SET status = ?, result = ?, error = ?, finished = ? WHERE job_id = ?",
+                           (status, blob, error, _now(), job_id))
+
+    # ── Lookups ──────────────────────────────────────────────
+    def status(self, job_id: str) -> dict | None:
+        """The job's row without its result, plus `progress` (0–1, stages finished); None for unknown ids."""
+        with _db(self.path) as db:
+            row = db.execute(
+                "SELECT job_id, kind, key, status, stage, step, steps, params, error, created, started, finished "
+                "FROM jobs WHERE job_id = ?", (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"]   = json.loads(job["params"] or "{}")
+        job["progress"] = 1.0 if job["status"] == "done" else (max(job["step"] - 1, 0) / job["steps"] if job["steps"] else 0.0)
+        return job
+
+    def result(self, job_id: str):
+        """Return value of a finished job; raises if it failed or isn't finished."""
+        with _db(self.path) as db:
+            row = db.execute("SELECT status, result, error FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown job {job_id}")
+        if row["status"] == "failed":
+            raise RuntimeError(f"Job {job_id} failed: {row['error']}")
+        if row["status"] != "done":
+            raise RuntimeError(f"Job {job_id} is still {row['status']}")
+        return decode_json(row["result"], "result.json")
+
+    def wait(self, job_id: str, timeout: float | None = None, poll: float = 0.2) -> dict:
+        """Block until the job is finished (or `timeout` passes); returns its status."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.status(job_id)
+            if job is None or job["status"] in FINISHED:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(poll)
+
+    def jobs(self, limit: int = 20, status: str | None = None) -> list[dict]:
+        with _db(self.path) as db:
+            rows = db.execute(
+                "SELECT job_id, kind, status, stage, step, steps, error, created, finished FROM jobs "
+                + ("WHERE status = ? " if status else "") + "ORDER BY created DESC LIMIT ?",
+                ((status,) if status else ()) + (limit,),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    # ── Housekeeping ─────────────────────────────────────────
+    def recover(self) -> int:
+        """Mark unfinished jobs of processes that no longer exist as failed."""
+        with _db(self.path) as db:
+            rows = db.execute("SELECT job_id, pid FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+            dead = [r["job_id"] for r in rows if r["pid"] != os.getpid() and not _pid_alive(r["pid"])]
+            db.executemany(
+                "UPDATE jobs SET status = 'failed', error = 'interrupted: server restarted', finished = ? WHERE job_id = ?",
+                [(_now(), job_id) for job_id in dead],
+            )
+        return len(dead)
+
+    def prune(self, older_than_days: int) -> int:
+        """Delete finished jobs (and their results) created more than `older_than_days` ago."""
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat(timespec="seconds")
+        with _db(self.path) as db:
+            return db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND created < ?", (cutoff,)).rowcount
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+_queue      = None
+_queue_lock = threading.Lock()
+
+
+def job_queue() -> JobQueue:
+    """The process-wide JobQueue."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+    return _queue
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Background job status")
+    parser.add_argument("--limit",  type=int, default=20)
+    parser.add_argument("--status", choices=ACTIVE + FINISHED)
+    parser.add_argument("--prune",  type=int, metavar="DAYS", help="Delete finished jobs older than DAYS")
+    args = parser.parse_args()
+
+    if not JOBS_DB.exists():
+        parser.error(f"no jobs yet ({JOBS_DB})")
+    queue = JobQueue(max_workers=1)     # threads only start on submit()
+    if args.prune is not None:
+        print(f"🧹 Deleted {queue.prune(args.prune)} jobs older than {args.prune} days")
+    else:
+        for job in queue.jobs(args.limit, args.status):
+            stage = f"{job['stage']} {job['step']}/{job['steps']}" if job["stage"] else ""
+            print(f"  {job['created']}  {job['job_id']:<36} {job['status']:<8} {stage:<18} {job['error'] or ''}")
@@ -0,0 +1,81 @@
+"""
+jobs/singleflight.py
+━━━━━━━━━━━━━━━━━━━━
+Coalesces identical work that is already running in this process:
+
+  result, shared = scrapes.do(("Hyderabad",), scrape_all_trends, "Hyderabad", verbose=False)
+
+The first caller for a key runs the function; every caller that arrives
+while it is still running waits for that run and gets the same result (or
+the same exception) instead of starting another scrape or Claude pipeline.
+Once the run finishes the key is free again — this is not a cache, the
+shared result cache in app.py sits on top of it. A waiter that is a
+background job follows the leading job's progress (job_queue.follow_job),
+so its stage doesn't freeze while the other job does the work.
+
+Streamlit serves every browser session from one process, so this catches
+several sessions — or one impatient double-click — asking for the same city
+and config at the same moment.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+from jobs.job_queue import current_job, follow_job
+
+
+class SingleFlight:
+    """In-flight registry: one running call per key, any number of waiters."""
+
+    def __init__(self, name: str):
+        self.name      = name
+        self._lock     = threading.Lock()
+        self._calls    = {}           # key → (Future of the running call, job id running it)
+        self.started   = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable, *args, timeout: float | None = None, **kwargs) -> tuple[Any, bool]:
+        """
+        fn(*args, **kwargs), or the result of the identical call already in
+        flight. Returns (result, shared) — shared is True for waiters.
+        """
+        with self._lock:
+            future, owner = self._calls.get(key, (None, None))
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = (future, current_job())
+                self.started += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            with follow_job(owner):
+                return future.result(timeout), True
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> list[Hashable]:
+        with self._lock:
+            return list(self._calls)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"name": self.name, "in_flight": len(self._calls),
+                    "started": self.started, "coalesced": self.coalesced}
+
+
+# One registry per kind of work, shared by every session in the process
+scrapes   = SingleFlight("scrape")
+pipelines = SingleFlight("pipeline")
@@ -0,0 +1,299 @@
+"""
+llm/backends.py
+━━━━━━━━━━━━━━━
+Pluggable LLM backend behind every Claude call. Each backend looks like
+AsyncAnthropic to the pipeline (`messages.stream(**params)` + `close()`):
+
+  • anthropic — the live API (default)
+  • record    — the live API, and every response is saved as a fixture
+  • replay    — answers from fixtures only, deterministic, no network
+  • mock      — schema-valid placeholder answers, no network, no fixtures
+
+Fixtures are keyed by a hash of the prompt (model, system, messages, tools),
+so a recorded run replays exactly. max_tokens is left out of the key since
+it adapts between runs. Replay and mock can simulate time-to-first-token
+and a token rate, so `run_full_pipeline`, `main.py` and `app.py` can be
+benchmarked and load-tested on an isolated machine.
+
+Configure via environment variables:
+  FOOD_AGENT_BACKEND            anthropic | record | replay | mock
+  FOOD_AGENT_FIXTURES_DIR       (default data/llm_fixtures)
+  FOOD_AGENT_REPLAY_FALLBACK=mock   answer unknown prompts with the mock instead of failing
+  FOOD_AGENT_SIM_TTFT_S         simulated time to first token (default 0)
+  FOOD_AGENT_SIM_TOKENS_PER_S   simulated output rate (default 0 = instant)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+from dotenv import load_dotenv
+
+from llm.prompt_budget import count_request_tokens, count_tokens
+
+load_dotenv()
+
+BACKENDS     = ("anthropic", "record", "replay", "mock")
+FIXTURES_DIR = Path(os.getenv(
+    "FOOD_AGENT_FIXTURES_DIR",
+    Path(__file__).resolve().parent.parent / "data" / "llm_fixtures",
+))
+
+_config = {
+    "backend":         os.getenv("FOOD_AGENT_BACKEND", "anthropic"),
+    "replay_fallback": os.getenv("FOOD_AGENT_REPLAY_FALLBACK", ""),
+    "ttft_s":          float(os.getenv("FOOD_AGENT_SIM_TTFT_S", "0")),
+    "tokens_per_s":    float(os.getenv("FOOD_AGENT_SIM_TOKENS_PER_S", "0")),
+}
+
+KEY_FIELDS     = ("model", "system", "messages", "tools", "tool_choice")
+UNKEYED_FIELDS = ("max_tokens",)   # request fields that don't select a fixture
+SIM_CHUNKS = 20      # content_block_delta events per simulated response
+
+
+class FixtureNotFound(KeyError):
+    """Replay backend has no recorded response for this prompt."""
+
+
+def configure_backend(
+    backend: str | None = None,
+    replay_fallback: str | None = None,
+    ttft_s: float | None = None,
+    tokens_per_s: float | None = None,
+) -> dict:
+    """Override the backend at runtime (e.g. from CLI flags). Affects clients created afterwards."""
+    if backend:
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r} (expected one of {', '.join(BACKENDS)})")
+        _config["backend"] = backend
+    if replay_fallback is not None:
+        _config["replay_fallback"] = replay_fallback
+    if ttft_s is not None:
+        _config["ttft_s"] = ttft_s
+    if tokens_per_s is not None:
+        _config["tokens_per_s"] = tokens_per_s
+    return dict(_config)
+
+
+def backend_name() -> str:
+    return _config["backend"]
+
+
+# ══════════════════════════════════════════
+#  FIXTURES
+# ══════════════════════════════════════════
+def prompt_key(params: dict) -> str:
+    """Stable hash of the parts of a request that determine the answer."""
+    keyed = {k: params[k] for k in KEY_FIELDS if k in params}
+    blob  = json.dumps(keyed, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]
+
+
+def fixture_path(params: dict, fixtures_dir: Path | None = None) -> Path:
+    return (fixtures_dir or FIXTURES_DIR) / f"{prompt_key(params)}.json"
+
+
+def save_fixture(params: dict, message, fixtures_dir: Path | None = None) -> str:
+    path = fixture_path(params, fixtures_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp  = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({
+            "key":     prompt_key(params),
+            "request": {k: params[k] for k in KEY_FIELDS if k in params},
+            "message": message.model_dump(mode="json"),
+        }, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+    return str(path)
+
+
+def load_fixture(params: dict, fixtures_dir: Path | None = None):
+    """Recorded Message for `params`; raises FixtureNotFound if there is none."""
+    from anthropic.types import Message
+
+    path = fixture_path(params, fixtures_dir)
+    if not path.exists():
+        raise FixtureNotFound(
+            f"No fixture {path.name} for this {params.get('model')} prompt — "
+            f"record one with FOOD_AGENT_BACKEND=record"
+        )
+    with open(path, encoding="utf-8") as f:
+        return Message.model_validate(json.load(f)["message"])
+
+
+# ══════════════════════════════════════════
+#  PLACEHOLDER ANSWERS
+# ══════════════════════════════════════════
+def _stub_from_schema(schema: dict):
+    kind = schema.get("type")
+    if "enum" in schema:
+        return schema["enum"][0]
+    if kind == "object":
+        return {k: _stub_from_schema(v) for k, v in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_stub_from_schema(schema["items"]) for _ in range(max(schema.get("minItems", 0), 1))]
+    if kind in ("number", "integer"):
+        return 0
+    return "stub"
+
+
+def stub_response(params: dict):
+    """Schema-valid placeholder message for a messages.create request."""
+    if params.get("tools"):
+        tool = params["tools"][0]
+        block = SimpleNamespace(type="tool_use", name=tool["name"],
+                                input=_stub_from_schema(tool["input_schema"]))
+        return SimpleNamespace(content=[block], stop_reason="tool_use")
+    block = SimpleNamespace(type="text", text="Stub weekly report.")
+    return SimpleNamespace(content=[block], stop_reason="end_turn")
+
+
+def mock_message(params: dict):
+    """stub_response() as a real Message, with locally estimated usage."""
+    from anthropic.types import Message
+
+    stub    = stub_response(params)
+    content = [
+        {"type": "tool_use", "id": "toolu_mock", "name": b.name, "input": b.input}
+        if b.type == "tool_use" else {"type": "text", "text": b.text}
+        for b in stub.content
+    ]
+    return Message.model_validate({
+        "id":            f"msg_mock_{prompt_key(params)[:12]}",
+        "type":          "message",
+        "role":          "assistant",
+        "model":         params.get("model", "mock"),
+        "content":       content,
+        "stop_reason":   stub.stop_reason,
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens":  count_request_tokens(params),
+            "output_tokens": count_tokens(json.dumps(content, ensure_ascii=False)),
+        },
+    })
+
+
+# ══════════════════════════════════════════
+#  BACKENDS
+# ══════════════════════════════════════════
+class _SimulatedStream:
+    """messages.stream() stand-in: waits out TTFT and the token rate, then yields the message."""
+
+    def __init__(self, message, ttft_s: float, tokens_per_s: float):
+        self._message     = message
+        self.ttft_s       = ttft_s
+        self.tokens_per_s = tokens_per_s
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._events()
+
+    async def _events(self):
+        yield SimpleNamespace(type="message_start")
+        await asyncio.sleep(self.ttft_s)
+        output = getattr(self._message.usage, "output_tokens", 0) or 0
+        pause  = output / self.tokens_per_s / SIM_CHUNKS if self.tokens_per_s else 0
+        for _ in range(SIM_CHUNKS):
+            yield SimpleNamespace(type="content_block_delta")
+            await asyncio.sleep(pause)
+        yield SimpleNamespace(type="message_stop")
+
+    async def get_final_message(self):
+        return self._message
+
+
+class MockBackend:
+    """Placeholder answers for any prompt — no key, no network, no fixtures."""
+
+    def __init__(self, ttft_s: float | None = None, tokens_per_s: float | None = None):
+        self.ttft_s       = _config["ttft_s"] if ttft_s is None else ttft_s
+        self.tokens_per_s = _config["tokens_per_s"] if tokens_per_s is None else tokens_per_s
+        self.messages     = self      # so callers can use client.messages.stream(...)
+
+    def message_for(self, params: dict):
+        return mock_message(params)
+
+    def stream(self, **params):
+        return _SimulatedStream(self.message_for(params), self.ttft_s, self.tokens_per_s)
+
+    async def close(self):
+        pass
+
+
+class ReplayBackend(MockBackend):
+    """Recorded answers only; unknown prompts raise FixtureNotFound (or go to `fallback`)."""
+
+    def __init__(self, fixtures_dir: Path | None = None, fallback: MockBackend | None = None, **sim):
+        super().__init__(**sim)
+        self.fixtures_dir = fixtures_dir
+        self.fallback     = fallback
+
+    def message_for(self, params: dict):
+        try:
+            return load_fixture(params, self.fixtures_dir)
+        except FixtureNotFound:
+            if self.fallback is None:
+                raise
+            return self.fallback.message_for(params)
+
+
+class _RecordingStream:
+    def __init__(self, inner, params: dict, fixtures_dir: Path | None):
+        self._inner        = inner
+        self._params       = params
+        self._fixtures_dir = fixtures_dir
+
+    async def __aenter__(self):
+        self._stream = await self._inner.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        return await self._inner.__aexit__(*exc)
+
+    def __aiter__(self):
+        return self._stream.__aiter__()
+
+    async def get_final_message(self):
+        message = await self._stream.get_final_message()
+        save_fixture(self._params, message, self._fixtures_dir)
+        return message
+
+
+class RecordingBackend:
+    """The live client, saving every final message as a replay fixture."""
+
+    def __init__(self, client, fixtures_dir: Path | None = None):
+        self.client       = client
+        self.fixtures_dir = fixtures_dir
+        self.messages     = self
+
+    def stream(self, **params):
+        return _RecordingStream(self.client.messages.stream(**params), params, self.fixtures_dir)
+
+    async def close(self):
+        await self.client.close()
+
+
+def make_backend(name: str | None = None):
+    """A new client for the configured (or named) backend."""
+    name = name or backend_name()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name!r} (expected one of {', '.join(BACKENDS)})")
+    if name == "mock":
+        return MockBackend()
+    if name == "replay":
+        fallback = MockBackend() if _config["replay_fallback"] == "mock" else None
+        return ReplayBackend(fallback=fallback)
+
+    from anthropic import AsyncAnthropic
+    # retries are handled by llm/request_policy.py, not the SDK
+    client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"), max_retries=0)
+    return RecordingBackend(client) if name == "record" else client
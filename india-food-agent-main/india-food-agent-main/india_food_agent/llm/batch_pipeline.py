@@ -0,0 +1,260 @@
+"""
+llm/batch_pipeline.py
+━━━━━━━━━━━━━━━━━━━━━
+Nightly / weekly multi-city generation through the Message Batches API:
+  1. All step-1 analyses go out as one batch
+  2. Once it ends, all step-2 specials go out as a second batch
+  3. Then all step-3 reports as a third
+
+Trades interactive latency for throughput and the batch discount. Progress
+is saved to data/batches/<run_id>.json after every step, so an interrupted
+run picks up where it stopped (re-polling a submitted batch instead of
+paying for it twice).
+
+LocalBatchEndpoint is an in-process stand-in for client.messages.batches,
+so the whole flow can run offline (e.g. in CI).
+
+Configure via environment variables:
+  FOOD_AGENT_BATCH_DIR  (default data/batches)
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from llm.backends import backend_name, make_backend, stub_response
+from llm.dish_generator import (
+    analysis_request, complete_structured, finalize_specials,
+    report_request, specials_request,
+)
+from llm.output_budget import observe_response
+from llm.structured_output import ANALYSIS_TOOL, SPECIALS_TOOL
+
+BATCH_DIR = Path(os.getenv(
+    "FOOD_AGENT_BATCH_DIR",
+    Path(__file__).resolve().parent.parent / "data" / "batches",
+))
+
+STAGES = ("analysis", "specials", "report")
+
+
+# ══════════════════════════════════════════
+#  STATE ON DISK
+# ══════════════════════════════════════════
+def batch_state_path(run_id: str) -> Path:
+    return BATCH_DIR / f"{run_id}.json"
+
+
+def load_batch_state(run_id: str) -> dict | None:
+    path = batch_state_path(run_id)
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_state(state: dict) -> None:
+    BATCH_DIR.mkdir(parents=True, exist_ok=True)
+    path = batch_state_path(state["run_id"])
+    tmp  = path.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _new_state(run_id: str, scraped_list: list[dict], config: dict) -> dict:
+    return {
+        "run_id":     run_id,
+        "created_at": datetime.now().isoformat(),
+        "config":     config,
+        # custom_id must be [a-zA-Z0-9_-]{1,64}, so cities are keyed by position
+        "items": {
+            f"city-{i:03d}": {"city": s.get("city", "India"), "scraped": s}
+            for i, s in enumerate(scraped_list)
+        },
+        "stages": {stage: {"batch_id": None, "results": {}, "errors": {}} for stage in STAGES},
+    }
+
+
+# ══════════════════════════════════════════
+#  PER-STAGE REQUESTS + RESULTS
+# ══════════════════════════════════════════
+def _stage_params(stage: str, state: dict, key: str) -> dict:
+    cfg     = state["config"]
+    results = state["stages"]
+    if stage == "analysis":
+        return analysis_request(state["items"][key]["scraped"])
+    if stage == "specials":
+        return specials_request(
+            results["analysis"]["results"][key],
+            cfg["restaurant_type"], cfg["price_range"], cfg["season"],
+        )
+    return report_request(results["analysis"]["results"][key], results["specials"]["results"][key])
+
+
+def _stage_result(stage: str, message, model: str):
+    observe_response(stage, message)
+    if stage == "analysis":
+        return complete_structured(message, ANALYSIS_TOOL, model)
+    if stage == "specials":
+        return finalize_specials(complete_structured(message, SPECIALS_TOOL, model))
+    return message.content[0].text.strip()
+
+
+def _run_stage(stage: str, state: dict, batches, poll_interval_s: float, verbose: bool) -> None:
+    stage_state = state["stages"][stage]
+    pending = [k for k in state["items"] if k not in stage_state["results"]]
+    if not pending:
+        return
+
+    params = {k: _stage_params(stage, state, k) for k in pending}
+
+    if not stage_state["batch_id"]:
+        batch = batches.create(requests=[
+            {"custom_id": k, "params": params[k]} for k in pending
+        ])
+        stage_state["batch_id"] = batch.id
+        _save_state(state)
+        if verbose: print(f"  📦 [{stage}] submitted batch {batch.id} ({len(pending)} cities)")
+    elif verbose:
+        print(f"  📦 [{stage}] resuming batch {stage_state['batch_id']}")
+
+    while batches.retrieve(stage_state["batch_id"]).processing_status != "ended":
+        time.sleep(poll_interval_s)
+
+    for entry in batches.results(stage_state["batch_id"]):
+        key = entry.custom_id
+        if key not in params or key in stage_state["results"]:
+            continue
+        if entry.result.type != "succeeded":
+            stage_state["errors"][key] = entry.result.type
+            continue
+        # Continuation calls go through the governed, logged live path and can
+        # fail like any API call — one bad item must not lose the others
+        try:
+            stage_state["results"][key] = _stage_result(stage, entry.result.message, params[key]["model"])
+            stage_state["errors"].pop(key, None)
+        except Exception as e:
+            stage_state["errors"][key] = f"{type(e).__name__}: {e}"
+        _save_state(state)
+    for key in pending:
+        if key not in stage_state["results"]:
+            stage_state["errors"].setdefault(key, "missing from batch results")
+    _save_state(state)
+
+    if stage_state["errors"]:
+        # Failed items go into a fresh batch on the next resume
+        stage_state["batch_id"] = None
+        _save_state(state)
+        raise RuntimeError(
+            f"Batch stage '{stage}' failed for {len(stage_state['errors'])} cities — "
+            f"rerun with run_id={state['run_id']!r} to retry just those"
+        )
+    if verbose: print(f"  ✅ [{stage}] {len(pending)} cities done")
+
+
+# ══════════════════════════════════════════
+#  PIPELINE
+# ══════════════════════════════════════════
+def run_batch_pipeline(
+    scraped_list: list[dict],
+    restaurant_type: str = "Modern Indian Bistro",
+    price_range: str = "₹₹₹ (₹600–1500/head)",
+    season: str = "Monsoon (Jul–Sep)",
+    run_id: str | None = None,
+    batches=None,
+    poll_interval_s: float = 30,
+    verbose: bool = True,
+) -> list[dict]:
+    """
+    Run analysis → specials → report for many cities as three Message Batches.
+
+    If `run_id` names an existing state file the run is resumed and
+    `scraped_list` / config arguments are ignored. `batches` defaults to the
+    live client.messages.batches (or a LocalBatchEndpoint answering from the
+    mock / replay backend when one is configured); pass LocalBatchEndpoint()
+    to run offline explicitly.
+
+    Returns one run_full_pipeline()-shaped dict per city.
+    """
+    run_id = run_id or datetime.now().strftime("batch_%Y%m%d_%H%M%S")
+    state  = load_batch_state(run_id)
+    if state is None:
+        state = _new_state(run_id, scraped_list, {
+            "restaurant_type": restaurant_type,
+            "price_range":     price_range,
+            "season":          season,
+        })
+        _save_state(state)
+
+    if batches is None and backend_name() in ("mock", "replay"):
+        batches = LocalBatchEndpoint(respond=make_backend().message_for)
+    elif batches is None:
+        from anthropic import Anthropic
+        batches = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY")).messages.batches
+
+    if verbose: print(f"\n📦 Batch run {run_id}: {len(state['items'])} cities")
+    for stage in STAGES:
+        _run_stage(stage, state, batches, poll_interval_s, verbose)
+
+    results = state["stages"]
+    return [
+        {
+            "city":           item["city"],
+            "trend_analysis": results["analysis"]["results"][key],
+            "specials":       results["specials"]["results"][key],
+            "weekly_report":  results["report"]["results"][key],
+            "config":         state["config"],
+        }
+        for key, item in state["items"].items()
+    ]
+
+
+# ══════════════════════════════════════════
+#  LOCAL STAND-IN FOR THE BATCH ENDPOINT
+# ══════════════════════════════════════════
+class LocalBatchEndpoint:
+    """
+    In-process stand-in for client.messages.batches (create / retrieve /
+    results). `respond(params)` produces each message; a batch reports
+    "ended" after `polls_until_done` retrieve() calls.
+    """
+
+    def __init__(self, respond=stub_response, polls_until_done: int = 1):
+        self.respond          = respond
+        self.polls_until_done = polls_until_done
+        self._batches         = {}
+
+    def create(self, requests: list[dict]):
+        batch_id = f"msgbatch_local_{len(self._batches) + 1:04d}"
+        self._batches[batch_id] = {"requests": list(requests), "polls": 0}
+        return SimpleNamespace(id=batch_id, processing_status="in_progress")
+
+    def retrieve(self, batch_id: str):
+        batch = self._batches[batch_id]
+        batch["polls"] += 1
+        status = "ended" if batch["polls"] >= self.polls_until_done else "in_progress"
+        return SimpleNamespace(id=batch_id, processing_status=status)
+
+    def results(self, batch_id: str):
+        for req in self._batches[batch_id]["requests"]:
+            try:
+                result = SimpleNamespace(type="succeeded", message=self.respond(req["params"]))
+            except Exception as e:
+                result = SimpleNamespace(type="errored", error=str(e))
+            yield SimpleNamespace(custom_id=req["custom_id"], result=result)
+
+
+if __name__ == "__main__":
+    # Offline smoke run against the local stand-in
+    cities = ["Hyderabad", "Chennai", "Pune"]
+    out = run_batch_pipeline(
+        [{"city": c} for c in cities],
+        run_id=f"local_{datetime.now():%Y%m%d_%H%M%S}",
+        batches=LocalBatchEndpoint(polls_until_done=2),
+        poll_interval_s=0,
+    )
+    print(json.dumps([o["city"] for o in out], ensure_ascii=False))
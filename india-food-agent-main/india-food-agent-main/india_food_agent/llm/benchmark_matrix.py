@@ -0,0 +1,295 @@
+"""
+llm/benchmark_matrix.py
+━━━━━━━━━━━━━━━━━━━━━━━
+Offline benchmark of each Claude stage across a matrix of
+models × max_tokens × prompt variants, on stored scrape snapshots:
+
+  • latency (p50 / p95) and input / output tokens per call
+  • JSON validity   — a payload could be parsed and wasn't cut off
+  • completeness    — share of required fields present (report: sections)
+
+Every cell of a stage gets the same inputs: specials and report are fed the
+snapshot's stored analysis, or one reference run at the default settings.
+No continuation calls are made, so raw output quality is what's measured.
+
+Runs against any backend — record the matrix once, then replay it (or use
+the mock) with no network:
+
+  python -m llm.benchmark_matrix --backend record --models fast,strong --variants default,terse
+  python -m llm.benchmark_matrix --backend replay --models fast,strong --variants default,terse
+  python -m llm.benchmark_matrix --backend mock --stages analysis --variants default,budget-2000,budget-4000
+
+Fixtures aren't keyed by max_tokens (see UNKEYED_FIELDS in llm/backends.py),
+so record / replay runs take a single --max-tokens value; compare several
+against the live API.
+
+Snapshots default to data/trend_history/*.json (written by --incremental
+runs); any scrape JSON saved from scrape_all_trends() works too.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+
+from llm.backends import BACKENDS, UNKEYED_FIELDS, backend_name, configure_backend
+from llm.dish_generator import (
+    analysis_request, analyze_scraped_data_async, close_client, create_message_async,
+    generate_weekend_specials_async, report_request, specials_request,
+)
+from llm.model_router import routing_config
+from llm.output_budget import max_tokens_for
+from llm.structured_output import (
+    ANALYSIS_SCHEMA, SPECIALS_SCHEMA, StructuredOutputError,
+    clean_arrays, extract_payload, missing_fields,
+)
+from llm.trend_delta import HISTORY_DIR
+
+STAGES = ("analysis", "specials", "report")
+
+# Prompt variants; input_budget only changes the analysis prompt
+VARIANTS = {
+    "default":     {},
+    "terse":       {"suffix": "\n\nKeep every free-text field under 25 words."},
+    "budget-2000": {"input_budget": 2000},
+    "budget-4000": {"input_budget": 4000},
+}
+
+REPORT_SECTIONS = ("trend summary", "why these", "operational", "social media", "revenue outlook")
+
+DEFAULT_CONFIG = {
+    "restaurant_type": "Modern Indian Bistro",
+    "price_range":     "₹₹₹ (₹600–1500/head)",
+    "season":          "Monsoon (Jul–Sep)",
+}
+
+
+# ══════════════════════════════════════════
+#  INPUTS
+# ══════════════════════════════════════════
+def load_snapshots(paths: list[str] | None = None, cities: list[str] | None = None) -> list[dict]:
+    """
+    Read snapshot / scrape JSON files (or directories of them) into
+    [{"city", "scraped", "trend_analysis" (or None)}].
+    """
+    files = []
+    for p in map(Path, paths or [HISTORY_DIR]):
+        files += sorted(p.glob("*.json")) if p.is_dir() else [p]
+
+    snapshots = []
+    for path in files:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        scraped = data.get("scraped", data)
+        city    = data.get("city") or scraped.get("city", path.stem)
+        if cities and city.split(",")[0].strip().lower() not in cities:
+            continue
+        snapshots.append({"city": city, "scraped": scraped, "trend_analysis": data.get("trend_analysis")})
+    return snapshots
+
+
+def _resolve_model(name: str) -> str:
+    cfg = routing_config()
+    return cfg[name] if name in ("fast", "strong") else name
+
+
+async def _reference_inputs(snapshot: dict) -> dict:
+    """Analysis + specials at default settings, shared by every cell of the later stages."""
+    analysis = snapshot["trend_analysis"] or await analyze_scraped_data_async(snapshot["scraped"])
+    specials = await generate_weekend_specials_async(
+        analysis, DEFAULT_CONFIG["restaurant_type"], DEFAULT_CONFIG["price_range"], DEFAULT_CONFIG["season"],
+    )
+    return {"analysis": analysis, "specials": specials}
+
+
+# ══════════════════════════════════════════
+#  ONE CELL
+# ══════════════════════════════════════════
+def _cell_params(stage: str, snapshot: dict, ref: dict, model: str, max_tokens: str, variant: dict) -> dict:
+    if stage == "analysis":
+        params = analysis_request(snapshot["scraped"], model, variant.get("input_budget"))
+    elif stage == "specials":
+        params = specials_request(ref["analysis"], DEFAULT_CONFIG["restaurant_type"],
+                                  DEFAULT_CONFIG["price_range"], DEFAULT_CONFIG["season"], model)
+    else:
+        params = report_request(ref["analysis"], ref["specials"], model)
+
+    if max_tokens != "auto":
+        params["max_tokens"] = int(max_tokens)
+    if variant.get("suffix"):
+        message = params["messages"][0]
+        params["messages"] = [{**message, "content": message["content"] + variant["suffix"]}]
+    return params
+
+
+def score_response(stage: str, response) -> dict:
+    """JSON validity + completeness (0–1) of one raw response."""
+    truncated = getattr(response, "stop_reason", None) == "max_tokens"
+    if stage == "report":
+        text  = "".join(getattr(b, "text", "") for b in response.content).lower()
+        found = sum(1 for s in REPORT_SECTIONS if s in text)
+        return {"valid": bool(text.strip()) and not truncated, "complete": found / len(REPORT_SECTIONS)}
+
+    schema = ANALYSIS_SCHEMA if stage == "analysis" else SPECIALS_SCHEMA
+    try:
+        data = clean_arrays(extract_payload(response), schema)
+    except StructuredOutputError:
+        return {"valid": False, "complete": 0.0}
+    required = schema["required"]
+    missing  = missing_fields(data, schema)
+    return {"valid": not truncated, "complete": (len(required) - len(missing)) / len(required)}
+
+
+async def _run_cell(stage: str, snapshots: list[dict], refs: list[dict], model: str,
+                    max_tokens: str, variant: dict, runs: int) -> dict:
+    samples, errors = [], 0
+    for snapshot, ref in zip(snapshots, refs):
+        for _ in range(runs):
+            params = _cell_params(stage, snapshot, ref, model, max_tokens, variant)
+            t0 = time.perf_counter()
+            try:
+                response = await create_message_async(params)
+            except Exception:
+                errors += 1
+                continue
+            usage = getattr(response, "usage", None)
+            samples.append({
+                "wall_s":        time.perf_counter() - t0,
+                "input_tokens":  getattr(usage, "input_tokens", 0) or 0,
+                "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+                **score_response(stage, response),
+            })
+
+    def pct(values, q):
+        if len(values) < 2:
+            return values[0] if values else None
+        return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+    wall = [s["wall_s"] for s in samples]
+    n    = len(samples) or 1
+    return {
+        "calls":         len(samples) + errors,
+        "errors":        errors,
+        "wall_p50":      pct(wall, 50),
+        "wall_p95":      pct(wall, 95),
+        "input_tokens":  sum(s["input_tokens"] for s in samples) / n,
+        "output_tokens": sum(s["output_tokens"] for s in samples) / n,
+        "valid_pct":     100 * sum(s["valid"] for s in samples) / n,
+        "complete_pct":  100 * sum(s["complete"] for s in samples) / n,
+    }
+
+
+# ══════════════════════════════════════════
+#  MATRIX
+# ══════════════════════════════════════════
+def run_matrix(
+    snapshots: list[dict],
+    stages: tuple[str, ...] = STAGES,
+    models: tuple[str, ...] = ("fast", "strong"),
+    max_tokens: tuple[str, ...] = ("auto",),
+    variants: tuple[str, ...] = ("default",),
+    runs: int = 1,
+    verbose: bool = True,
+) -> list[dict]:
+    """
+    One row per stage × model × max_tokens × variant. With the record /
+    replay backend every max_tokens cell would share one fixture, so more
+    than one max_tokens value is refused there.
+    """
+    if backend_name() in ("record", "replay") and len(set(max_tokens)) > 1:
+        raise ValueError(
+            f"{', '.join(UNKEYED_FIELDS)} isn't part of the fixture key, so every max_tokens cell would "
+            f"{backend_name()} the same fixture — pass one --max-tokens value, or use the live API"
+        )
+
+    async def _main():
+        refs = [{}] * len(snapshots)
+        if any(stage != "analysis" for stage in stages):
+            if verbose: print(f"🔧 Reference analysis + specials for {len(snapshots)} cities...")
+            refs = [await _reference_inputs(s) for s in snapshots]
+
+        rows = []
+        for stage in stages:
+            for model in models:
+                for mt in max_tokens:
+                    for name in variants:
+                        variant = VARIANTS[name]
+                        if "input_budget" in variant and stage != "analysis":
+                            continue
+                        if verbose: print(f"  ⏱  {stage} · {model} · max_tokens={mt} · {name}")
+                        cell = await _run_cell(stage, snapshots, refs, _resolve_model(model), mt, variant, runs)
+                        rows.append({
+                            "stage":      stage,
+                            "model":      model,
+                            "max_tokens": max_tokens_for(stage) if mt == "auto" else int(mt),
+                            "variant":    name,
+                            **cell,
+                        })
+        return rows
+
+    async def _run():
+        try:
+            return await _main()
+        finally:
+            await close_client()
+
+    return asyncio.run(_run())
+
+
+def print_table(rows: list[dict]) -> None:
+    def s(v):
+        return f"{v:.2f}s" if v is not None else "—"
+
+    model_w = max([len(r["model"]) for r in rows] + [5]) + 2
+    print(f"\n{'stage':<10}{'model':<{model_w}}{'max_tok':>8}  {'variant':<12}{'calls':>6}{'err':>5}"
+          f"{'p50':>8}{'p95':>8}{'in tok':>8}{'out tok':>8}{'valid':>7}{'complete':>10}")
+    print("─" * (model_w + 92))
+    for r in rows:
+        print(f"{r['stage']:<10}{r['model']:<{model_w}}{r['max_tokens']:>8}  {r['variant']:<12}"
+              f"{r['calls']:>6}{r['errors']:>5}{s(r['wall_p50']):>8}{s(r['wall_p95']):>8}"
+              f"{r['input_tokens']:>8.0f}{r['output_tokens']:>8.0f}{r['valid_pct']:>6.0f}%{r['complete_pct']:>9.0f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Models × max_tokens × prompt variants benchmark per stage")
+    parser.add_argument("--snapshots",  nargs="*", help="Snapshot / scrape JSON files or directories (default: data/trend_history)")
+    parser.add_argument("--cities",     type=str, help="Comma-separated cities to keep from the snapshots")
+    parser.add_argument("--stages",     type=str, default=",".join(STAGES))
+    parser.add_argument("--models",     type=str, default="fast,strong", help="'fast', 'strong' or model ids")
+    parser.add_argument("--max-tokens", type=str, default="auto", help="Comma-separated values; 'auto' = adaptive")
+    parser.add_argument("--variants",   type=str, default="default", help=f"Any of: {', '.join(VARIANTS)}")
+    parser.add_argument("--runs",       type=int, default=1, help="Calls per city per cell")
+    parser.add_argument("--backend",    choices=BACKENDS, help="LLM backend (e.g. replay / mock for offline runs)")
+    parser.add_argument("--json",       type=str, help="Also write the rows to this JSON file")
+    args = parser.parse_args()
+
+    def split(value):
+        return tuple(v.strip() for v in value.split(",") if v.strip())
+
+    unknown = [v for v in split(args.variants) if v not in VARIANTS] + \
+              [s for s in split(args.stages) if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage / variant: {', '.join(unknown)}")
+
+    configure_backend(args.backend)
+    if backend_name() in ("record", "replay") and len(set(split(args.max_tokens))) > 1:
+        parser.error(f"--backend {backend_name()} takes one --max-tokens value (fixtures aren't keyed by max_tokens)")
+    cities    = [c.lower() for c in split(args.cities)] if args.cities else None
+    snapshots = load_snapshots(args.snapshots, cities)
+    if not snapshots:
+        parser.error("no snapshots found — run main.py --incremental first or pass --snapshots")
+
+    rows = run_matrix(
+        snapshots,
+        stages     = split(args.stages),
+        models     = split(args.models),
+        max_tokens = split(args.max_tokens),
+        variants   = split(args.variants),
+        runs       = args.runs,
+    )
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2, ensure_ascii=False)
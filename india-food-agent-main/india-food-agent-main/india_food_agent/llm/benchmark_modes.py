@@ -0,0 +1,67 @@
+"""
+llm/benchmark_modes.py
+━━━━━━━━━━━━━━━━━━━━━━
+Compares the three-step pipeline against the one-shot mode on the same
+scraped data: wall time, Claude calls and input/output tokens per run.
+
+Usage:
+  python -m llm.benchmark_modes --city "Hyderabad" --runs 3
+  python -m llm.benchmark_modes --scraped data/hyderabad_scrape.json
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from llm.dish_generator import run_full_pipeline, track_usage
+
+MODES = {"three-step": False, "one-shot": True}
+
+
+def benchmark_modes(scraped_data: dict, runs: int = 3, **pipeline_kwargs) -> list[dict]:
+    """Run each mode `runs` times and return one summary row per mode."""
+    rows = []
+    for mode, one_shot in MODES.items():
+        samples = []
+        for _ in range(runs):
+            with track_usage() as usage:
+                t0 = time.perf_counter()
+                run_full_pipeline(scraped_data, one_shot=one_shot, verbose=False, **pipeline_kwargs)
+                samples.append({**usage, "wall_s": time.perf_counter() - t0})
+
+        rows.append({
+            "mode":          mode,
+            "runs":          runs,
+            "wall_s_mean":   statistics.mean(s["wall_s"] for s in samples),
+            "wall_s_max":    max(s["wall_s"] for s in samples),
+            "calls":         statistics.mean(s["calls"] for s in samples),
+            "input_tokens":  statistics.mean(s["input_tokens"] for s in samples),
+            "output_tokens": statistics.mean(s["output_tokens"] for s in samples),
+        })
+    return rows
+
+
+def print_table(rows: list[dict]) -> None:
+    print(f"\n{'mode':<12}{'runs':>6}{'wall mean':>12}{'wall max':>11}{'calls':>8}{'in tok':>10}{'out tok':>10}")
+    print("─" * 69)
+    for r in rows:
+        print(f"{r['mode']:<12}{r['runs']:>6}{r['wall_s_mean']:>11.1f}s{r['wall_s_max']:>10.1f}s"
+              f"{r['calls']:>8.1f}{r['input_tokens']:>10.0f}{r['output_tokens']:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Three-step vs one-shot pipeline benchmark")
+    parser.add_argument("--city",    type=str, default="Hyderabad", help="City to scrape")
+    parser.add_argument("--scraped", type=str, help="Use a saved scrape JSON instead of scraping")
+    parser.add_argument("--runs",    type=int, default=3)
+    args = parser.parse_args()
+
+    if args.scraped:
+        with open(args.scraped, encoding="utf-8") as f:
+            scraped = json.load(f)
+    else:
+        from scraper.trend_scraper import scrape_all_trends
+        scraped = scrape_all_trends(args.city, verbose=False)
+
+    print_table(benchmark_modes(scraped, runs=args.runs))
@@ -5,76 +5,314 @@ Uses Claude (Anthropic) to:
   1. Analyze raw scraped data → extract structured trend insights
   2. Generate high-margin weekend special dishes
   3. Build strategic weekly report
+
+Every step has an async twin (`*_async`) built on AsyncAnthropic, so many
+cities can be served from one event loop. The sync functions are thin
+wrappers that run the async version to completion.
+
+Importing this module is cheap: the SDK is only imported, and the client
+only built, on the first Claude call — or ahead of time by prewarm().
 """
 
 import os
 import json
-import re
-from anthropic import Anthropic
+import time
+import asyncio
+import weakref
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from llm.backends import backend_name, make_backend
+from llm.model_router import model_for
+from llm.output_budget import max_tokens_for, observe_response
+from llm.rate_governor import get_governor
+from llm.request_policy import call_with_policy, stage_of
+from llm.telemetry import call_record, log_call
+from llm.trend_delta import diff_scrapes, load_city_snapshot, save_city_snapshot
+from llm.prompt_budget import (
+    INPUT_TOKEN_BUDGET, count_request_tokens, count_tokens, count_tool_tokens, pack_all_items,
+    pack_scraped_context,
+)
+from llm.structured_output import (
+    ANALYSIS_SCHEMA, ANALYSIS_TOOL, ANALYSIS_UPDATE_TOOL, MULTI_ANALYSIS_TOOL,
+    PIPELINE_TOOL, SPECIALS_TOOL, StructuredOutputError,
+    clean_arrays, continuation_prompt, extract_payload, merge_fields,
+    missing_fields, subset_tool, tool_choice,
+)
+
 load_dotenv()
 
-client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-MODEL  = "claude-opus-4-6"   # best for analysis; swap to claude-haiku-4-5-20251001 for speed
+# Models are picked per stage — see llm/model_router.py
 
+# Step max_tokens adapt to observed output sizes — see llm/output_budget.py
+CONTINUATION_MAX_TOKENS = 1500
+MAX_CONCURRENT_CALLS    = int(os.getenv("FOOD_AGENT_MAX_CONCURRENCY", "4"))
+ONE_SHOT                = os.getenv("FOOD_AGENT_ONE_SHOT", "0") == "1"
+INCREMENTAL             = os.getenv("FOOD_AGENT_INCREMENTAL", "0") == "1"
+MAX_DELTA_RATIO         = 0.5   # above this share of changed items, re-analyse from scratch
+MULTI_CITY_MAX          = int(os.getenv("FOOD_AGENT_MULTI_CITY_MAX", "4"))
 
-# ══════════════════════════════════════════
-#  STEP 1 — Analyze raw scraped data
-# ══════════════════════════════════════════
-def analyze_scraped_data(scraped_data: dict) -> dict:
+# AsyncAnthropic's HTTP pool and asyncio.Semaphore are both bound to the
+# event loop they were first used on, so each loop gets its own pair.
+# The client comes from the configured backend — see llm/backends.py.
+_loop_state = weakref.WeakKeyDictionary()
+
+
+def _state() -> dict:
+    loop  = asyncio.get_running_loop()
+    state = _loop_state.get(loop)
+    if state is None:
+        state = _loop_state[loop] = {
+            "client":    make_backend(),
+            "semaphore": asyncio.Semaphore(MAX_CONCURRENT_CALLS),
+        }
+    return state
+
+
+_usage_sinks = contextvars.ContextVar("usage_sinks", default=())
+
+# prompt → tokens of the scraped context packed into it, logged with the call
+# that sends it. Prompts built but never sent (batch, benchmarks) age out.
+_context_tokens      = OrderedDict()
+_context_tokens_lock = threading.Lock()
+CONTEXT_TOKENS_KEEP  = 256
+
+
+def _note_context(prompt: str, tokens: int) -> str:
+    with _context_tokens_lock:
+        _context_tokens[prompt] = tokens
+        _context_tokens.move_to_end(prompt)
+        while len(_context_tokens) > CONTEXT_TOKENS_KEEP:
+            _context_tokens.popitem(last=False)
+    return prompt
+
+
+def _context_of(params: dict) -> int | None:
+    """Packed scraped-context tokens of a request's prompt, if it was built here."""
+    content = (params.get("messages") or [{}])[0].get("content")
+    if not isinstance(content, str):
+        return None
+    with _context_tokens_lock:
+        return _context_tokens.get(content)
+
+
+@contextmanager
+def track_usage():
     """
-    Send raw scraped data to Claude and extract:
-    - Top trending ingredients
-    - Famous dishes & restaurants mentioned
-    - Viral hashtags & their context
-    - Declining trends
-    - Engagement patterns
+    Collect call count + token usage of every Claude call made inside the
+    block (blocks can nest). `estimated_input_tokens` is the local prompt
+    estimate, `input_tokens` / `output_tokens` come from response.usage.
     """
-    city = scraped_data.get("city", "India")
+    totals = {"calls": 0, "estimated_input_tokens": 0, "input_tokens": 0, "output_tokens": 0}
+    token  = _usage_sinks.set(_usage_sinks.get() + (totals,))
+    try:
+        yield totals
+    finally:
+        _usage_sinks.reset(token)
 
-    # Build context from scraped data
-    google_text = "\n".join([
-        f"• {r.get('title','')}: {r.get('snippet','')[:120]}"
-        for r in scraped_data.get("google_results", [])[:15]
-    ])
 
-    zomato_text = "\n".join([
-        f"• [{z.get('type','')}] {z.get('name','')}"
-        for z in scraped_data.get("zomato_data", [])[:15]
-    ])
+def _usage_line(usage: dict) -> str:
+    return (f"       → ~{usage['estimated_input_tokens']:,} prompt tokens (est.) · "
+            f"{usage['input_tokens']:,} in / {usage['output_tokens']:,} out")
 
-    articles_text = "\n".join([
-        f"• {a.get('headline','')} ({a.get('source','')})"
-        for a in scraped_data.get("articles", [])[:10]
-    ])
 
-    hashtags_text = "\n".join([
-        f"• {h.get('hashtag','')} — +{h.get('estimated_growth_pct',0)}% ({h.get('type','')})"
-        for h in scraped_data.get("hashtags", [])
-    ])
+async def _acreate(**kwargs):
+    """
+    One Claude call, streamed so the first token can be timed, under the
+    stage's deadline / retry / hedge policy (llm/request_policy.py), the
+    host-wide rate governor (llm/rate_governor.py) and the shared semaphore.
+    Every call is logged to llm/telemetry.py, failed ones included.
+    """
+    state     = _state()
+    backend   = backend_name()
+    governor  = get_governor() if backend in ("anthropic", "record") else None
+    estimated = count_request_tokens(kwargs)
 
-    prompt = f"""You are an expert Indian food trend analyst.
+    async def stream_once(timer):
+        timer.sent()
+        async with state["client"].messages.stream(**kwargs) as stream:
+            async for event in stream:
+                if event.type == "content_block_delta":
+                    timer.first_token()
+            return await stream.get_final_message()
 
-I've scraped real-time data from Google, Zomato, food news sites, and Instagram for {city}.
-Analyze this data and extract structured food trend insights.
+    async def attempt(timer):
+        # every attempt (retries and hedges too) is a real request, so each one is governed
+        if governor is None:
+            return await stream_once(timer)
+        timer.hold()
+        async with governor.slot(estimated, kwargs["max_tokens"]) as booked:
+            message = await stream_once(timer)
+            usage   = getattr(message, "usage", None)
+            booked["input_tokens"]  = getattr(usage, "input_tokens", 0) or estimated
+            booked["output_tokens"] = getattr(usage, "output_tokens", 0) or 0
+            return message
 
-━━ GOOGLE SEARCH RESULTS ━━
-{google_text or "No data scraped (network issue)"}
+    stage   = stage_of(kwargs)
+    stats   = {"stage": stage}
+    started = time.monotonic()
+    response, error = None, None
+    try:
+        async with state["semaphore"]:
+            response, _ = await call_with_policy(attempt, stage, stats=stats)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        log_call(call_record(response, stats, time.monotonic() - started, kwargs["model"], backend, error,
+                             prompt_tokens=estimated, context_tokens=_context_of(kwargs)))
 
-━━ ZOMATO TRENDING ━━
-{zomato_text or "No data scraped (network issue)"}
+    sinks = _usage_sinks.get()
+    if sinks:
+        usage = getattr(response, "usage", None)
+        for totals in sinks:
+            totals["calls"]                  += 1
+            totals["estimated_input_tokens"] += estimated
+            totals["input_tokens"]           += getattr(usage, "input_tokens", 0) or 0
+            totals["output_tokens"]          += getattr(usage, "output_tokens", 0) or 0
+    return response
 
-━━ FOOD NEWS ARTICLES ━━
-{articles_text or "No data scraped (network issue)"}
 
-━━ INSTAGRAM HASHTAGS ━━
-{hashtags_text or "No data"}
+async def create_message_async(params: dict):
+    """Send prebuilt messages.create params (e.g. from analysis_request) through the normal call path."""
+    return await _acreate(**params)
 
-Based on ALL above data + your knowledge of {city}'s food scene (real restaurants, famous dishes, local culture):
 
-Return ONLY valid JSON (no markdown):
-{{
+async def close_client() -> None:
+    """
+    Close the running loop's client (its HTTP connection pool). The next call
+    on this loop builds a new one. For callers that drive their own loop.
+    """
+    state = _loop_state.pop(asyncio.get_running_loop(), None)
+    if state:
+        await state["client"].close()
+
+
+def _run_sync(coro):
+    """
+    Run an async step on a fresh event loop and close that loop's client.
+    Backs the sync API — don't call it from inside a running event loop.
+    """
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await close_client()
+    return asyncio.run(_main())
+
+
+_prewarm_thread = None
+_prewarm_lock   = threading.Lock()
+
+
+def _prewarm() -> None:
+    async def _build_client():
+        client = make_backend()
+        client.messages          # resources are loaded lazily on first access
+        await client.close()
+
+    try:
+        import anthropic.types  # noqa: F401 — SDK + HTTP stack, the bulk of the first-call cost
+        asyncio.run(_build_client())
+        if backend_name() in ("anthropic", "record"):
+            get_governor()
+        max_tokens_for("analysis")
+    except Exception:
+        pass    # best effort: the first real call surfaces any configuration error
+
+
+def prewarm(background: bool = True) -> threading.Thread:
+    """
+    Pay the one-off cost of the first Claude call ahead of time: import the
+    SDK, build a client for the configured backend and open the local state
+    it uses. Runs once per process on a daemon thread, so app.py can call it
+    at startup; background=False waits for it to finish.
+    """
+    global _prewarm_thread
+    with _prewarm_lock:
+        if _prewarm_thread is None:
+            _prewarm_thread = threading.Thread(target=_prewarm, name="llm-prewarm", daemon=True)
+            _prewarm_thread.start()
+    if not background:
+        _prewarm_thread.join()
+    return _prewarm_thread
+
+
+def _structured_request(prompt: str, tool: dict, max_tokens: int, model: str) -> dict:
+    """messages.create params that force a tool-shaped JSON payload."""
+    return {
+        "model": model,
+        "max_tokens": max_tokens,
+        "tools": [tool],
+        "tool_choice": tool_choice(tool),
+        "messages": [{"role": "user", "content": prompt}],
+    }
+
+
+async def complete_structured_async(response, tool: dict, model: str) -> dict:
+    """
+    Turn a structured-output response into a validated payload. Malformed or
+    truncated output is repaired locally; fields still missing after that are
+    re-requested with one short continuation call instead of a full rerun.
+    """
+    schema = tool["input_schema"]
+    data = clean_arrays(extract_payload(response), schema)
+
+    missing = missing_fields(data, schema)
+    if not missing:
+        return data
+
+    partial_tool = subset_tool(tool, list(missing))
+    response = await _acreate(**_structured_request(
+        continuation_prompt(data, missing, tool), partial_tool,
+        max_tokens=CONTINUATION_MAX_TOKENS, model=model,
+    ))
+    patch = clean_arrays(extract_payload(response), partial_tool["input_schema"])
+    data  = merge_fields(data, patch, missing)
+
+    still_missing = missing_fields(data, schema)
+    if still_missing:
+        raise StructuredOutputError(
+            f"{tool['name']} still missing after continuation: {', '.join(still_missing)}",
+            partial=data,
+        )
+    return data
+
+
+def complete_structured(response, tool: dict, model: str) -> dict:
+    """Sync wrapper around complete_structured_async()."""
+    return _run_sync(complete_structured_async(response, tool, model))
+
+
+# ══════════════════════════════════════════
+#  STEP 1 — Analyze raw scraped data
+# ══════════════════════════════════════════
+_CONTEXT_SLOT = "\x00SCRAPED_CONTEXT\x00"
+
+
+def _fill_scraped_context(
+    prompt: str,
+    scraped_data: dict,
+    tool: dict,
+    budget: int | None = None,
+    empty_text: str | None = None,
+) -> str:
+    """
+    Pack the scraped data into the prompt's context slot so the prompt plus
+    the `tool` schema sent with it stay within `budget` tokens (default
+    INPUT_TOKEN_BUDGET). The packed size is logged with the call.
+    """
+    overhead = count_tokens(prompt.replace(_CONTEXT_SLOT, "")) + count_tool_tokens([tool])
+    packed   = pack_scraped_context(scraped_data, (budget or INPUT_TOKEN_BUDGET) - overhead, empty_text)
+    return _note_context(prompt.replace(_CONTEXT_SLOT, packed["text"]), packed["tokens"])
+
+
+def _analysis_shape(city: str) -> str:
+    """Inline example of the record_trend_analysis payload."""
+    return f"""{{
   "city": "{city}",
   "analysis_summary": "2-3 sentence overview of what's trending",
   "trending_ingredients": [
@@ -117,31 +355,276 @@ Return ONLY valid JSON (no markdown):
   }}
 }}"""
 
-    response = client.messages.create(
-        model=MODEL,
-        max_tokens=2000,
-        messages=[{"role": "user", "content": prompt}]
+
+def _analysis_prompt(scraped_data: dict, budget: int | None = None) -> str:
+    city = scraped_data.get("city", "India")
+
+    prompt = f"""You are an expert Indian food trend analyst.
+
+I've scraped real-time data from Google, Zomato, food news sites, and Instagram for {city}.
+Analyze this data and extract structured food trend insights.
+
+{_CONTEXT_SLOT}
+
+Based on ALL above data + your knowledge of {city}'s food scene (real restaurants, famous dishes, local culture):
+
+Record your analysis with the record_trend_analysis tool, in this shape:
+{_analysis_shape(city)}"""
+    return _fill_scraped_context(prompt, scraped_data, ANALYSIS_TOOL, budget)
+
+
+def analysis_request(
+    scraped_data: dict,
+    model: str | None = None,
+    input_budget: int | None = None,
+) -> dict:
+    """
+    messages.create params for step 1 (shared by the live and batch paths).
+    Scraped items are packed to fit `input_budget` prompt tokens.
+    """
+    return _structured_request(
+        _analysis_prompt(scraped_data, input_budget), ANALYSIS_TOOL, max_tokens=max_tokens_for("analysis"),
+        model=model or model_for("analysis"),
     )
 
-    raw = response.content[0].text
-    # Clean JSON
-    raw = re.sub(r"```json|```", "", raw).strip()
-    return json.loads(raw)
+
+async def analyze_scraped_data_async(
+    scraped_data: dict,
+    model: str | None = None,
+    input_budget: int | None = None,
+) -> dict:
+    """
+    Send raw scraped data to Claude and extract:
+    - Top trending ingredients
+    - Famous dishes & restaurants mentioned
+    - Viral hashtags & their context
+    - Declining trends
+    - Engagement patterns
+    """
+    params = analysis_request(scraped_data, model, input_budget)
+    response = await _acreate(**params)
+    observe_response("analysis", response)
+    return await complete_structured_async(response, ANALYSIS_TOOL, params["model"])
+
+
+def analyze_scraped_data(
+    scraped_data: dict,
+    model: str | None = None,
+    input_budget: int | None = None,
+) -> dict:
+    """Sync wrapper around analyze_scraped_data_async()."""
+    return _run_sync(analyze_scraped_data_async(scraped_data, model=model, input_budget=input_budget))
+
+
+# ══════════════════════════════════════════
+#  STEP 1b — Incremental analysis (delta vs last week)
+# ══════════════════════════════════════════
+def _incremental_prompt(scraped_data: dict, previous_analysis: dict, delta: dict,
+                        budget: int | None = None) -> str | None:
+    """
+    The delta prompt. New / changed items get `budget` tokens (default
+    INPUT_TOKEN_BUDGET) of their own — last week's analysis doesn't count
+    against it. None when they don't all fit: a truncated delta would make
+    the update silently miss changes, so the caller re-analyses in full.
+    """
+    city = scraped_data.get("city", "India")
+
+    fresh = {section: delta["added"].get(section, []) + delta["changed"].get(section, [])
+             for section in set(delta["added"]) | set(delta["changed"])}
+    packed = pack_all_items({"city": city, **fresh}, budget or INPUT_TOKEN_BUDGET, empty_text="No changes")
+    if packed is None:
+        return None
+    removed = "\n".join(
+        f"• [{section}] {key}" for section, keys in delta["removed"].items() for key in keys
+    )
+
+    prompt = f"""You are an expert Indian food trend analyst.
+
+Last week you produced this trend analysis for {city}:
+{json.dumps(previous_analysis, ensure_ascii=False)}
+
+Since then, this is what changed in the scraped data from Google, Zomato, food news sites, and Instagram.
+NEW OR CHANGED ITEMS:
+
+{_CONTEXT_SLOT}
+
+NO LONGER PRESENT:
+{removed or "Nothing removed"}
+
+({delta['unchanged_count']} other items are unchanged and already reflected in last week's analysis.)
+
+Update the analysis for this week. Use the record_trend_analysis_update tool and include ONLY the
+top-level fields that should change (e.g. trending_ingredients, viral_hashtags, stats) — each one
+complete, in the same shape as last week's. Omitted fields keep last week's values."""
+    return _note_context(prompt.replace(_CONTEXT_SLOT, packed["text"]), packed["tokens"])
+
+
+async def analyze_incremental_async(
+    scraped_data: dict,
+    model: str | None = None,
+    full_refresh: bool = False,
+) -> dict:
+    """
+    Step 1 against last week's result for the same city: only new / changed /
+    removed scraped items plus the previous trend_analysis go to Claude, which
+    returns just the fields to update. Falls back to a full analysis when there
+    is no snapshot, when more than MAX_DELTA_RATIO of the items changed, when
+    the changed items don't fit the input budget, or when `full_refresh` is
+    set. Nothing changed → last week's analysis is reused.
+    The new scrape + analysis become the snapshot for next time.
+    """
+    city     = scraped_data.get("city", "India")
+    model    = model or model_for("analysis")
+    previous = None if full_refresh else load_city_snapshot(city)
+    delta    = diff_scrapes(previous["scraped"], scraped_data) if previous else None
+
+    prompt   = None
+    if delta is not None and delta["change_ratio"] <= MAX_DELTA_RATIO and delta["changed_count"]:
+        prompt = _incremental_prompt(scraped_data, previous["trend_analysis"], delta)
+
+    if delta is not None and not delta["changed_count"]:
+        analysis = dict(previous["trend_analysis"])
+    elif prompt is None:
+        # No snapshot, too much changed, or a delta that would have to be truncated
+        analysis = await analyze_scraped_data_async(scraped_data, model)
+    else:
+        params   = _structured_request(
+            prompt, ANALYSIS_UPDATE_TOOL, max_tokens=max_tokens_for("analysis_update"), model=model,
+        )
+        response = await _acreate(**params)
+        observe_response("analysis_update", response)
+        patch    = clean_arrays(extract_payload(response), ANALYSIS_SCHEMA)
+        analysis = {**previous["trend_analysis"], **patch}
+        if missing_fields(analysis, ANALYSIS_SCHEMA):
+            analysis = await analyze_scraped_data_async(scraped_data, model)
+
+    save_city_snapshot(city, scraped_data, analysis)
+    return analysis
+
+
+def analyze_incremental(
+    scraped_data: dict,
+    model: str | None = None,
+    full_refresh: bool = False,
+) -> dict:
+    """Sync wrapper around analyze_incremental_async()."""
+    return _run_sync(analyze_incremental_async(scraped_data, model=model, full_refresh=full_refresh))
+
+
+# ══════════════════════════════════════════
+#  STEP 1c — Several cities in one analysis call
+# ══════════════════════════════════════════
+def _multi_analysis_prompt(scraped_list: list[dict], budget: int | None = None) -> str:
+    blocks, context_tokens = [], 0
+    for i, scraped in enumerate(scraped_list, 1):
+        city   = scraped.get("city", "India")
+        # Each city gets the same context room it would get in its own prompt
+        room   = ((budget or INPUT_TOKEN_BUDGET) - count_tokens(_analysis_prompt({"city": city}, budget))
+                  - count_tool_tokens([ANALYSIS_TOOL]))
+        packed = pack_scraped_context(scraped, room)
+        blocks.append(f"════ CITY {i}: {city} ════\n" + packed["text"])
+        context_tokens += packed["tokens"]
+    cities_text = "\n\n".join(blocks)
+
+    return _note_context(f"""You are an expert Indian food trend analyst.
+
+I've scraped real-time data from Google, Zomato, food news sites, and Instagram for {len(scraped_list)} Indian cities.
+Analyze EACH city separately and extract structured food trend insights.
+
+{cities_text}
+
+For each city, based on ITS data above + your knowledge of its food scene (real restaurants, famous dishes, local culture):
+
+Record the analyses with the record_city_analyses tool — exactly {len(scraped_list)} entries, in the order above,
+"city" spelled as in each header, each in this shape:
+{_analysis_shape("<city>")}""", context_tokens)
+
+
+def multi_analysis_request(
+    scraped_list: list[dict],
+    model: str | None = None,
+    input_budget: int | None = None,
+) -> dict:
+    """messages.create params analysing several cities in one call."""
+    return _structured_request(
+        _multi_analysis_prompt(scraped_list, input_budget), MULTI_ANALYSIS_TOOL,
+        max_tokens=max_tokens_for("city_analysis", len(scraped_list)),
+        model=model or model_for("analysis"),
+    )
+
+
+async def _analyze_city_group(
+    scraped_list: list[dict],
+    model: str | None,
+    input_budget: int | None,
+) -> list[dict]:
+    if len(scraped_list) == 1:
+        return [await analyze_scraped_data_async(scraped_list[0], model, input_budget)]
+
+    params = multi_analysis_request(scraped_list, model, input_budget)
+    response = await _acreate(**params)
+    observe_response("city_analysis", response, units=len(scraped_list))
+    try:
+        entries = extract_payload(response).get("analyses")
+    except StructuredOutputError:
+        entries = None
+    entries = [e for e in entries if isinstance(e, dict)] if isinstance(entries, list) else []
+    by_city = {str(e.get("city", "")).strip().lower(): e for e in entries}
+
+    results = []
+    for i, scraped in enumerate(scraped_list):
+        city     = scraped.get("city", "India")
+        analysis = by_city.get(city.strip().lower())
+        if analysis is None and len(entries) == len(scraped_list):
+            analysis = entries[i]
+        if analysis is not None:
+            analysis = clean_arrays({**analysis, "city": city}, ANALYSIS_SCHEMA)
+        if analysis is None or missing_fields(analysis, ANALYSIS_SCHEMA):
+            # Only the city that came back incomplete gets its own call
+            analysis = await analyze_scraped_data_async(scraped, model, input_budget)
+        results.append(analysis)
+    return results
+
+
+async def analyze_cities_async(
+    scraped_list: list[dict],
+    model: str | None = None,
+    max_cities_per_call: int | None = None,
+    input_budget: int | None = None,
+) -> list[dict]:
+    """
+    Step 1 for many cities, packing up to `max_cities_per_call`
+    (default FOOD_AGENT_MULTI_CITY_MAX) cities into each Claude request so the
+    instructions + schema are paid once per group instead of once per city.
+    Returns one analysis per input, in order, in the usual schema.
+    """
+    size   = max(1, max_cities_per_call or MULTI_CITY_MAX)
+    groups = [scraped_list[i:i + size] for i in range(0, len(scraped_list), size)]
+    done   = await asyncio.gather(*[_analyze_city_group(g, model, input_budget) for g in groups])
+    return [analysis for group in done for analysis in group]
+
+
+def analyze_cities(
+    scraped_list: list[dict],
+    model: str | None = None,
+    max_cities_per_call: int | None = None,
+    input_budget: int | None = None,
+) -> list[dict]:
+    """Sync wrapper around analyze_cities_async()."""
+    return _run_sync(analyze_cities_async(
+        scraped_list, model=model, max_cities_per_call=max_cities_per_call, input_budget=input_budget
+    ))
 
 
 # ══════════════════════════════════════════
 #  STEP 2 — Generate Weekend Specials
 # ══════════════════════════════════════════
-def generate_weekend_specials(
+def _specials_prompt(
     trend_analysis: dict,
     restaurant_type: str,
     price_range: str,
     season: str,
-) -> dict:
-    """
-    Uses Claude to generate 5 high-margin weekend special dishes
-    based on analyzed trend data.
-    """
+) -> str:
     city = trend_analysis.get("city", "India")
 
     # Format trend data for prompt
@@ -168,7 +651,7 @@ def generate_weekend_specials(
     engagement = trend_analysis.get("engagement_patterns", "")
     summary    = trend_analysis.get("analysis_summary", "")
 
-    prompt = f"""You are India's #1 restaurant revenue strategist and food trend expert.
+    return f"""You are India's #1 restaurant revenue strategist and food trend expert.
 
 CITY: {city}
 RESTAURANT TYPE: {restaurant_type}
@@ -204,7 +687,7 @@ Exactly:
 - 1 × "highly instagrammable" (viral visual wow factor)
 - 2 × "weekend performer" (solid crowd-pleasers)
 
-Return ONLY valid JSON (no markdown):
+Record the dishes with the record_weekend_specials tool, in this shape:
 {{
   "city": "{city}",
   "generated_at": "timestamp",
@@ -233,31 +716,68 @@ Return ONLY valid JSON (no markdown):
   "revenue_projection": "Expected uplift in weekend revenue if all 5 specials added"
 }}"""
 
-    response = client.messages.create(
-        model=MODEL,
-        max_tokens=3000,
-        messages=[{"role": "user", "content": prompt}]
+
+def specials_request(
+    trend_analysis: dict,
+    restaurant_type: str,
+    price_range: str,
+    season: str,
+    model: str | None = None,
+) -> dict:
+    """messages.create params for step 2 (shared by the live and batch paths)."""
+    return _structured_request(
+        _specials_prompt(trend_analysis, restaurant_type, price_range, season),
+        SPECIALS_TOOL, max_tokens=max_tokens_for("specials"),
+        model=model or model_for("specials"),
     )
 
-    raw = response.content[0].text
-    raw = re.sub(r"```json|```", "", raw).strip()
 
-    result = json.loads(raw)
+def finalize_specials(result: dict) -> dict:
+    """Stamp the generation time on a specials payload."""
     from datetime import datetime
     result["generated_at"] = datetime.now().isoformat()
     return result
 
 
-# ══════════════════════════════════════════
-#  STEP 3 — Weekly Report Narrative
-# ══════════════════════════════════════════
-def generate_weekly_report(
+async def generate_weekend_specials_async(
     trend_analysis: dict,
-    specials: dict,
-) -> str:
+    restaurant_type: str,
+    price_range: str,
+    season: str,
+    model: str | None = None,
+) -> dict:
     """
-    Generates a professional weekly trend report narrative using Claude.
+    Uses Claude to generate 5 high-margin weekend special dishes
+    based on analyzed trend data.
     """
+    params = specials_request(trend_analysis, restaurant_type, price_range, season, model)
+    response = await _acreate(**params)
+    observe_response("specials", response)
+    result = await complete_structured_async(response, SPECIALS_TOOL, params["model"])
+    return finalize_specials(result)
+
+
+def generate_weekend_specials(
+    trend_analysis: dict,
+    restaurant_type: str,
+    price_range: str,
+    season: str,
+    model: str | None = None,
+) -> dict:
+    """Sync wrapper around generate_weekend_specials_async()."""
+    return _run_sync(generate_weekend_specials_async(
+        trend_analysis, restaurant_type, price_range, season, model=model
+    ))
+
+
+# ══════════════════════════════════════════
+#  STEP 3 — Weekly Report Narrative
+# ══════════════════════════════════════════
+# Stop sequence: generation ends right after the report instead of trailing chatter
+REPORT_END = "=== END OF REPORT ==="
+
+
+def _report_prompt(trend_analysis: dict, specials: dict) -> str:
     city = trend_analysis.get("city", "India")
     dishes = specials.get("weekend_specials", [])
 
@@ -266,7 +786,7 @@ def generate_weekly_report(
         for i, d in enumerate(dishes)
     ])
 
-    prompt = f"""Write a professional weekly food trend report for a restaurant owner in {city}.
+    return f"""Write a professional weekly food trend report for a restaurant owner in {city}.
 
 TREND DATA:
 {trend_analysis.get('analysis_summary', '')}
@@ -285,46 +805,208 @@ Write a concise, actionable report (300-400 words) covering:
 5. Revenue Outlook
 
 Use clear headers. Be specific to {city}'s food culture. 
-Write like a paid consultant — confident, data-backed, actionable."""
+Write like a paid consultant — confident, data-backed, actionable.
+End with the line {REPORT_END} right after the Revenue Outlook, with nothing after it."""
+
+
+def report_request(trend_analysis: dict, specials: dict, model: str | None = None) -> dict:
+    """messages.create params for step 3 (shared by the live and batch paths)."""
+    return {
+        "model": model or model_for("report"),
+        "max_tokens": max_tokens_for("report"),
+        "stop_sequences": [REPORT_END],
+        "messages": [{"role": "user", "content": _report_prompt(trend_analysis, specials)}],
+    }
+
+
+async def generate_weekly_report_async(
+    trend_analysis: dict,
+    specials: dict,
+    model: str | None = None,
+) -> str:
+    """
+    Generates a professional weekly trend report narrative using Claude.
+    """
+    response = await _acreate(**report_request(trend_analysis, specials, model))
+    observe_response("report", response)
+    return response.content[0].text.strip()
 
-    response = client.messages.create(
-        model=MODEL,
-        max_tokens=800,
-        messages=[{"role": "user", "content": prompt}]
+
+def generate_weekly_report(
+    trend_analysis: dict,
+    specials: dict,
+    model: str | None = None,
+) -> str:
+    """Sync wrapper around generate_weekly_report_async()."""
+    return _run_sync(generate_weekly_report_async(trend_analysis, specials, model=model))
+
+
+# ══════════════════════════════════════════
+#  ONE-SHOT — all three artifacts in one call
+# ══════════════════════════════════════════
+def _one_shot_prompt(
+    scraped_data: dict,
+    restaurant_type: str,
+    price_range: str,
+    season: str,
+) -> str:
+    city = scraped_data.get("city", "India")
+
+    prompt = f"""You are an expert Indian food trend analyst and India's #1 restaurant revenue strategist.
+
+I've scraped real-time data from Google, Zomato, food news sites, and Instagram for {city}.
+
+{_CONTEXT_SLOT}
+
+CITY: {city}
+RESTAURANT TYPE: {restaurant_type}
+PRICE RANGE: {price_range} (ALL prices in Indian Rupees ₹)
+SEASON: {season}
+
+Based on ALL above data + your knowledge of {city}'s food scene (real restaurants, famous dishes, local culture),
+produce all three parts in ONE answer with the record_full_pipeline tool:
+
+1. trend_analysis — trending ingredients (hot|rising|steady), famous dishes at real restaurants,
+   viral hashtags, declining trends, engagement patterns and stats.
+
+2. specials — 5 UNIQUE weekend special dishes, each inspired by REAL local dishes/restaurants with a
+   creative modern twist, matching the restaurant type and price range, realistic for a busy weekend
+   kitchen and strong on Instagram Reels. Avoid the declining trends. Exactly:
+   - 1 × "low-cost high-margin" (low food cost, max profit)
+   - 1 × "premium upsell" (luxury, high perceived value)
+   - 1 × "highly instagrammable" (viral visual wow factor)
+   - 2 × "weekend performer" (solid crowd-pleasers)
+
+3. weekly_report — a concise, actionable report (300-400 words) for the restaurant owner with clear headers:
+   This Week's Food Trend Summary, Why These 5 Dishes Were Chosen, Operational Tips for the Weekend,
+   Social Media & Marketing Recommendations, Revenue Outlook.
+   Write like a paid consultant — confident, data-backed, actionable."""
+    # Same room for scraped context as step 1, although the pipeline tool's schema is larger
+    budget = INPUT_TOKEN_BUDGET + count_tool_tokens([PIPELINE_TOOL]) - count_tool_tokens([ANALYSIS_TOOL])
+    return _fill_scraped_context(prompt, scraped_data, PIPELINE_TOOL, budget)
+
+
+def one_shot_request(
+    scraped_data: dict,
+    restaurant_type: str,
+    price_range: str,
+    season: str,
+    model: str | None = None,
+) -> dict:
+    """messages.create params for the single-call pipeline."""
+    return _structured_request(
+        _one_shot_prompt(scraped_data, restaurant_type, price_range, season),
+        PIPELINE_TOOL, max_tokens=max_tokens_for("one_shot"),
+        model=model or model_for("specials"),
     )
-    return response.content[0].text
+
+
+async def run_one_shot_pipeline_async(
+    scraped_data: dict,
+    restaurant_type: str = "Modern Indian Bistro",
+    price_range: str = "₹₹₹ (₹600–1500/head)",
+    season: str = "Monsoon (Jul–Sep)",
+    verbose: bool = True,
+) -> dict:
+    """
+    Analysis, specials and report from ONE structured Claude response —
+    one round trip instead of three. Same output shape as run_full_pipeline().
+    """
+    city  = scraped_data.get("city", "India")
+    model = model_for("specials")
+
+    if verbose: print(f"\n🤖 Running one-shot LLM pipeline for {city} ({model})...")
+    params = one_shot_request(scraped_data, restaurant_type, price_range, season, model)
+    with track_usage() as usage:
+        response = await _acreate(**params)
+        observe_response("one_shot", response)
+        result   = await complete_structured_async(response, PIPELINE_TOOL, model)
+    if verbose: print(_usage_line(usage))
+    if verbose: print("  ✅ LLM pipeline complete!")
+
+    nested = PIPELINE_TOOL["input_schema"]["properties"]
+    return {
+        "city": city,
+        "trend_analysis": clean_arrays(result["trend_analysis"], nested["trend_analysis"]),
+        "specials": finalize_specials(clean_arrays(result["specials"], nested["specials"])),
+        "weekly_report": result["weekly_report"],
+        "config": {"restaurant_type": restaurant_type, "price_range": price_range, "season": season},
+    }
 
 
 # ══════════════════════════════════════════
 #  CONVENIENCE — run full pipeline
 # ══════════════════════════════════════════
-def run_full_pipeline(
+async def run_full_pipeline_async(
     scraped_data: dict,
     restaurant_type: str = "Modern Indian Bistro",
     price_range: str = "₹₹₹ (₹600–1500/head)",
     season: str = "Monsoon (Jul–Sep)",
     verbose: bool = True,
+    one_shot: bool | None = None,
+    incremental: bool | None = None,
+    full_refresh: bool = False,
+    trend_analysis: dict | None = None,
+    on_stage=None,
 ) -> dict:
     """
     Runs the complete LLM pipeline:
     scraped_data → trend_analysis → specials → report
 
     Returns dict with all three outputs.
+    Each stage's model comes from llm/model_router.py; once the run exceeds
+    its latency budget the remaining stages switch to the fast model.
+    With one_shot=True (default: FOOD_AGENT_ONE_SHOT=1) all three come from
+    a single call instead — see run_one_shot_pipeline_async().
+    With incremental=True (default: FOOD_AGENT_INCREMENTAL=1) step 1 only sends
+    what changed since last week's run; full_refresh=True forces a full analysis.
+    A precomputed `trend_analysis` (e.g. from analyze_cities_async) skips step 1.
+    on_stage(stage, step, total) is called as each stage starts (progress bars).
     """
-    city = scraped_data.get("city", "India")
+    if one_shot is None:
+        one_shot = ONE_SHOT
+    if one_shot:
+        if on_stage: on_stage("one-shot", 1, 1)
+        return await run_one_shot_pipeline_async(
+            scraped_data, restaurant_type, price_range, season, verbose=verbose
+        )
+
+    if incremental is None:
+        incremental = INCREMENTAL
+
+    city    = scraped_data.get("city", "India")
+    started = time.monotonic()
 
     if verbose: print(f"\n🤖 Running LLM analysis for {city}...")
 
-    if verbose: print("  [1/3] Analyzing scraped data with Claude...")
-    trend_analysis = analyze_scraped_data(scraped_data)
+    if on_stage: on_stage("analysis", 1, 3)
+    if trend_analysis is not None:
+        if verbose: print("  [1/3] Using precomputed trend analysis")
+    else:
+        model = model_for("analysis", time.monotonic() - started)
+        if verbose: print(f"  [1/3] Analyzing scraped data with Claude ({model})...")
+        with track_usage() as usage:
+            if incremental:
+                trend_analysis = await analyze_incremental_async(scraped_data, model, full_refresh)
+            else:
+                trend_analysis = await analyze_scraped_data_async(scraped_data, model=model)
+        if verbose: print(_usage_line(usage))
 
-    if verbose: print("  [2/3] Generating weekend specials...")
-    specials = generate_weekend_specials(
-        trend_analysis, restaurant_type, price_range, season
-    )
+    model = model_for("specials", time.monotonic() - started)
+    if on_stage: on_stage("specials", 2, 3)
+    if verbose: print(f"  [2/3] Generating weekend specials ({model})...")
+    with track_usage() as usage:
+        specials = await generate_weekend_specials_async(
+            trend_analysis, restaurant_type, price_range, season, model=model
+        )
+    if verbose: print(_usage_line(usage))
 
-    if verbose: print("  [3/3] Writing weekly report...")
-    report = generate_weekly_report(trend_analysis, specials)
+    model = model_for("report", time.monotonic() - started)
+    if on_stage: on_stage("report", 3, 3)
+    if verbose: print(f"  [3/3] Writing weekly report ({model})...")
+    with track_usage() as usage:
+        report = await generate_weekly_report_async(trend_analysis, specials, model=model)
+    if verbose: print(_usage_line(usage))
 
     if verbose: print("  ✅ LLM pipeline complete!")
 
@@ -333,9 +1015,63 @@ def run_full_pipeline(
         "trend_analysis": trend_analysis,
         "specials": specials,
         "weekly_report": report,
+        "config": {"restaurant_type": restaurant_type, "price_range": price_range, "season": season},
     }
 
 
+def run_full_pipeline(
+    scraped_data: dict,
+    restaurant_type: str = "Modern Indian Bistro",
+    price_range: str = "₹₹₹ (₹600–1500/head)",
+    season: str = "Monsoon (Jul–Sep)",
+    verbose: bool = True,
+    one_shot: bool | None = None,
+    incremental: bool | None = None,
+    full_refresh: bool = False,
+    on_stage=None,
+) -> dict:
+    """Sync wrapper around run_full_pipeline_async()."""
+    return _run_sync(run_full_pipeline_async(
+        scraped_data, restaurant_type, price_range, season,
+        verbose=verbose, one_shot=one_shot,
+        incremental=incremental, full_refresh=full_refresh, on_stage=on_stage,
+    ))
+
+
+async def run_many_async(
+    scraped_list: list[dict],
+    multi_city_analysis: bool = False,
+    on_output=None,
+    **pipeline_kwargs,
+) -> list[dict]:
+    """
+    Run the full pipeline for several cities concurrently on one event loop.
+    Claude calls across all cities share the MAX_CONCURRENT_CALLS semaphore.
+    With multi_city_analysis=True step 1 is done for groups of cities at once
+    (see analyze_cities_async) before each city's specials + report.
+    on_output(output) is called for each city as soon as it finishes.
+    The loop's client is closed at the end if this call created it.
+    """
+    owns_client = asyncio.get_running_loop() not in _loop_state
+    try:
+        analyses = [None] * len(scraped_list)
+        if multi_city_analysis:
+            analyses = await analyze_cities_async(scraped_list)
+
+        async def _one(scraped, analysis):
+            output = await run_full_pipeline_async(scraped, trend_analysis=analysis, **pipeline_kwargs)
+            if on_output:
+                on_output(output)
+            return output
+
+        return await asyncio.gather(*[
+            _one(scraped, analysis) for scraped, analysis in zip(scraped_list, analyses)
+        ])
+    finally:
+        if owns_client:
+            await close_client()
+
+
 if __name__ == "__main__":
     # Quick test with dummy data
     dummy = {
@@ -0,0 +1,79 @@
+"""
+llm/model_router.py
+━━━━━━━━━━━━━━━━━━━
+Picks the Claude model for each pipeline stage:
+  • analysis — extraction from scraped data   (fast model by default)
+  • specials — creative dish generation       (strong model by default)
+  • report   — weekly narrative              (fast model by default)
+
+Configure via environment variables:
+  FOOD_AGENT_FAST_MODEL, FOOD_AGENT_STRONG_MODEL
+  FOOD_AGENT_MODEL_ANALYSIS / _SPECIALS / _REPORT   ("fast", "strong" or a model id)
+  FOOD_AGENT_LATENCY_BUDGET_S   (pipeline budget; 0 = no fallback)
+
+or from the CLI through configure_routing(). Once a pipeline run has used
+up its latency budget, every remaining stage falls back to the fast model.
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STAGES = ("analysis", "specials", "report")
+
+DEFAULT_ROUTES = {
+    "analysis": "fast",
+    "specials": "strong",
+    "report":   "fast",
+}
+
+_config = {
+    "fast":   os.getenv("FOOD_AGENT_FAST_MODEL",   "claude-haiku-4-5-20251001"),
+    "strong": os.getenv("FOOD_AGENT_STRONG_MODEL", "claude-opus-4-6"),
+    "routes": {
+        stage: os.getenv(f"FOOD_AGENT_MODEL_{stage.upper()}", DEFAULT_ROUTES[stage])
+        for stage in STAGES
+    },
+    "latency_budget_s": float(os.getenv("FOOD_AGENT_LATENCY_BUDGET_S", "60")),
+}
+
+
+def configure_routing(
+    routes: dict | None = None,
+    fast_model: str | None = None,
+    strong_model: str | None = None,
+    latency_budget_s: float | None = None,
+) -> dict:
+    """Override routing at runtime (e.g. from CLI flags). Returns the active config."""
+    if fast_model:
+        _config["fast"] = fast_model
+    if strong_model:
+        _config["strong"] = strong_model
+    for stage, route in (routes or {}).items():
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage {stage!r} (expected one of {', '.join(STAGES)})")
+        if route:
+            _config["routes"][stage] = route
+    if latency_budget_s is not None:
+        _config["latency_budget_s"] = latency_budget_s
+    return routing_config()
+
+
+def routing_config() -> dict:
+    return {**_config, "routes": dict(_config["routes"])}
+
+
+def _resolve(route: str) -> str:
+    return _config[route] if route in ("fast", "strong") else route
+
+
+def model_for(stage: str, elapsed_s: float | None = None) -> str:
+    """
+    Model id for `stage`. Pass the pipeline's elapsed wall time to enable
+    the fallback to the fast model once the latency budget is exceeded.
+    """
+    budget = _config["latency_budget_s"]
+    if elapsed_s is not None and budget and elapsed_s >= budget:
+        return _config["fast"]
+    return _resolve(_config["routes"][stage])
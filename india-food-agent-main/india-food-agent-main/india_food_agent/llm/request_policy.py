@@ -0,0 +1,285 @@
+"""
+llm/request_policy.py
+━━━━━━━━━━━━━━━━━━━━━
+Deadlines, retries and hedging around every Claude call:
+  • per-stage deadline — the call, retries included, gives up after it
+  • retries with full-jitter exponential backoff on 429 / 529 / 5xx and
+    connection errors, honouring retry-after when the API sends one
+  • optional hedging — if no first token has arrived by the stage's
+    observed p95 time-to-first-token, a duplicate request is fired and
+    whichever starts answering first wins; the other one is cancelled
+
+Hedges are capped at FOOD_AGENT_HEDGE_MAX_RATIO of all calls, so the extra
+spend stays bounded however slow the API gets.
+
+Configure via environment variables:
+  FOOD_AGENT_DEADLINE_ANALYSIS_S / _SPECIALS_S / _REPORT_S / _ONE_SHOT_S   (0 = none)
+  FOOD_AGENT_MAX_RETRIES        (default 4)
+  FOOD_AGENT_HEDGE=1            (hedging is off by default)
+  FOOD_AGENT_HEDGE_MAX_RATIO    (default 0.05 — at most 1 hedge per 20 calls)
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import time
+from collections import deque
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_DEADLINES_S = {
+    "analysis": 90,
+    "specials": 120,
+    "report":   45,
+    "one_shot": 180,
+}
+DEADLINES_S = {
+    stage: float(os.getenv(f"FOOD_AGENT_DEADLINE_{stage.upper()}_S", str(default)))
+    for stage, default in DEFAULT_DEADLINES_S.items()
+}
+
+MAX_RETRIES        = int(os.getenv("FOOD_AGENT_MAX_RETRIES", "4"))
+RETRY_BASE_DELAY_S = 0.5
+RETRY_MAX_DELAY_S  = 20.0
+RETRY_STATUS       = (408, 409, 429)   # plus every 5xx, incl. 529 overloaded
+DEADLINE_SLACK_S   = 0.005              # the loop's timer may fire this much before t_end
+
+HEDGE              = os.getenv("FOOD_AGENT_HEDGE", "0") == "1"
+HEDGE_MAX_RATIO    = float(os.getenv("FOOD_AGENT_HEDGE_MAX_RATIO", "0.05"))
+HEDGE_MIN_SAMPLES  = 20     # no hedging until the p95 is based on this many calls
+TTFT_WINDOW        = 200
+
+# Tool name → stage; a call without tools is the free-text report
+TOOL_STAGES = {
+    "record_trend_analysis":        "analysis",
+    "record_trend_analysis_update": "analysis",
+    "record_city_analyses":         "analysis",
+    "record_weekend_specials":      "specials",
+    "record_full_pipeline":         "one_shot",
+}
+
+_ttft   = {}                            # stage → recent time-to-first-token samples
+_counts = {"calls": 0, "hedges": 0}
+
+
+class DeadlineExceeded(TimeoutError):
+    """A Claude call (retries and hedges included) ran past its stage deadline."""
+
+
+def stage_of(params: dict) -> str:
+    """Pipeline stage of a messages.create request, from its forced tool."""
+    tools = params.get("tools") or []
+    return TOOL_STAGES.get(tools[0]["name"], "analysis") if tools else "report"
+
+
+# ══════════════════════════════════════════
+#  RETRIES
+# ══════════════════════════════════════════
+def is_retryable(exc: Exception) -> bool:
+    """Overload, rate-limit, server and connection errors are worth another try."""
+    import anthropic     # already loaded by whoever raised the error; kept off the import path
+    if isinstance(exc, anthropic.APIConnectionError):       # includes APITimeoutError
+        return True
+    if isinstance(exc, anthropic.APIStatusError):
+        if exc.status_code in RETRY_STATUS or exc.status_code >= 500:
+            return True
+        # errors sent mid-stream arrive on a 200 response
+        body = exc.body if isinstance(exc.body, dict) else {}
+        return (body.get("error") or {}).get("type") in ("overloaded_error", "rate_limit_error", "api_error")
+    return False
+
+
+def backoff_delay(retry: int, exc: Exception | None = None) -> float:
+    """Seconds to wait before retry number `retry` (0-based): retry-after, else full jitter."""
+    response = getattr(exc, "response", None)
+    if response is not None:
+        try:
+            return min(float(response.headers.get("retry-after")), RETRY_MAX_DELAY_S)
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, min(RETRY_MAX_DELAY_S, RETRY_BASE_DELAY_S * 2 ** retry))
+
+
+# ══════════════════════════════════════════
+#  HEDGING
+# ══════════════════════════════════════════
+def record_ttft(stage: str, seconds: float) -> None:
+    _ttft.setdefault(stage, deque(maxlen=TTFT_WINDOW)).append(seconds)
+
+
+def ttft_p95(stage: str) -> float | None:
+    """Observed p95 time-to-first-token for `stage`, once there are enough samples."""
+    samples = _ttft.get(stage, ())
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    return statistics.quantiles(samples, n=20)[-1]
+
+
+def _hedge_allowed() -> bool:
+    return _counts["hedges"] + 1 <= HEDGE_MAX_RATIO * _counts["calls"]
+
+
+def policy_stats() -> dict:
+    """Calls, hedges fired and current p95 TTFT per stage (for logs / benchmarks)."""
+    return {**_counts, "ttft_p95_s": {stage: ttft_p95(stage) for stage in _ttft}}
+
+
+class AttemptTimer:
+    """
+    Handed to each attempt. The attempt calls hold() while it waits locally
+    (e.g. in the rate governor), sent() once the request is on the wire and
+    first_token() when the response starts streaming. TTFT and the hedge
+    clock only count time on the wire.
+    """
+
+    def __init__(self):
+        self.launched  = time.monotonic()
+        self.sent_at   = self.launched
+        self.held      = False
+        self.ttft_s    = None
+        self.started   = asyncio.Event()
+        self.on_wire   = asyncio.Event()
+
+    def hold(self):
+        self.held = True
+        self.on_wire.clear()
+
+    def sent(self):
+        self.held    = False
+        self.sent_at = time.monotonic()
+        self.on_wire.set()
+
+    def first_token(self):
+        if not self.started.is_set():
+            self.ttft_s = time.monotonic() - self.sent_at
+            self.started.set()
+
+    @property
+    def queue_s(self) -> float:
+        return self.sent_at - self.launched
+
+
+async def _race(attempt, stage: str, stats: dict, hedge: bool):
+    """
+    Run `attempt`, plus one hedge if it hasn't started answering by the p95.
+    The first runner to stream a token (or finish) wins; the other is cancelled.
+    """
+    _counts["calls"] += 1
+    hedge_after = ttft_p95(stage) if hedge else None
+    runners = []
+
+    def launch():
+        timer = AttemptTimer()
+        runners.append({"timer": timer, "task": asyncio.ensure_future(attempt(timer))})
+
+    def ready(r):
+        task = r["task"]
+        return r["timer"].started.is_set() or (task.done() and not task.cancelled() and task.exception() is None)
+
+    launch()
+    try:
+        while True:
+            winner = next((r for r in runners if ready(r)), None)
+            if winner:
+                break
+            if all(r["task"].done() for r in runners):
+                return await runners[-1]["task"]          # every runner failed: re-raise the latest
+
+            primary   = runners[0]["timer"]
+            can_hedge = hedge_after is not None and len(runners) == 1
+            live      = [r for r in runners if not r["task"].done()]
+            waiters   = [asyncio.ensure_future(r["timer"].started.wait()) for r in live]
+            if can_hedge and primary.held:
+                # The hedge clock starts at sent(): until then just wait for it, with no timeout
+                timeout = None
+                waiters.append(asyncio.ensure_future(primary.on_wire.wait()))
+            else:
+                timeout = max(0.0, primary.sent_at + hedge_after - time.monotonic()) if can_hedge else None
+            try:
+                done, _ = await asyncio.wait([r["task"] for r in live] + waiters,
+                                             timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for w in waiters:
+                    w.cancel()                             # also when we are cancelled mid-wait
+            if done or not can_hedge:
+                continue
+            if primary.held or time.monotonic() < primary.sent_at + hedge_after:
+                continue                                   # still queued locally, or just sent
+            if _hedge_allowed():
+                _counts["hedges"] += 1
+                stats["hedged"] = True
+                launch()
+            else:
+                hedge_after = None                         # out of hedge budget: just wait
+
+        for r in runners:
+            if r is not winner:
+                r["task"].cancel()
+        result = await winner["task"]
+        timer  = winner["timer"]
+        ttft   = timer.ttft_s if timer.ttft_s is not None else time.monotonic() - timer.sent_at
+        stats["ttft_s"]  = ttft
+        stats["queue_s"] = timer.queue_s
+        record_ttft(stage, ttft)
+        return result
+    finally:
+        for r in runners:
+            if not r["task"].done():
+                r["task"].cancel()
+            elif not r["task"].cancelled():
+                r["task"].exception()                      # mark losers' errors as retrieved
+
+
+# ══════════════════════════════════════════
+#  POLICY
+# ══════════════════════════════════════════
+async def call_with_policy(
+    attempt,
+    stage: str,
+    deadline_s: float | None = None,
+    hedge: bool | None = None,
+    stats: dict | None = None,
+):
+    """
+    Run one Claude call under `stage`'s deadline, retry and hedge policy.
+
+    `attempt(timer)` is an async callable that sends the request once and
+    reports its progress on the AttemptTimer it is given.
+
+    Returns (result, stats) with stats = {"stage", "retries", "hedged",
+    "ttft_s", "queue_s"}; pass your own `stats` dict to keep them when the
+    call raises. Raises DeadlineExceeded once the deadline has passed, or
+    the last API error when it isn't retryable / retries are used up.
+    """
+    if deadline_s is None:
+        deadline_s = DEADLINES_S.get(stage, 0)
+    if hedge is None:
+        hedge = HEDGE
+
+    if stats is None:
+        stats = {}
+    stats.update({"stage": stage, "retries": 0, "hedged": False, "ttft_s": None, "queue_s": None})
+    t_end = time.monotonic() + deadline_s if deadline_s else None
+
+    while True:
+        remaining = None if t_end is None else t_end - time.monotonic()
+        try:
+            result = await asyncio.wait_for(_race(attempt, stage, stats, hedge), remaining)
+            return result, stats
+        except asyncio.TimeoutError as e:
+            if t_end is None or time.monotonic() < t_end - DEADLINE_SLACK_S:
+                raise       # raised inside the attempt (SDK, governor), not our deadline
+            raise DeadlineExceeded(
+                f"{stage} call exceeded its {deadline_s:g}s deadline ({stats['retries']} retries)"
+            ) from e
+        except Exception as e:
+            if not is_retryable(e) or stats["retries"] >= MAX_RETRIES:
+                raise
+            delay = backoff_delay(stats["retries"], e)
+            if t_end is not None and time.monotonic() + delay >= t_end:
+                raise
+            stats["retries"] += 1
+            await asyncio.sleep(delay)
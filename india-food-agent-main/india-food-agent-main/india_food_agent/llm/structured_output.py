@@ -0,0 +1,348 @@
+"""
+llm/structured_output.py
+━━━━━━━━━━━━━━━━━━━━━━━━
+Structured output for the Claude steps:
+  1. JSON schemas + tool definitions for the analysis and specials payloads
+  2. Fast validator that repairs slightly malformed / truncated JSON
+  3. Helpers to find and merge back fields that a response left out
+
+A response that is *almost* right (trailing comma, prose around the JSON,
+cut off at max_tokens) is repaired locally, and only the missing fields are
+re-requested — instead of throwing away the whole pipeline run.
+"""
+
+import json
+import re
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a payload can't be repaired or completed."""
+
+    def __init__(self, message: str, partial: dict | None = None):
+        super().__init__(message)
+        self.partial = partial or {}
+
+
+# ══════════════════════════════════════════
+#  SCHEMAS
+# ══════════════════════════════════════════
+_STR = {"type": "string"}
+_NUM = {"type": "number"}
+
+
+def _obj(properties: dict, required: list[str] | None = None) -> dict:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": required if required is not None else list(properties),
+    }
+
+
+ANALYSIS_SCHEMA = _obj({
+    "city": _STR,
+    "analysis_summary": _STR,
+    "trending_ingredients": {
+        "type": "array",
+        "minItems": 1,
+        "items": _obj({
+            "name": _STR,
+            "emoji": _STR,
+            "growth_pct": _NUM,
+            "context": _STR,
+            "status": {"type": "string", "enum": ["hot", "rising", "steady"]},
+        }),
+    },
+    "famous_dishes_trending": {
+        "type": "array",
+        "items": _obj({
+            "dish_name": _STR,
+            "famous_at": _STR,
+            "saves_estimate": _STR,
+            "engagement_pct": _NUM,
+            "why_famous": _STR,
+        }),
+    },
+    "viral_hashtags": {
+        "type": "array",
+        "items": _obj({
+            "tag": _STR,
+            "growth_pct": _NUM,
+            "type": {"type": "string", "enum": ["viral", "hot", "rising", "new"]},
+        }),
+    },
+    "declining_trends": {
+        "type": "array",
+        "items": _obj({
+            "name": _STR,
+            "decline_pct": _STR,
+            "reason": _STR,
+        }),
+    },
+    "engagement_patterns": _STR,
+    "stats": _obj({
+        "posts_analyzed": _STR,
+        "top_dish_saves": _STR,
+        "hashtags_count": {"type": "integer"},
+    }),
+})
+
+SPECIALS_SCHEMA = _obj({
+    "city": _STR,
+    "generated_at": _STR,
+    "top_weekend_ingredients": {"type": "array", "items": _STR},
+    "weekend_specials": {
+        "type": "array",
+        "minItems": 5,
+        "maxItems": 5,
+        "items": _obj({
+            "dish_name": _STR,
+            "category": {
+                "type": "string",
+                "enum": ["low-cost high-margin", "premium upsell",
+                         "highly instagrammable", "weekend performer"],
+            },
+            "key_trending_ingredient": _STR,
+            "inspired_by": _STR,
+            "description": _STR,
+            "ingredients_needed": {"type": "array", "items": _STR},
+            "prep_time_mins": _NUM,
+            "food_cost_level": {"type": "string", "enum": ["Low", "Medium", "High"]},
+            "estimated_food_cost_inr": _STR,
+            "suggested_price_range": _STR,
+            "gross_margin_pct": _STR,
+            "plating_tip": _STR,
+            "reels_tip": _STR,
+            "why_it_will_trend": _STR,
+            "predicted_demand": {"type": "string", "enum": ["Low", "Medium", "High"]},
+            "best_served": {"type": "string", "enum": ["lunch", "dinner", "both"]},
+        }),
+    },
+    "strategic_insight": _STR,
+    "revenue_projection": _STR,
+}, required=["city", "top_weekend_ingredients", "weekend_specials",
+             "strategic_insight", "revenue_projection"])
+
+# One-shot mode: all three pipeline artifacts in a single response
+PIPELINE_SCHEMA = _obj({
+    "trend_analysis": ANALYSIS_SCHEMA,
+    "specials":       SPECIALS_SCHEMA,
+    "weekly_report":  _STR,
+})
+
+
+ANALYSIS_TOOL = {
+    "name": "record_trend_analysis",
+    "description": "Record the structured food trend analysis for one Indian city.",
+    "input_schema": ANALYSIS_SCHEMA,
+}
+
+SPECIALS_TOOL = {
+    "name": "record_weekend_specials",
+    "description": "Record the 5 weekend special dishes and the strategy behind them.",
+    "input_schema": SPECIALS_SCHEMA,
+}
+
+# Several cities analysed in one call
+MULTI_ANALYSIS_TOOL = {
+    "name": "record_city_analyses",
+    "description": "Record one structured food trend analysis per Indian city, in the order given.",
+    "input_schema": _obj({"analyses": {"type": "array", "items": ANALYSIS_SCHEMA}}),
+}
+
+# Incremental mode: only the top-level fields that changed since last week
+ANALYSIS_UPDATE_TOOL = {
+    "name": "record_trend_analysis_update",
+    "description": "Record ONLY the top-level trend analysis fields that changed; omitted fields keep last week's values.",
+    "input_schema": _obj(ANALYSIS_SCHEMA["properties"], required=[]),
+}
+
+PIPELINE_TOOL = {
+    "name": "record_full_pipeline",
+    "description": "Record the trend analysis, the 5 weekend specials and the weekly report in one go.",
+    "input_schema": PIPELINE_SCHEMA,
+}
+
+
+def tool_choice(tool: dict) -> dict:
+    """Force Claude to answer through the given tool."""
+    return {"type": "tool", "name": tool["name"]}
+
+
+def subset_tool(tool: dict, fields: list[str]) -> dict:
+    """Tool definition restricted to `fields` — used for continuation calls."""
+    schema = tool["input_schema"]
+    props  = {k: schema["properties"][k] for k in fields if k in schema["properties"]}
+    return {
+        "name": tool["name"],
+        "description": tool["description"] + " Only the requested fields.",
+        "input_schema": _obj(props),
+    }
+
+
+# ══════════════════════════════════════════
+#  REPAIR
+# ══════════════════════════════════════════
+_FENCE_RE          = re.compile(r"```(?:json)?")
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+
+def _close_truncated(text: str) -> str:
+    """
+    Cut a truncated JSON object back to its last complete element and
+    close every bracket that is still open.
+    """
+    stack, in_str, esc = [], False, False
+    last_safe = None   # (cut index, closers still open at that point)
+
+    for i, ch in enumerate(text):
+        if in_str:
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                in_str = False
+            continue
+        if ch == '"':
+            in_str = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return text[:i + 1]
+            last_safe = (i + 1, list(stack))
+        elif ch == ",":
+            last_safe = (i, list(stack))
+
+    if last_safe is None:
+        raise StructuredOutputError("JSON truncated before its first complete field")
+    cut, still_open = last_safe
+    return text[:cut] + "".join(reversed(still_open))
+
+
+def repair_json(raw: str) -> dict:
+    """
+    Parse Claude's text output as a JSON object, tolerating:
+      • markdown fences and prose before/after the object
+      • trailing commas
+      • truncation (e.g. stop_reason == "max_tokens")
+    Raises StructuredOutputError if nothing usable is left.
+    """
+    text  = _FENCE_RE.sub("", raw or "").strip()
+    start = text.find("{")
+    if start < 0:
+        raise StructuredOutputError("No JSON object in response")
+    text = text[start:]
+
+    decoder = json.JSONDecoder()
+    for candidate in (text, _TRAILING_COMMA_RE.sub(r"\1", text)):
+        try:
+            data, _ = decoder.raw_decode(candidate)
+            if isinstance(data, dict):
+                return data
+        except json.JSONDecodeError:
+            pass
+
+    closed = _TRAILING_COMMA_RE.sub(r"\1", _close_truncated(text))
+    try:
+        data, _ = decoder.raw_decode(closed)
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"Unrepairable JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise StructuredOutputError("Top-level JSON value is not an object")
+    return data
+
+
+def extract_payload(response) -> dict:
+    """
+    Pull the structured payload out of a messages.create response:
+    the tool_use input if Claude used the tool, else repaired text.
+    """
+    text_parts = []
+    for block in response.content:
+        if getattr(block, "type", "") == "tool_use" and isinstance(block.input, dict):
+            return dict(block.input)
+        if getattr(block, "type", "") == "text":
+            text_parts.append(block.text)
+    return repair_json("".join(text_parts))
+
+
+# ══════════════════════════════════════════
+#  VALIDATE + COMPLETE
+# ══════════════════════════════════════════
+_JSON_TYPES = {
+    "string":  str,
+    "number":  (int, float),
+    "integer": int,
+    "boolean": bool,
+    "array":   list,
+    "object":  dict,
+}
+
+
+def _is_type(value, json_type: str | None) -> bool:
+    """isinstance() for a JSON schema type; bool is a subclass of int but not a number."""
+    if isinstance(value, bool):
+        return json_type in (None, "boolean")
+    return isinstance(value, _JSON_TYPES.get(json_type, object))
+
+
+def _is_complete_item(item, schema: dict) -> bool:
+    if schema.get("type") != "object":
+        return _is_type(item, schema.get("type"))
+    return isinstance(item, dict) and all(k in item for k in schema.get("required", []))
+
+
+def clean_arrays(data: dict, schema: dict) -> dict:
+    """Drop array items that a truncation left half-written."""
+    for key, prop in schema["properties"].items():
+        if prop.get("type") == "array" and isinstance(data.get(key), list):
+            data[key] = [it for it in data[key] if _is_complete_item(it, prop["items"])]
+    return data
+
+
+def missing_fields(data: dict, schema: dict) -> dict:
+    """
+    Required top-level fields that are absent, mistyped or short of items.
+    Returns {field: how_many_more_items} — 0 means "the whole field".
+    """
+    missing = {}
+    for key in schema.get("required", []):
+        prop  = schema["properties"][key]
+        value = data.get(key)
+        if not _is_type(value, prop.get("type")):
+            missing[key] = 0
+        elif prop.get("type") == "array" and len(value) < prop.get("minItems", 0):
+            missing[key] = prop["minItems"] - len(value) if value else 0
+    return missing
+
+
+def continuation_prompt(partial: dict, missing: dict, tool: dict) -> str:
+    """Short follow-up prompt that asks only for what `partial` lacks."""
+    asks = []
+    for key, more in missing.items():
+        if more:
+            asks.append(f"- {key}: {more} MORE item(s), different from the ones already present")
+        else:
+            asks.append(f"- {key}")
+    return f"""Your previous {tool['name']} output was incomplete. Here is what you produced:
+
+{json.dumps(partial, ensure_ascii=False)}
+
+Provide ONLY these fields, consistent with the above, via the {tool['name']} tool:
+{chr(10).join(asks)}"""
+
+
+def merge_fields(partial: dict, patch: dict, missing: dict) -> dict:
+    """Merge a continuation payload into the partial one."""
+    merged = dict(partial)
+    for key in missing:
+        if key not in patch:
+            continue
+        if missing[key] and isinstance(merged.get(key), list) and isinstance(patch[key], list):
+            merged[key] = merged[key] + patch[key][:missing[key]]
+        else:
+            merged[key] = patch[key]
+    return merged
@@ -0,0 +1,187 @@
+"""
+llm/telemetry.py
+━━━━━━━━━━━━━━━━
+Per-call metrics for every Claude call, appended as one JSON line each to
+data/llm_calls.jsonl:
+
+  ts, stage, model, backend, status, wall_s, queue_s, ttft_s,
+  prompt_tokens (local estimate of the request, tool schema included),
+  context_tokens (the packed scraped data in it, when there is any),
+  input_tokens, output_tokens, cache_read_tokens, cache_write_tokens,
+  stop_reason, retries, hedged
+
+The log is append-only and shared by every process on the host, so p50 /
+p95 per stage can be tracked over weeks:
+
+  python -m llm.telemetry                       # last 7 days, by stage
+  python -m llm.telemetry --days 56 --by week,stage
+  python -m llm.telemetry --by model --stage specials
+
+Configure via environment variables:
+  FOOD_AGENT_TELEMETRY=0          to switch logging off
+  FOOD_AGENT_TELEMETRY_PATH       (default data/llm_calls.jsonl)
+"""
+
+import argparse
+import json
+import os
+import statistics
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TELEMETRY_ENABLED = os.getenv("FOOD_AGENT_TELEMETRY", "1") != "0"
+TELEMETRY_PATH    = Path(os.getenv(
+    "FOOD_AGENT_TELEMETRY_PATH",
+    Path(__file__).resolve().parent.parent / "data" / "llm_calls.jsonl",
+))
+
+GROUP_KEYS = {
+    "stage":   lambda r: r.get("stage", "?"),
+    "model":   lambda r: r.get("model", "?"),
+    "backend": lambda r: r.get("backend", "?"),
+    "status":  lambda r: r.get("status", "?"),
+    "day":     lambda r: r["ts"][:10],
+    "week":    lambda r: "{}-W{:02d}".format(*datetime.fromisoformat(r["ts"]).isocalendar()[:2]),
+}
+
+
+def call_record(response, stats: dict, wall_s: float, model: str, backend: str, error: BaseException | None = None,
+                prompt_tokens: int | None = None, context_tokens: int | None = None) -> dict:
+    """One log entry from a finished (or failed) call and its request-policy stats."""
+    usage = getattr(response, "usage", None)
+    return {
+        "ts":                 datetime.now().isoformat(timespec="milliseconds"),
+        "stage":              stats.get("stage"),
+        "model":              getattr(response, "model", None) or model,
+        "backend":            backend,
+        "status":             "ok" if error is None else type(error).__name__,
+        "wall_s":             round(wall_s, 3),
+        "queue_s":            None if stats.get("queue_s") is None else round(stats["queue_s"], 3),
+        "ttft_s":             None if stats.get("ttft_s") is None else round(stats["ttft_s"], 3),
+        "prompt_tokens":      prompt_tokens,
+        "context_tokens":     context_tokens,
+        "input_tokens":       getattr(usage, "input_tokens", None),
+        "output_tokens":      getattr(usage, "output_tokens", None),
+        "cache_read_tokens":  getattr(usage, "cache_read_input_tokens", None),
+        "cache_write_tokens": getattr(usage, "cache_creation_input_tokens", None),
+        "stop_reason":        getattr(response, "stop_reason", None),
+        "retries":            stats.get("retries", 0),
+        "hedged":             stats.get("hedged", False),
+    }
+
+
+def log_call(record: dict) -> None:
+    """Append one record. A single O_APPEND write keeps lines whole across processes."""
+    if not TELEMETRY_ENABLED:
+        return
+    TELEMETRY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    fd = os.open(TELEMETRY_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def load_calls(days: float | None = None, path: Path | None = None) -> list[dict]:
+    """Logged calls, optionally only those from the last `days` days."""
+    path = path or TELEMETRY_PATH
+    if not path.exists():
+        return []
+    cutoff = (datetime.now() - timedelta(days=days)).isoformat() if days else ""
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue        # a line cut short by a crash
+            if row.get("ts", "") >= cutoff:
+                rows.append(row)
+    return rows
+
+
+# ══════════════════════════════════════════
+#  SUMMARY
+# ══════════════════════════════════════════
+def _pct(values: list[float], q: int) -> float | None:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def summarize(rows: list[dict], by: tuple[str, ...] = ("stage",)) -> list[dict]:
+    """One summary row per group: calls, errors, p50 / p95 latency and TTFT, tokens, cache hits."""
+    groups = {}
+    for r in rows:
+        groups.setdefault(tuple(GROUP_KEYS[k](r) for k in by), []).append(r)
+
+    out = []
+    for key, group in sorted(groups.items()):
+        ok     = [r for r in group if r["status"] == "ok"]
+        wall   = [r["wall_s"] for r in ok]
+        ttft   = [r["ttft_s"] for r in ok if r.get("ttft_s") is not None]
+        inputs = sum(r.get("input_tokens") or 0 for r in ok)
+        cached = sum(r.get("cache_read_tokens") or 0 for r in ok)
+        packed = [r["context_tokens"] for r in ok if r.get("context_tokens") is not None]
+        out.append({
+            **dict(zip(by, key)),
+            "calls":          len(group),
+            "errors":         len(group) - len(ok),
+            "wall_p50":       _pct(wall, 50),
+            "wall_p95":       _pct(wall, 95),
+            "ttft_p50":       _pct(ttft, 50),
+            "ttft_p95":       _pct(ttft, 95),
+            "input_tokens":   inputs / len(ok) if ok else 0,
+            "output_tokens":  sum(r.get("output_tokens") or 0 for r in ok) / len(ok) if ok else 0,
+            "context_tokens": sum(packed) / len(packed) if packed else 0,
+            "cache_hit_pct":  100 * cached / (inputs + cached) if inputs + cached else 0,
+            "retries":        sum(r.get("retries", 0) for r in group),
+            "hedged":         sum(1 for r in group if r.get("hedged")),
+        })
+    return out
+
+
+def print_summary(summary: list[dict], by: tuple[str, ...]) -> None:
+    def s(v):
+        return f"{v:.2f}s" if v is not None else "—"
+
+    label_w = max([len(" / ".join(str(row[k]) for k in by)) for row in summary] + [12]) + 2
+    print(f"\n{' / '.join(by):<{label_w}}{'calls':>7}{'err':>5}{'wall p50':>10}{'wall p95':>10}"
+          f"{'ttft p50':>10}{'ttft p95':>10}{'in tok':>9}{'out tok':>9}{'ctx tok':>9}{'cache':>7}{'retry':>7}{'hedge':>7}")
+    print("─" * (label_w + 100))
+    for row in summary:
+        label = " / ".join(str(row[k]) for k in by)
+        print(f"{label:<{label_w}}{row['calls']:>7}{row['errors']:>5}{s(row['wall_p50']):>10}{s(row['wall_p95']):>10}"
+              f"{s(row['ttft_p50']):>10}{s(row['ttft_p95']):>10}{row['input_tokens']:>9.0f}{row['output_tokens']:>9.0f}"
+              f"{row['context_tokens']:>9.0f}{row['cache_hit_pct']:>6.0f}%{row['retries']:>7}{row['hedged']:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise per-call Claude telemetry")
+    parser.add_argument("--days",  type=float, default=7, help="Only calls from the last N days (0 = all)")
+    parser.add_argument("--by",    type=str, default="stage", help=f"Comma-separated: {', '.join(GROUP_KEYS)}")
+    parser.add_argument("--stage", type=str, help="Only this stage")
+    parser.add_argument("--json",  action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    by = tuple(k.strip() for k in args.by.split(",") if k.strip())
+    unknown = [k for k in by if k not in GROUP_KEYS]
+    if unknown:
+        parser.error(f"unknown --by key(s): {', '.join(unknown)}")
+
+    rows = load_calls(args.days or None)
+    if args.stage:
+        rows = [r for r in rows if r.get("stage") == args.stage]
+    if not rows:
+        print(f"No calls logged in {TELEMETRY_PATH}")
+    elif args.json:
+        print(json.dumps(summarize(rows, by), indent=2))
+    else:
+        print_summary(summarize(rows, by), by)
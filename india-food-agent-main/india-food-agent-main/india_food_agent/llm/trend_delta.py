@@ -0,0 +1,126 @@
+"""
+llm/trend_delta.py
+━━━━━━━━━━━━━━━━━━
+Per-city snapshots of the last scrape + trend analysis, and a diff between
+two scrapes. Lets step 1 send Claude only what changed since last week
+instead of re-analysing the whole city from scratch.
+
+Snapshots live in data/trend_history/<city_slug>.json.
+
+Configure via environment variables:
+  FOOD_AGENT_TREND_HISTORY_DIR  (default data/trend_history)
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HISTORY_DIR = Path(os.getenv(
+    "FOOD_AGENT_TREND_HISTORY_DIR",
+    Path(__file__).resolve().parent.parent / "data" / "trend_history",
+))
+
+# Field that identifies an item within each scraped section
+SECTION_KEYS = {
+    "google_results": "title",
+    "zomato_data":    "name",
+    "articles":       "headline",
+    "hashtags":       "hashtag",
+}
+
+
+def _slug(city: str) -> str:
+    return city.split(",")[0].strip().lower().replace(" ", "_")
+
+
+def snapshot_path(city: str) -> Path:
+    return HISTORY_DIR / f"{_slug(city)}.json"
+
+
+def load_city_snapshot(city: str) -> dict | None:
+    """Last stored {"scraped", "trend_analysis", "updated_at"} for `city`, if any."""
+    path = snapshot_path(city)
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_city_snapshot(city: str, scraped_data: dict, trend_analysis: dict) -> str:
+    HISTORY_DIR.mkdir(parents=True, exist_ok=True)
+    path = snapshot_path(city)
+    tmp  = path.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({
+            "city":           city,
+            "updated_at":     datetime.now().isoformat(),
+            "scraped":        scraped_data,
+            "trend_analysis": trend_analysis,
+        }, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    return str(path)
+
+
+def _keyed(items: list, key: str) -> dict:
+    """
+    {(key value, occurrence): item}. Items sharing a key value stay apart by
+    occurrence index; an item without one is keyed by a hash of its content.
+    """
+    keyed, seen = {}, {}
+    for item in items:
+        k = item.get(key) if isinstance(item, dict) else None
+        if k is None:
+            blob = json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+            k    = "#" + hashlib.sha1(blob.encode("utf-8")).hexdigest()[:12]
+        seen[k] = n = seen.get(k, -1) + 1
+        keyed[(k, n)] = item
+    return keyed
+
+
+def diff_scrapes(previous: dict, current: dict) -> dict:
+    """
+    Compare two scrapes section by section, matching items by their
+    SECTION_KEYS field and occurrence (see _keyed).
+
+    Returns:
+      {
+        "added":   {section: [items new this time]},
+        "changed": {section: [items whose content changed]},
+        "removed": {section: [keys of items that disappeared]},   # "#<hash>" for keyless items
+        "unchanged_count": n,
+        "changed_count":   added + changed + removed,
+        "change_ratio":    changed_count / items in the current scrape,
+      }
+    """
+    delta = {"added": {}, "changed": {}, "removed": {}, "unchanged_count": 0}
+    total = 0
+
+    for section, key in SECTION_KEYS.items():
+        old = _keyed(previous.get(section, []), key)
+        new = _keyed(current.get(section, []), key)
+        total += len(new)
+
+        for k, item in new.items():
+            if k not in old:
+                delta["added"].setdefault(section, []).append(item)
+            elif item != old[k]:
+                delta["changed"].setdefault(section, []).append(item)
+            else:
+                delta["unchanged_count"] += 1
+        gone = [k for k, n in old if (k, n) not in new]
+        if gone:
+            delta["removed"][section] = gone
+
+    delta["changed_count"] = (
+        sum(len(v) for v in delta["added"].values())
+        + sum(len(v) for v in delta["changed"].values())
+        + sum(len(v) for v in delta["removed"].values())
+    )
+    delta["change_ratio"] = delta["changed_count"] / (total or 1)
+    return delta
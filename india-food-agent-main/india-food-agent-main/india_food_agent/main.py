@@ -6,9 +6,16 @@ CLI entry point for India Food Trend Agent.
 Usage:
   python main.py
   python main.py --city "Mumbai" --type "Street Food Café" --price "₹₹" --season "Monsoon"
+  python main.py --sweep                      # all CITIES live, grouped analysis calls
+  python main.py --batch                      # all CITIES via Message Batches
+  python main.py --batch --run-id batch_...   # resume an interrupted batch run
+  python main.py --city "Goa" --backend replay # answer from recorded fixtures, no API key
+  python main.py --history                    # newest saved report of every city
+  python main.py --history Pune               # Pune's saved reports
 """
 
 import argparse
+import asyncio
 import json
 import sys
 from pathlib import Path
@@ -17,8 +24,12 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from scraper.trend_scraper  import scrape_all_trends
-from llm.dish_generator     import run_full_pipeline
-from reports.report_generator import save_all
+from llm.dish_generator     import run_full_pipeline, run_many_async
+from llm.model_router       import configure_routing
+from llm.backends           import BACKENDS, configure_backend
+from llm.batch_pipeline     import run_batch_pipeline, load_batch_state
+from reports.report_generator import REPORTS_DIR, report_writer
+from reports.catalog        import latest_by_city, print_reports, reports_between
 
 CITIES = [
     "Hyderabad", "Chennai", "Mumbai", "Delhi", "Bengaluru",
@@ -89,7 +100,20 @@ def interactive_mode():
     return city, rtype, price, season
 
 
-def run(city, restaurant_type, price_range, season, save_reports=True):
+def _collect_saves(jobs):
+    """Wait for queued report saves, attach their paths and report any that failed."""
+    for output, future in jobs:
+        try:
+            output["saved_files"] = future.result()
+        except Exception as e:
+            print(f"  ⚠️ Could not save reports for {output.get('city', '?')}: {e}")
+    saved = sum(1 for output, _ in jobs if "saved_files" in output)
+    if saved:
+        print(f"  📁 Saved reports for {saved} cit{'y' if saved == 1 else 'ies'} to: {REPORTS_DIR}")
+
+
+def run(city, restaurant_type, price_range, season, save_reports=True,
+        one_shot=None, incremental=None, full_refresh=False):
     """Main pipeline runner."""
     print(f"\n🚀 Starting India Food Trend Agent")
     print(f"   City: {city} | Type: {restaurant_type} | Price: {price_range} | Season: {season}")
@@ -104,12 +128,13 @@ def run(city, restaurant_type, price_range, season, save_reports=True):
         price_range     = price_range,
         season          = season,
         verbose         = True,
+        one_shot        = one_shot,
+        incremental     = incremental,
+        full_refresh    = full_refresh,
     )
 
-    # ── Step 3: Save Reports ──
-    if save_reports:
-        paths = save_all(output)
-        output["saved_files"] = paths
+    # ── Step 3: Save Reports (written in the background while the summary prints) ──
+    jobs = [(output, report_writer().submit(output))] if save_reports else []
 
     # ── Print Summary ──
     print("\n" + "═"*55)
@@ -125,9 +150,61 @@ def run(city, restaurant_type, price_range, season, save_reports=True):
     if insight:
         print(f"💡 Strategic Insight:\n   {insight[:200]}...")
 
+    _collect_saves(jobs)
     return output
 
 
+def run_sweep(cities, restaurant_type, price_range, season, save_reports=True):
+    """Live multi-city runner — step 1 analyses several cities per Claude call."""
+    print(f"\n🚀 Starting sweep for {len(cities)} cities")
+    scraped_list = [scrape_all_trends(c, verbose=True) for c in cities]
+
+    # Each city's reports are queued as soon as it finishes, while the rest keep going
+    jobs = []
+    def queue_save(output):
+        if save_reports:
+            jobs.append((output, report_writer().submit(output)))
+
+    outputs = asyncio.run(run_many_async(
+        scraped_list,
+        multi_city_analysis = True,
+        on_output           = queue_save,
+        restaurant_type     = restaurant_type,
+        price_range         = price_range,
+        season              = season,
+        verbose             = False,
+    ))
+    _collect_saves(jobs)
+
+    print(f"\n  ✅ DONE! Generated specials for {len(outputs)} cities")
+    return outputs
+
+
+def run_batch(cities, restaurant_type, price_range, season, run_id=None, save_reports=True):
+    """Nightly multi-city runner — Claude steps go through the Message Batches API."""
+    print(f"\n🚀 Starting batch run for {len(cities)} cities")
+
+    # A resumed run already has its scrapes on disk
+    if run_id and load_batch_state(run_id):
+        scraped_list = []
+    else:
+        scraped_list = [scrape_all_trends(c, verbose=True) for c in cities]
+
+    outputs = run_batch_pipeline(
+        scraped_list,
+        restaurant_type = restaurant_type,
+        price_range     = price_range,
+        season          = season,
+        run_id          = run_id,
+    )
+
+    jobs = [(output, report_writer().submit(output)) for output in outputs] if save_reports else []
+    _collect_saves(jobs)
+
+    print(f"\n  ✅ DONE! Batch generated specials for {len(outputs)} cities")
+    return outputs
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="🇮🇳 India Food Trend Agent — Python + Scraping + Claude AI"
@@ -137,8 +214,56 @@ def main():
     parser.add_argument("--price",   type=str, help="Price range")
     parser.add_argument("--season",  type=str, help="Season")
     parser.add_argument("--no-save", action="store_true", help="Don't save reports to disk")
+    parser.add_argument("--model-analysis", type=str, help="Model for trend analysis ('fast', 'strong' or a model id)")
+    parser.add_argument("--model-specials", type=str, help="Model for weekend specials ('fast', 'strong' or a model id)")
+    parser.add_argument("--model-report",   type=str, help="Model for the weekly report ('fast', 'strong' or a model id)")
+    parser.add_argument("--latency-budget", type=float, help="Seconds before remaining stages fall back to the fast model (0 = off)")
+    parser.add_argument("--one-shot", action="store_true", help="Get analysis, specials and report from a single Claude call")
+    parser.add_argument("--incremental",  action="store_true", help="Only send Claude what changed since last week's run for this city")
+    parser.add_argument("--full-refresh", action="store_true", help="Force a full re-analysis (resets the incremental baseline)")
+    parser.add_argument("--sweep",   action="store_true", help="Run every city in CITIES live, analysing several cities per call")
+    parser.add_argument("--batch",   action="store_true", help="Run every city in CITIES through the Message Batches API")
+    parser.add_argument("--run-id",  type=str, help="Resume the batch run with this id")
+    parser.add_argument("--backend", choices=BACKENDS, help="LLM backend: live API, record fixtures, replay them, or mock")
+    parser.add_argument("--history", type=str, nargs="?", const="", metavar="CITY",
+                        help="List saved reports (newest per city, or every report for CITY) and exit")
     args = parser.parse_args()
 
+    if args.history is not None:
+        print_reports(reports_between(city=args.history) if args.history else latest_by_city())
+        return
+
+    configure_backend(args.backend)
+    configure_routing(
+        routes={
+            "analysis": args.model_analysis,
+            "specials": args.model_specials,
+            "report":   args.model_report,
+        },
+        latency_budget_s=args.latency_budget,
+    )
+
+    if args.sweep:
+        run_sweep(
+            CITIES,
+            args.type   or "Modern Café / Bistro",
+            args.price  or "₹₹₹ (₹600–1500/head)",
+            args.season or "Monsoon (Jul–Sep)",
+            save_reports = not args.no_save,
+        )
+        return
+
+    if args.batch:
+        run_batch(
+            CITIES,
+            args.type   or "Modern Café / Bistro",
+            args.price  or "₹₹₹ (₹600–1500/head)",
+            args.season or "Monsoon (Jul–Sep)",
+            run_id       = args.run_id,
+            save_reports = not args.no_save,
+        )
+        return
+
     if args.city:
         city   = args.city
         rtype  = args.type   or "Modern Café / Bistro"
@@ -147,7 +272,10 @@ def main():
     else:
         city, rtype, price, season = interactive_mode()
 
-    run(city, rtype, price, season, save_reports=not args.no_save)
+    run(city, rtype, price, season, save_reports=not args.no_save,
+        one_shot=args.one_shot or None,
+        incremental=(args.incremental or args.full_refresh) or None,
+        full_refresh=args.full_refresh)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+"""
+reports/benchmark_formats.py
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Write time, read time and disk usage of every saved-output format
+(reports/serialization.py) against the original pretty stdlib JSON:
+
+  encoder (json / orjson) × style (pretty / compact) × compression (none / gzip / zstd)
+
+Each format writes one file per city, as save_all() does, and reads them all
+back. Inputs are the saved *_full.json outputs in reports/output (any
+format), or a synthetic set of full-size multi-city outputs when there are
+none:
+
+  python -m reports.benchmark_formats
+  python -m reports.benchmark_formats --inputs reports/output --repeat 5
+  python -m reports.benchmark_formats --synthetic 20
+"""
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from reports.report_generator import REPORTS_DIR
+from reports.serialization import COMPRESSIONS, STYLES, iter_outputs, orjson, read_json, write_json, zstandard
+
+CITIES = ["Hyderabad", "Mumbai", "Delhi", "Bengaluru", "Chennai", "Kolkata", "Pune", "Ahmedabad",
+          "Jaipur", "Lucknow", "Kochi", "Goa", "Chandigarh", "Indore", "Surat", "Nagpur",
+          "Bhopal", "Coimbatore", "Visakhapatnam", "Amritsar"]
+
+WORDS = ("smoky charcoal tandoori biryani saffron dum slow-cooked millet jowar ragi kokum coconut "
+         "curry leaf reels saves weekend brunch crispy tangy mango chutney ghee roast premium "
+         "margin plating garnish trending viral local sourcing monsoon street-food fusion").split()
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def synthetic_outputs(n: int, seed: int = 0) -> list[dict]:
+    """`n` pipeline outputs with the shape and field lengths of real runs."""
+    rng = random.Random(seed)
+    outputs = []
+    for i in range(n):
+        city = CITIES[i % len(CITIES)] + ("" if i < len(CITIES) else f" {i // len(CITIES)}")
+        outputs.append({
+            "city": f"{city}, India",
+            "trend_analysis": {
+                "city": city,
+                "analysis_summary": _text(rng, 60),
+                "trending_ingredients": [
+                    {"name": _text(rng, 2), "emoji": "🌶️", "growth_pct": rng.randint(20, 900),
+                     "context": _text(rng, 25), "status": rng.choice(["hot", "rising", "steady"])}
+                    for _ in range(10)
+                ],
+                "famous_dishes_trending": [
+                    {"dish_name": _text(rng, 3), "famous_at": _text(rng, 3), "saves_estimate": f"{rng.randint(5, 90)}K",
+                     "engagement_pct": rng.randint(2, 40), "why_famous": _text(rng, 25)}
+                    for _ in range(6)
+                ],
+                "viral_hashtags": [
+                    {"tag": f"#{city}{rng.choice(WORDS).title()}", "growth_pct": rng.randint(50, 1200),
+                     "type": rng.choice(["viral", "hot", "rising", "new"])}
+                    for _ in range(12)
+                ],
+                "declining_trends": [
+                    {"name": _text(rng, 2), "decline_pct": f"-{rng.randint(5, 60)}%", "reason": _text(rng, 15)}
+                    for _ in range(4)
+                ],
+                "engagement_patterns": _text(rng, 40),
+                "stats": {"posts_analyzed": "1,200+", "top_dish_saves": "85K", "hashtags_count": 12},
+            },
+            "specials": {
+                "city": city,
+                "generated_at": "2026-10-17T10:00:00",
+                "top_weekend_ingredients": [_text(rng, 2) for _ in range(5)],
+                "weekend_specials": [
+                    {"dish_name": _text(rng, 4), "category": "premium upsell", "key_trending_ingredient": _text(rng, 2),
+                     "inspired_by": _text(rng, 6), "description": _text(rng, 45),
+                     "ingredients_needed": [_text(rng, 2) for _ in range(8)], "prep_time_mins": rng.randint(10, 60),
+                     "food_cost_level": "Medium", "estimated_food_cost_inr": "₹120–160",
+                     "suggested_price_range": "₹450–550", "gross_margin_pct": "68%", "plating_tip": _text(rng, 25),
+                     "reels_tip": _text(rng, 25), "why_it_will_trend": _text(rng, 30),
+                     "predicted_demand": "High", "best_served": "dinner"}
+                    for _ in range(5)
+                ],
+                "strategic_insight": _text(rng, 70),
+                "revenue_projection": _text(rng, 40),
+            },
+            "weekly_report": "\n\n".join(_text(rng, 90) for _ in range(6)),
+            "config": {"restaurant_type": "Modern Indian Bistro", "price_range": "₹₹₹ (₹600–1500/head)",
+                       "season": "Monsoon (Jul–Sep)"},
+        })
+    return outputs
+
+
+def formats() -> list[dict]:
+    """Every available encoder × style × compression, the original format first."""
+    out = [{"name": "json pretty (original)", "fast": False, "style": "pretty", "compression": "none"}]
+    encoders = [("json", False)] + ([("orjson", True)] if orjson is not None else [])
+    for encoder, fast in encoders:
+        for style in STYLES:
+            for compression in COMPRESSIONS:
+                if compression == "zstd" and zstandard is None:
+                    continue
+                if (fast, style, compression) == (False, "pretty", "none"):
+                    continue
+                name = f"{encoder} {style}" + ("" if compression == "none" else f" + {compression}")
+                out.append({"name": name, "fast": fast, "style": style, "compression": compression})
+    return out
+
+
+def bench_format(fmt: dict, outputs: list[dict], repeat: int) -> dict:
+    writes, reads, size = [], [], 0
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            t0 = time.perf_counter()
+            paths = [write_json(o, Path(tmp) / f"{i}_full.json", fmt["style"], fmt["compression"], fmt["fast"])
+                     for i, o in enumerate(outputs)]
+            writes.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            for p in paths:
+                read_json(p, fmt["fast"])
+            reads.append(time.perf_counter() - t0)
+            size = sum(Path(p).stat().st_size for p in paths)
+    return {**fmt, "write_s": statistics.median(writes), "read_s": statistics.median(reads), "bytes": size}
+
+
+def run_benchmark(outputs: list[dict], repeat: int = 3) -> list[dict]:
+    rows = [bench_format(fmt, outputs, repeat) for fmt in formats()]
+    base = rows[0]
+    for r in rows:
+        r["size_ratio"] = r["bytes"] / base["bytes"]
+        r["write_x"]    = base["write_s"] / r["write_s"] if r["write_s"] else None
+        r["read_x"]     = base["read_s"] / r["read_s"] if r["read_s"] else None
+    return rows
+
+
+def print_table(rows: list[dict], n: int) -> None:
+    print(f"\n{'format':<26}{'write/city':>12}{'read/city':>12}{'KB/city':>10}{'size':>8}{'write':>8}{'read':>8}")
+    print("─" * 84)
+    for r in rows:
+        print(f"{r['name']:<26}{r['write_s'] / n * 1000:>10.2f}ms{r['read_s'] / n * 1000:>10.2f}ms"
+              f"{r['bytes'] / n / 1024:>10.1f}{r['size_ratio']:>7.0%} {r['write_x']:>6.1f}×{r['read_x']:>6.1f}×")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark saved-output formats")
+    parser.add_argument("--inputs",    nargs="*", help="*_full.json files or directories (default: reports/output)")
+    parser.add_argument("--synthetic", type=int, help="Use N synthetic city outputs instead")
+    parser.add_argument("--repeat",    type=int, default=3)
+    parser.add_argument("--json",      type=str, help="Also write the rows to this JSON file")
+    args = parser.parse_args()
+
+    outputs = [] if args.synthetic else [data for _, data in iter_outputs(args.inputs or [REPORTS_DIR])]
+    if not outputs:
+        outputs = synthetic_outputs(args.synthetic or len(CITIES))
+        print(f"📦 {len(outputs)} synthetic city outputs")
+    else:
+        print(f"📦 {len(outputs)} saved outputs")
+    if orjson is None: print("  (orjson not installed — json encoder only)")
+    if zstandard is None: print("  (zstandard not installed — no zstd)")
+
+    rows = run_benchmark(outputs, args.repeat)
+    print_table(rows, len(outputs))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
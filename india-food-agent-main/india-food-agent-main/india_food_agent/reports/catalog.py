@@ -0,0 +1,385 @@
+"""
+reports/catalog.py
+━━━━━━━━━━━━━━━━━━
+SQLite index of the reports in reports/output/, so history lookups don't
+scan a directory of thousands of timestamped files. save_all() adds one
+row per run in a single transaction, once its files are on disk:
+
+  city, restaurant_type / price_range / season, ts,
+  json / txt / csv paths and their sizes in bytes,
+  archive — set once reports/retention.py has rolled the run into a
+            monthly archive; the paths are then members of that archive
+
+Lookups go through the (city, ts) index:
+
+  latest("Pune")                             # newest report for a city
+  reports_between("2026-07-01", "2026-10-01", city="Pune")
+  prune(keep_latest=12)                      # keep 12 per city, delete the rest
+
+  python -m reports.catalog --latest Pune
+  python -m reports.catalog --city Pune --since 2026-07-01
+  python -m reports.catalog --prune-keep 12
+  python -m reports.catalog --rebuild        # index files saved before the catalog existed
+
+Reports are sharded as reports/output/{city}/{YYYY-MM}/; the catalog lives
+in reports/output/catalog.sqlite.
+"""
+
+import argparse
+import json
+import secrets
+import sqlite3
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from reports.history_store import city_slug
+from reports.serialization import COMPRESSIONS, json_suffix, read_json
+
+REPORTS_DIR   = Path(__file__).parent / "output"
+CATALOG_DB    = REPORTS_DIR / "catalog.sqlite"
+ARCHIVE_DIR   = REPORTS_DIR / "_archive"
+ARCHIVE_INDEX = "index.json"     # member of every monthly archive listing its runs
+
+KINDS = {"json": "_full.json", "txt": "_report.txt", "csv": "_dishes.csv"}
+SUFFIXES = [("json", "_full" + json_suffix(c)) for c in COMPRESSIONS] + \
+           [(kind, suffix) for kind, suffix in KINDS.items() if kind != "json"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    report_id       INTEGER PRIMARY KEY,
+    ts              TEXT NOT NULL,
+    city            TEXT NOT NULL,
+    city_slug       TEXT NOT NULL,
+    restaurant_type TEXT,
+    price_range     TEXT,
+    season          TEXT,
+    json_path       TEXT,
+    txt_path        TEXT,
+    csv_path        TEXT,
+    json_bytes      INTEGER,
+    txt_bytes       INTEGER,
+    csv_bytes       INTEGER,
+    archive         TEXT
+);
+CREATE INDEX IF NOT EXISTS reports_city_ts ON reports (city_slug, ts);
+CREATE INDEX IF NOT EXISTS reports_ts      ON reports (ts);
+"""
+
+
+@contextmanager
+def _db(path: Path | None = None):
+    path = Path(path or CATALOG_DB)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path, timeout=10, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    try:
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(_SCHEMA)
+        if "archive" not in {r["name"] for r in db.execute("PRAGMA table_info(reports)")}:
+            db.execute("ALTER TABLE reports ADD COLUMN archive TEXT")     # catalogs from before retention
+        yield db
+    finally:
+        db.close()
+
+
+@contextmanager
+def _transaction(path: Path | None = None):
+    with _db(path) as db:
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+
+def _size(path: str) -> int | None:
+    try:
+        return Path(path).stat().st_size if path else None
+    except OSError:
+        return None
+
+
+def _iso(value: str | datetime | None) -> str | None:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+# ══════════════════════════════════════════
+#  FILE NAMES
+# ══════════════════════════════════════════
+def new_run_id(now: datetime | None = None) -> str:
+    """'20261019_024512-9f3a1c': sortable by time, unique across processes and threads."""
+    return f"{(now or datetime.now()):%Y%m%d_%H%M%S}-{secrets.token_hex(3)}"
+
+
+def report_name(city: str, run_id: str, kind: str) -> str:
+    """File name of one report of a run, e.g. pune_20261019_024512-9f3a1c_full.json."""
+    return f"{city_slug(city)}_{run_id}{KINDS[kind]}"
+
+
+def report_path(city: str, run_id: str, kind: str) -> Path:
+    """Where a run's report goes: its city + month shard, e.g. output/pune/2026-10/<name>."""
+    shard = REPORTS_DIR / city_slug(city) / f"{run_id[:4]}-{run_id[4:6]}"
+    shard.mkdir(parents=True, exist_ok=True)
+    return shard / report_name(city, run_id, kind)
+
+
+def run_ts(run_id: str) -> str:
+    """ISO time a run id encodes — current '20261019_024512-9f3a1c' ids and legacy '20261019_0245' ones."""
+    day, clock = run_id.split("_", 1)
+    hhmmss = clock.split("-")[0]
+    return datetime.strptime(f"{day}_{hhmmss}", "%Y%m%d_%H%M%S" if len(hhmmss) == 6 else "%Y%m%d_%H%M").isoformat()
+
+
+def parse_report_name(name: str) -> dict | None:
+    """
+    {"slug", "run_id", "kind", "ts"} from a report file name — current
+    {slug}_{run_id}_* names and the older {slug}_{YYYYmmdd_HHMM}_* ones.
+    """
+    for kind, suffix in SUFFIXES:
+        if not name.endswith(suffix):
+            continue
+        parts = name[: -len(suffix)].rsplit("_", 2)
+        if len(parts) != 3:
+            return None
+        slug, day, clock = parts
+        run_id = f"{day}_{clock}"
+        try:
+            ts = run_ts(run_id)
+        except ValueError:
+            return None
+        return {"slug": slug, "run_id": run_id, "kind": kind, "ts": ts}
+    return None
+
+
+# ══════════════════════════════════════════
+#  WRITE
+# ══════════════════════════════════════════
+def _insert(db, ts: str, city: str, config: dict, paths: dict, sizes: dict,
+            slug: str | None = None, archive: str | None = None) -> int:
+    row = {
+        "ts": ts, "city": city, "city_slug": slug or city_slug(city),
+        "restaurant_type": config.get("restaurant_type"), "price_range": config.get("price_range"),
+        "season": config.get("season"), "archive": archive,
+        **{f"{kind}_path": paths.get(kind) or None for kind in KINDS},
+        **{f"{kind}_bytes": sizes.get(kind) for kind in KINDS},
+    }
+    return db.execute(
+        f"INSERT INTO reports ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})", tuple(row.values())
+    ).lastrowid
+
+
+def add_report(city: str, paths: dict, config: dict | None = None, ts: str | None = None,
+               path: Path | None = None, run_id: str | None = None) -> int:
+    """
+    Catalog one save_all() run (`paths` = {"json", "txt", "csv"}); returns its
+    report_id. `ts` defaults to the time in `run_id`, as rebuild() reads it
+    back from the file names.
+    """
+    ts    = ts or (run_ts(run_id) if run_id else datetime.now().isoformat(timespec="seconds"))
+    sizes = {kind: _size(paths.get(kind)) for kind in KINDS}
+    with _transaction(path) as db:
+        return _insert(db, ts, city, config or {}, paths, sizes)
+
+
+def mark_archived(archived: list[tuple[int, str, dict]], path: Path | None = None) -> None:
+    """Point rows at their archive: [(report_id, archive path, {kind: member name})]."""
+    with _transaction(path) as db:
+        for report_id, archive, members in archived:
+            db.execute(
+                "UPDATE reports SET archive = ?, json_path = ?, txt_path = ?, csv_path = ? WHERE report_id = ?",
+                (archive, *(members.get(k) for k in KINDS), report_id),
+            )
+
+
+def read_archive_index(archive: str | Path) -> list[dict]:
+    """The runs listed in a monthly archive's index.json."""
+    with zipfile.ZipFile(archive) as zf:
+        return json.loads(zf.read(ARCHIVE_INDEX))["runs"]
+
+
+def rebuild(directory: Path | None = None, path: Path | None = None, verbose: bool = True) -> int:
+    """
+    Re-index every report file under `directory` (sharded or flat, named as
+    parse_report_name expects) and every monthly archive's index, replacing
+    the catalog's contents. Returns the number of runs indexed.
+    """
+    directory   = Path(directory or REPORTS_DIR)
+    archive_dir = directory / ARCHIVE_DIR.name
+    runs = {}
+    for file in directory.rglob("*"):
+        parsed = parse_report_name(file.name) if archive_dir not in file.parents else None
+        if parsed:
+            run = runs.setdefault((parsed["slug"], parsed["run_id"]), {"ts": parsed["ts"]})
+            run[parsed["kind"]] = str(file)
+
+    archived = []
+    for archive in sorted(archive_dir.glob("*.zip")):
+        try:
+            archived += [(str(archive), run) for run in read_archive_index(archive)]
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            if verbose: print(f"  ⚠️ Skipping unreadable archive {archive.name}")
+
+    with _transaction(path) as db:
+        db.execute("DELETE FROM reports")
+        for archive, run in archived:
+            _insert(db, run["ts"], run["city"], run.get("config") or {}, run["files"], run.get("bytes") or {},
+                    slug=run.get("city_slug"), archive=archive)
+        for (slug, _), paths in sorted(runs.items(), key=lambda kv: kv[1]["ts"]):
+            city, config = slug.replace("_", " ").title(), {}
+            if "json" in paths:
+                try:
+                    data = read_json(paths["json"])
+                    city, config = data.get("city", city), data.get("config") or {}
+                except (OSError, ValueError):
+                    pass
+            _insert(db, paths["ts"], city, config, paths, {k: _size(paths.get(k)) for k in KINDS}, slug=slug)
+    if verbose: print(f"  🗂  Indexed {len(runs)} runs + {len(archived)} archived from {directory}")
+    return len(runs) + len(archived)
+
+
+def prune(
+    keep_latest: int | None = None,
+    older_than_days: float | None = None,
+    city: str | None = None,
+    delete_files: bool = True,
+    path: Path | None = None,
+) -> list[dict]:
+    """
+    Drop reports beyond the newest `keep_latest` per city and/or older than
+    `older_than_days` (optionally for one city only), deleting their files
+    unless delete_files=False. A monthly archive is deleted once none of its
+    runs are left in the catalog. Returns the rows removed.
+    """
+    if keep_latest is None and older_than_days is None:
+        raise ValueError("prune() needs keep_latest and/or older_than_days")
+
+    where, params = [], []
+    if city:
+        where.append("city_slug = ?")
+        params.append(city_slug(city))
+    cond = []
+    if keep_latest is not None:
+        cond.append("rank > ?")
+        params.append(keep_latest)
+    if older_than_days is not None:
+        cond.append("ts < ?")
+        params.append((datetime.now() - timedelta(days=older_than_days)).isoformat())
+
+    sql = (
+        "SELECT * FROM (SELECT *, ROW_NUMBER() OVER (PARTITION BY city_slug ORDER BY ts DESC, report_id DESC) "
+        "AS rank FROM reports" + (" WHERE " + " AND ".join(where) if where else "") + ") "
+        "WHERE " + " OR ".join(cond)
+    )
+    with _transaction(path) as db:
+        rows = [dict(r) for r in db.execute(sql, params)]
+        db.executemany("DELETE FROM reports WHERE report_id = ?", [(r["report_id"],) for r in rows])
+        archives = {r["archive"] for r in rows if r["archive"]}
+        emptied  = [a for a in archives
+                    if not db.execute("SELECT 1 FROM reports WHERE archive = ? LIMIT 1", (a,)).fetchone()]
+
+    if delete_files:
+        reports_dir = Path(path).parent if path else REPORTS_DIR
+        for r in rows:
+            for kind in KINDS:
+                if r[f"{kind}_path"] and not r["archive"]:
+                    file = Path(r[f"{kind}_path"])
+                    file.unlink(missing_ok=True)
+                    for shard in (file.parent, file.parent.parent):     # {city}/{YYYY-MM}/ left empty
+                        if reports_dir in shard.parents and not any(shard.iterdir()):
+                            shard.rmdir()
+        for archive in emptied:
+            Path(archive).unlink(missing_ok=True)
+    for r in rows:
+        r.pop("rank", None)
+    return rows
+
+
+# ══════════════════════════════════════════
+#  READ
+# ══════════════════════════════════════════
+def latest(city: str, path: Path | None = None) -> dict | None:
+    """The newest cataloged report for `city`, or None."""
+    with _db(path) as db:
+        row = db.execute(
+            "SELECT * FROM reports WHERE city_slug = ? ORDER BY ts DESC, report_id DESC LIMIT 1",
+            (city_slug(city),),
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def latest_by_city(path: Path | None = None) -> list[dict]:
+    """The newest report of every city, most recent first."""
+    with _db(path) as db:
+        rows = db.execute(
+            "SELECT * FROM (SELECT *, ROW_NUMBER() OVER (PARTITION BY city_slug ORDER BY ts DESC, report_id DESC) "
+            "AS rank FROM reports) WHERE rank = 1 ORDER BY ts DESC"
+        ).fetchall()
+    return [{k: r[k] for k in r.keys() if k != "rank"} for r in rows]
+
+
+def reports_between(
+    since: str | datetime | None = None,
+    until: str | datetime | None = None,
+    city: str | None = None,
+    path: Path | None = None,
+) -> list[dict]:
+    """Reports with since <= ts < until (ISO dates / datetimes), oldest first."""
+    where, params = [], []
+    if city:
+        where.append("city_slug = ?");  params.append(city_slug(city))
+    if since:
+        where.append("ts >= ?");        params.append(_iso(since))
+    if until:
+        where.append("ts < ?");         params.append(_iso(until))
+    sql = "SELECT * FROM reports" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY ts, report_id"
+    with _db(path) as db:
+        return [dict(r) for r in db.execute(sql, params)]
+
+
+def catalog_stats(path: Path | None = None) -> dict:
+    """Report count, cities and total bytes on disk."""
+    with _db(path) as db:
+        n, cities, size, first, last = db.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT city_slug), "
+            "COALESCE(SUM(COALESCE(json_bytes, 0) + COALESCE(txt_bytes, 0) + COALESCE(csv_bytes, 0)), 0), "
+            "MIN(ts), MAX(ts) FROM reports"
+        ).fetchone()
+    return {"reports": n, "cities": cities, "bytes": size, "first": first, "last": last}
+
+
+def print_reports(rows: list[dict]) -> None:
+    if not rows:
+        print("No reports cataloged")
+    for r in rows:
+        size = sum(r[f"{k}_bytes"] or 0 for k in KINDS)
+        where = r["txt_path"] or r["json_path"] or "—"
+        if r["archive"]:
+            where = f"{Path(r['archive']).name}:{where}"
+        print(f"  {r['ts'][:16]}  {r['city']:<24} {size / 1024:>7.1f} KB  {where}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Catalog of saved reports")
+    parser.add_argument("--latest",      type=str, nargs="?", const="", help="Newest report for a city (all cities if none given)")
+    parser.add_argument("--city",        type=str)
+    parser.add_argument("--since",       type=str, help="ISO date, e.g. 2026-07-01")
+    parser.add_argument("--until",       type=str)
+    parser.add_argument("--prune-keep",  type=int, help="Keep the newest N reports per city, delete the rest")
+    parser.add_argument("--prune-days",  type=float, help="Delete reports older than N days")
+    parser.add_argument("--rebuild",     action="store_true", help="Re-index the files in reports/output")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild()
+    elif args.prune_keep is not None or args.prune_days is not None:
+        removed = prune(args.prune_keep, args.prune_days, city=args.city)
+        print(f"  🧹 Pruned {len(removed)} reports")
+    elif args.latest is not None:
+        print_reports([r for r in [latest(args.latest)] if r] if args.latest else latest_by_city())
+    else:
+        print_reports(reports_between(args.since, args.until, city=args.city))
+        print(json.dumps(catalog_stats(), indent=2))
@@ -0,0 +1,252 @@
+"""
+reports/history_store.py
+━━━━━━━━━━━━━━━━━━━━━━━━
+Append-only history of every pipeline run, one row per item, in a compact
+SQLite schema next to the per-run JSON files:
+
+  runs         run_id, ts, city, city_slug, restaurant_type, price_range, season
+  ingredients  run_id, name, emoji, growth_pct, status, context
+  hashtags     run_id, tag, growth_pct, type
+  dishes       run_id, dish_name, famous_at, saves_estimate, engagement_pct
+  specials     run_id, dish_name, category, key_trending_ingredient, ...
+
+Scans filter by city + date range (indexed) and ingredient, and come back
+as pandas DataFrames with each row's city + timestamp attached:
+
+  scan("ingredients", city="Hyderabad", since="2026-07-01")
+  scan("specials", ingredient="mango")
+  ingredient_trend("Hyderabad", weeks=12)
+
+save_all() records every run. Older runs can be imported from their JSON:
+
+  python -m reports.history_store --import reports/output
+  python -m reports.history_store --table ingredients --city Hyderabad --weeks 12
+
+Configure via environment variables:
+  FOOD_AGENT_HISTORY=0        to stop recording runs
+  FOOD_AGENT_HISTORY_DB       (default data/history.sqlite)
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HISTORY_ENABLED = os.getenv("FOOD_AGENT_HISTORY", "1") != "0"
+HISTORY_DB      = Path(os.getenv(
+    "FOOD_AGENT_HISTORY_DB",
+    Path(__file__).resolve().parent.parent / "data" / "history.sqlite",
+))
+
+# table → (columns taken from each item, where the items live in a pipeline output)
+TABLES = {
+    "ingredients": (("name", "emoji", "growth_pct", "status", "context"),
+                    ("trend_analysis", "trending_ingredients")),
+    "hashtags":    (("tag", "growth_pct", "type"),
+                    ("trend_analysis", "viral_hashtags")),
+    "dishes":      (("dish_name", "famous_at", "saves_estimate", "engagement_pct"),
+                    ("trend_analysis", "famous_dishes_trending")),
+    "specials":    (("dish_name", "category", "key_trending_ingredient", "inspired_by",
+                     "suggested_price_range", "gross_margin_pct", "food_cost_level",
+                     "predicted_demand", "prep_time_mins", "best_served"),
+                    ("specials", "weekend_specials")),
+}
+
+# column the `ingredient` filter of scan() matches, per table
+INGREDIENT_COLUMN = {"ingredients": "name", "specials": "key_trending_ingredient"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id          INTEGER PRIMARY KEY,
+    ts              TEXT NOT NULL,
+    city            TEXT NOT NULL,
+    city_slug       TEXT NOT NULL,
+    restaurant_type TEXT,
+    price_range     TEXT,
+    season          TEXT,
+    source          TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_city_ts ON runs (city_slug, ts);
+CREATE INDEX IF NOT EXISTS runs_ts      ON runs (ts);
+CREATE UNIQUE INDEX IF NOT EXISTS runs_source ON runs (source) WHERE source IS NOT NULL;
+""" + "".join(
+    f"CREATE TABLE IF NOT EXISTS {table} (run_id INTEGER NOT NULL REFERENCES runs, "
+    + ", ".join(columns) + ");\n"
+    f"CREATE INDEX IF NOT EXISTS {table}_run ON {table} (run_id);\n"
+    for table, (columns, _) in TABLES.items()
+)
+
+
+def city_slug(city: str) -> str:
+    """Same slug as the report file names: 'Hyderabad, India' → 'hyderabad'."""
+    return city.split(",")[0].strip().lower().replace(" ", "_")
+
+
+@contextmanager
+def _db(path: Path | None = None):
+    path = Path(path or HISTORY_DB)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path, timeout=10, isolation_level=None)
+    try:
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(_SCHEMA)
+        yield db
+    finally:
+        db.close()
+
+
+# ══════════════════════════════════════════
+#  WRITE
+# ══════════════════════════════════════════
+def record_run(pipeline_output: dict, ts: str | None = None, source: str | None = None,
+               path: Path | None = None) -> int | None:
+    """
+    Append one pipeline output; returns its run_id. `source` (e.g. the JSON
+    file it came from) makes re-imports a no-op — None is returned for those.
+    """
+    city   = pipeline_output.get("city", "India")
+    config = pipeline_output.get("config") or {}
+    ts     = ts or datetime.now().isoformat(timespec="seconds")
+
+    with _db(path) as db:
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if source and db.execute("SELECT 1 FROM runs WHERE source = ?", (source,)).fetchone():
+                db.execute("ROLLBACK")
+                return None
+            run_id = db.execute(
+                "INSERT INTO runs (ts, city, city_slug, restaurant_type, price_range, season, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (ts, city, city_slug(city), config.get("restaurant_type"),
+                 config.get("price_range"), config.get("season"), source),
+            ).lastrowid
+            for table, (columns, (section, key)) in TABLES.items():
+                items = (pipeline_output.get(section) or {}).get(key) or []
+                db.executemany(
+                    f"INSERT INTO {table} (run_id, {', '.join(columns)}) "
+                    f"VALUES (?{', ?' * len(columns)})",
+                    [(run_id, *(_scalar(item.get(c)) for c in columns)) for item in items if isinstance(item, dict)],
+                )
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+    return run_id
+
+
+def _scalar(value):
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value
+
+
+def import_json(paths: list[str], path: Path | None = None, verbose: bool = True) -> int:
+    """Backfill from *_full.json(.gz/.zst) report files (or directories of them); returns runs added."""
+    from reports.catalog import parse_report_name
+    from reports.serialization import iter_outputs
+
+    added = seen = 0
+    for file, output in iter_outputs(paths):
+        seen += 1
+        parsed = parse_report_name(file.name)
+        ts     = parsed["ts"] if parsed else datetime.fromtimestamp(file.stat().st_mtime).isoformat(timespec="seconds")
+        if record_run(output, ts=ts, source=str(file.resolve()), path=path) is not None:
+            added += 1
+    if verbose: print(f"  🗃  Imported {added} of {seen} runs into {path or HISTORY_DB}")
+    return added
+
+
+# ══════════════════════════════════════════
+#  READ
+# ══════════════════════════════════════════
+def scan(
+    table: str,
+    city: str | None = None,
+    since: str | datetime | None = None,
+    until: str | datetime | None = None,
+    ingredient: str | None = None,
+    path: Path | None = None,
+):
+    """
+    Rows of `table` (or of `runs`) as a DataFrame, oldest first, filtered by
+    city, ISO date range [since, until) and — for ingredients / specials — an
+    ingredient substring (case-insensitive).
+    """
+    import pandas as pd
+
+    if table != "runs" and table not in TABLES:
+        raise ValueError(f"Unknown table {table!r} (expected runs or one of {', '.join(TABLES)})")
+    if ingredient and table not in INGREDIENT_COLUMN:
+        raise ValueError(f"Table {table!r} has no ingredient column")
+
+    where, params = [], []
+    if city:
+        where.append("r.city_slug = ?");  params.append(city_slug(city))
+    if since:
+        where.append("r.ts >= ?");        params.append(str(since.isoformat() if isinstance(since, datetime) else since))
+    if until:
+        where.append("r.ts < ?");         params.append(str(until.isoformat() if isinstance(until, datetime) else until))
+    if ingredient:
+        where.append(f"t.{INGREDIENT_COLUMN[table]} LIKE ?");  params.append(f"%{ingredient}%")
+
+    if table == "runs":
+        sql = "SELECT r.* FROM runs r"
+    else:
+        sql = f"SELECT r.ts, r.city, t.* FROM {table} t JOIN runs r USING (run_id)"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY r.ts, r.run_id"
+
+    with _db(path) as db:
+        df = pd.read_sql_query(sql, db, params=params)
+    df["ts"] = pd.to_datetime(df["ts"])
+    return df
+
+
+def ingredient_trend(city: str, weeks: int = 12, path: Path | None = None):
+    """
+    Trending ingredients of `city` over the last `weeks` weeks: one row per
+    ingredient with the number of runs it appeared in, its mean and latest
+    growth_pct and when it was last seen.
+    """
+    import pandas as pd
+
+    df = scan("ingredients", city=city, since=datetime.now() - timedelta(weeks=weeks), path=path)
+    if df.empty:
+        return df
+    df["key"]        = df["name"].str.strip().str.lower()
+    df["growth_pct"] = pd.to_numeric(df["growth_pct"], errors="coerce")
+    return (
+        df.groupby("key")
+          .agg(name=("name", "last"), runs=("run_id", "nunique"), mean_growth_pct=("growth_pct", "mean"),
+               last_growth_pct=("growth_pct", "last"), last_seen=("ts", "max"))
+          .sort_values(["runs", "mean_growth_pct"], ascending=False)
+          .reset_index(drop=True)
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline run history")
+    parser.add_argument("--import",     dest="imports", nargs="+", help="Backfill from *_full.json(.gz/.zst) files or directories")
+    parser.add_argument("--table",      type=str, default="runs", help=f"runs, {', '.join(TABLES)}")
+    parser.add_argument("--city",       type=str)
+    parser.add_argument("--weeks",      type=float, help="Only the last N weeks")
+    parser.add_argument("--ingredient", type=str, help="Ingredient substring (ingredients / specials)")
+    args = parser.parse_args()
+
+    if args.imports:
+        import_json(args.imports)
+    else:
+        import pandas as pd
+        since = datetime.now() - timedelta(weeks=args.weeks) if args.weeks else None
+        try:
+            df = scan(args.table, city=args.city, since=since, ingredient=args.ingredient)
+        except ValueError as e:
+            parser.error(str(e))
+        with pd.option_context("display.max_rows", 200, "display.width", 200, "display.max_colwidth", 40):
+            print(df if not df.empty else f"No rows in {HISTORY_DB}")
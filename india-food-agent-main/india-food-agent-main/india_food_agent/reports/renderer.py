@@ -0,0 +1,328 @@
+"""
+reports/renderer.py
+━━━━━━━━━━━━━━━━━━━
+One renderer for every human-readable view of a pipeline output:
+
+  • txt   — the saved weekly report (save_txt_report)
+  • md    — Markdown, for sharing / the CLI
+  • html  — a standalone page, plus the fragments the Streamlit tabs show
+            (dish cards, insight box, report panel)
+
+Templates are parsed once at import; render() walks the output a single
+time, builds one context per dish and fills all three formats from it.
+Results are cached by a hash of the output, so Streamlit reruns, the CLI
+and the saved files reuse the same rendering instead of rebuilding it.
+
+  python -m reports.renderer reports/output/pune/2026-10/pune_..._full.json --format md
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from string import Formatter
+from types import MappingProxyType
+
+CACHE_SIZE = 64
+FORMATS    = ("txt", "md", "html")
+
+
+class Template:
+    """A str.format-style template parsed once; render() only joins strings."""
+
+    def __init__(self, text: str):
+        self.parts = [(literal, field) for literal, field, _, _ in Formatter().parse(text)]
+
+    def render(self, ctx: dict) -> str:
+        out = []
+        for literal, field in self.parts:
+            out.append(literal)
+            if field is not None:
+                out.append(str(ctx[field]))
+        return "".join(out)
+
+
+# ══════════════════════════════════════════
+#  TEMPLATES
+# ══════════════════════════════════════════
+TXT_HEADER = Template("""
+{rule65}
+  🇮🇳  INDIA FOOD TREND AGENT — WEEKLY REPORT
+  City: {city}
+  Generated: {generated}
+{rule65}
+
+
+TOP WEEKEND INGREDIENTS:
+{ingredients}
+
+{report}
+
+WEEKEND SPECIALS:
+{rule60}
+""")
+
+TXT_DISH = Template("""
+{n}. {dish_name_upper}
+   Category    : {category}
+   Price       : {suggested_price_range}
+   Demand      : {predicted_demand}
+   Food Cost   : {food_cost_level} ({estimated_food_cost_inr})
+   Margin      : {gross_margin_pct}
+   Inspired By : {inspired_by}
+   Key Ingred. : {key_trending_ingredient}
+   Best Served : {best_served}
+
+   Description:
+   {description}
+
+   Plating Tip:
+   {plating_tip}
+
+   Reels Tip:
+   {reels_tip}
+
+   Why It'll Trend:
+   {why_it_will_trend}
+{rule60}""")
+
+TXT_FOOTER = Template("""
+
+STRATEGIC INSIGHT:
+{strategic_insight}
+
+REVENUE PROJECTION:
+{revenue_projection}
+
+{rule65}
+Generated by 🇮🇳 India Food Trend Agent · Python + Claude AI
+{rule65}
+""")
+
+MD_HEADER = Template("""# Weekly Food Trend Report — {city}
+_Generated: {generated}_
+
+## Top weekend ingredients
+{ingredients}
+
+## Report
+{report}
+
+## Weekend specials
+""")
+
+MD_DISH = Template("""
+### {n}. {dish_name}
+_{category} · {suggested_price_range} · {predicted_demand} demand_
+
+{description}
+
+| | |
+|---|---|
+| Inspired by | {inspired_by} |
+| Key ingredient | {key_trending_ingredient} |
+| Food cost | {food_cost_level} ({estimated_food_cost_inr}) |
+| Gross margin | {gross_margin_pct} |
+| Prep time | {prep_time_mins} mins |
+| Best served | {best_served} |
+
+- **Plating:** {plating_tip}
+- **Reels:** {reels_tip}
+- **Why it'll trend:** {why_it_will_trend}
+""")
+
+MD_FOOTER = Template("""
+## Strategic insight
+{strategic_insight}
+
+**Revenue projection:** {revenue_projection}
+""")
+
+HTML_DISH_CARD = Template("""
+<div class="dish-card-dark">
+  <div class="dish-wm">Ψ</div>
+  <div class="dish-num">0{n} SUGGESTION</div>
+  <div class="dish-dark-name">{dish_name}</div>
+  <div class="dish-dark-desc">{description}</div>
+  <div class="dish-tags-row">{ingredient_tags}</div>
+  <div class="dish-footer-dark">
+    <div>
+      <div class="dish-target-lbl">Target</div>
+      <div class="dish-target-txt">{why_short}</div>
+    </div>
+    <div style="text-align:right">
+      <div class="margin-lbl">Margin</div>
+      <div class="{margin_cls}">{predicted_demand}</div>
+    </div>
+  </div>
+</div>
+""")
+
+HTML_INSIGHT = Template("""
+<div class="insight-box">
+  <div class="insight-lbl">💡 Strategic Insight for {specials_city}</div>
+  <div class="insight-txt">{strategic_insight}</div>
+  <div class="insight-rev">📈 Revenue Projection: {revenue_projection}</div>
+</div>
+""")
+
+HTML_REPORT = Template("""
+<div style="background:white;border-radius:20px;padding:28px 32px;border:1.5px solid #E0DDD7;
+            font-size:13.5px;line-height:1.9;color:#444;font-weight:300;">
+  {report_html}
+</div>
+""")
+
+HTML_PAGE = Template("""<!doctype html>
+<html lang="en"><head><meta charset="utf-8">
+<title>Weekly Food Trend Report — {city}</title>
+<style>
+body {{ font-family: system-ui, sans-serif; background: #F7F5F0; max-width: 900px; margin: 40px auto; color: #222; }}
+.dish-card-dark {{ background: #141414; color: #ccc; border-radius: 20px; padding: 22px; margin-bottom: 14px; }}
+.dish-wm {{ display: none; }}
+.dish-num, .dish-target-lbl, .margin-lbl {{ font-size: 10px; color: #666; letter-spacing: .1em; }}
+.dish-dark-name {{ font-size: 22px; font-weight: 800; color: white; }}
+.dish-tag-dark {{ background: #252525; color: #999; padding: 3px 9px; border-radius: 100px; font-size: 11px; margin-right: 4px; }}
+.dish-footer-dark {{ display: flex; justify-content: space-between; border-top: 1px solid #222; margin-top: 12px; padding-top: 12px; }}
+.margin-high {{ color: #3DC98A; }} .margin-medium {{ color: #F0C93A; }} .margin-low {{ color: #F05A5A; }}
+.insight-box {{ background: #0D0D0D; color: #999; border-radius: 18px; padding: 24px 28px; margin-top: 20px; }}
+.insight-lbl {{ color: #F0C93A; font-size: 11px; text-transform: uppercase; }}
+</style></head><body>
+<h1>Weekly Food Trend Report — {city}</h1>
+<p><em>Generated: {generated}</em></p>
+<h2>Top weekend ingredients</h2>
+<ul>{ingredients_html}</ul>
+{report_panel}
+<h2>Weekend specials</h2>
+{dish_cards}
+{insight}
+</body></html>
+""")
+
+
+# ══════════════════════════════════════════
+#  RENDER
+# ══════════════════════════════════════════
+DISH_FIELDS = (
+    "dish_name", "category", "key_trending_ingredient", "inspired_by", "description",
+    "suggested_price_range", "estimated_food_cost_inr", "gross_margin_pct", "food_cost_level",
+    "predicted_demand", "prep_time_mins", "best_served", "plating_tip", "reels_tip", "why_it_will_trend",
+)
+RULES = {"rule65": "═" * 65, "rule60": "─" * 60}
+
+_cache      = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def output_hash(output: dict) -> str:
+    """Hash of the parts of a pipeline output that appear in the rendering."""
+    keyed = {k: output.get(k) for k in ("city", "specials", "weekly_report")}
+    blob  = json.dumps(keyed, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _generated(specials: dict) -> str:
+    try:
+        when = datetime.fromisoformat(specials["generated_at"])
+    except (KeyError, TypeError, ValueError):
+        when = datetime.now()
+    return when.strftime("%A, %d %B %Y at %I:%M %p")
+
+
+def _dish_context(n: int, dish: dict) -> tuple[dict, dict]:
+    """(plain, HTML-escaped) template context for one dish."""
+    plain = {f: dish.get(f, "") for f in DISH_FIELDS}
+    plain["n"]               = n
+    plain["dish_name_upper"] = str(plain["dish_name"]).upper()
+
+    demand = plain["predicted_demand"] or "Medium"
+    esc = {k: html.escape(str(v)) for k, v in plain.items()}
+    esc["predicted_demand"] = html.escape(str(demand))
+    esc["margin_cls"]       = "margin-high" if demand == "High" else ("margin-medium" if demand == "Medium" else "margin-low")
+    esc["why_short"]        = html.escape(str(plain["why_it_will_trend"])[:100])
+    esc["ingredient_tags"]  = "".join(
+        f'<span class="dish-tag-dark">{html.escape(str(t))}</span>' for t in (dish.get("ingredients_needed") or [])[:4]
+    )
+    return plain, esc
+
+
+def render(output: dict) -> dict:
+    """
+    TXT, Markdown and HTML for a pipeline output, plus the HTML fragments:
+    {"txt", "md", "html", "dish_cards": [...], "insight_html", "report_html"}.
+    """
+    city     = output.get("city", "India")
+    specials = output.get("specials") or {}
+    report   = output.get("weekly_report") or ""
+    ings     = specials.get("top_weekend_ingredients") or []
+
+    page = {
+        **RULES,
+        "city":               city,
+        "generated":          _generated(specials),
+        "report":             report,
+        "strategic_insight":  specials.get("strategic_insight", ""),
+        "revenue_projection": specials.get("revenue_projection", ""),
+    }
+    page_html = {
+        **{k: html.escape(str(v)) for k, v in page.items()},
+        "specials_city":    html.escape(str(specials.get("city", ""))),
+        "ingredients_html": "".join(f"<li>{html.escape(str(i))}</li>" for i in ings),
+        "report_html":      html.escape(report).replace("\n", "<br>"),
+    }
+
+    txt   = [TXT_HEADER.render({**page, "ingredients": "".join(f"  {i}. {ing}\n" for i, ing in enumerate(ings, 1))})]
+    md    = [MD_HEADER.render({**page, "ingredients": "\n".join(f"{i}. {ing}" for i, ing in enumerate(ings, 1))})]
+    cards = []
+    for n, dish in enumerate(specials.get("weekend_specials") or [], 1):
+        plain, esc = _dish_context(n, dish)
+        txt.append(TXT_DISH.render({**RULES, **plain}))
+        md.append(MD_DISH.render(plain))
+        cards.append(HTML_DISH_CARD.render(esc))
+    txt.append(TXT_FOOTER.render(page))
+    md.append(MD_FOOTER.render(page))
+
+    insight_html = HTML_INSIGHT.render(page_html) if specials.get("strategic_insight") else ""
+    report_html  = HTML_REPORT.render(page_html)
+    return {
+        "txt":          "".join(txt),
+        "md":           "".join(md),
+        "html":         HTML_PAGE.render({**page_html, "report_panel": report_html,
+                                          "dish_cards": "".join(cards), "insight": insight_html}),
+        "dish_cards":   cards,
+        "insight_html": insight_html,
+        "report_html":  report_html,
+    }
+
+
+def render_cached(output: dict) -> MappingProxyType:
+    """
+    render(), memoised by output_hash() for the last CACHE_SIZE outputs.
+    The result is shared by every caller, so it comes back read-only
+    (dish_cards as a tuple).
+    """
+    key = output_hash(output)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    rendered = render(output)
+    rendered = MappingProxyType({**rendered, "dish_cards": tuple(rendered["dish_cards"])})
+    with _cache_lock:
+        _cache[key] = rendered
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return rendered
+
+
+if __name__ == "__main__":
+    from reports.serialization import read_json
+
+    parser = argparse.ArgumentParser(description="Render a saved pipeline output")
+    parser.add_argument("path",     help="A *_full.json(.gz/.zst) file")
+    parser.add_argument("--format", choices=FORMATS, default="md")
+    args = parser.parse_args()
+    print(render_cached(read_json(args.path))[args.format])
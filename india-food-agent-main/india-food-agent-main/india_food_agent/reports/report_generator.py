@@ -2,97 +2,62 @@
 reports/report_generator.py
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━
 Saves trend analysis + specials to:
-  • JSON file (machine-readable)
+  • JSON file (machine-readable; format set in reports/serialization.py)
   • TXT file  (human-readable report)
   • CSV file  (dishes table for Excel/Sheets)
+then indexes the files in reports/catalog.py and appends the run to the
+history store (reports/history_store.py).
+
+Each save_all() call gets its own run id, so runs for the same city in the
+same minute never share file names, and every file is written atomically
+(see atomic_write in reports/serialization.py).
+
+ReportWriter does the same on background threads, so the Streamlit rerun
+or the next city of a sweep doesn't wait on disk I/O.
+FOOD_AGENT_REPORT_WORKERS (default 2) sets how many saves run at once.
 """
 
-import json
 import csv
+import io
 import os
-from datetime import datetime
+import copy
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
 
-REPORTS_DIR = Path(__file__).parent / "output"
+from reports.catalog import add_report, new_run_id, report_path
+from reports.history_store import HISTORY_ENABLED, record_run
+from reports.renderer import render_cached
+from reports.serialization import atomic_write, write_json
+
+REPORTS_DIR    = Path(__file__).parent / "output"
+REPORT_WORKERS = int(os.getenv("FOOD_AGENT_REPORT_WORKERS", "2"))
 REPORTS_DIR.mkdir(exist_ok=True)
 
 
-def save_json(data: dict, city: str) -> str:
+def save_json(data: dict, city: str, verbose: bool = True, run_id: str | None = None) -> str:
     """Save full pipeline output as JSON."""
-    slug = city.split(",")[0].strip().lower().replace(" ", "_")
-    ts   = datetime.now().strftime("%Y%m%d_%H%M")
-    path = REPORTS_DIR / f"{slug}_{ts}_full.json"
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    print(f"  💾 JSON saved: {path}")
-    return str(path)
-
+    path = write_json(data, report_path(city, run_id or new_run_id(), "json"))
+    if verbose: print(f"  💾 JSON saved: {path}")
+    return path
 
-def save_txt_report(report_text: str, city: str, specials: dict) -> str:
-    """Save human-readable weekly report as TXT."""
-    slug = city.split(",")[0].strip().lower().replace(" ", "_")
-    ts   = datetime.now().strftime("%Y%m%d_%H%M")
-    path = REPORTS_DIR / f"{slug}_{ts}_report.txt"
 
-    header = f"""
-{'═'*65}
-  🇮🇳  INDIA FOOD TREND AGENT — WEEKLY REPORT
-  City: {city}
-  Generated: {datetime.now().strftime('%A, %d %B %Y at %I:%M %p')}
-{'═'*65}
+def save_txt_report(report_text: str, city: str, specials: dict, verbose: bool = True,
+                    run_id: str | None = None) -> str:
+    """Save human-readable weekly report as TXT (laid out by reports/renderer.py)."""
+    path = report_path(city, run_id or new_run_id(), "txt")
 
-"""
-    # Top ingredients
-    top_ings = specials.get("top_weekend_ingredients", [])
-    ing_section = "\nTOP WEEKEND INGREDIENTS:\n"
-    for i, ing in enumerate(top_ings, 1):
-        ing_section += f"  {i}. {ing}\n"
+    full = render_cached({"city": city, "specials": specials, "weekly_report": report_text})["txt"]
 
-    # Dishes table
-    dishes = specials.get("weekend_specials", [])
-    dish_section = "\n\nWEEKEND SPECIALS:\n" + "─"*60 + "\n"
-    for i, d in enumerate(dishes, 1):
-        dish_section += f"""
-{i}. {d.get('dish_name','').upper()}
-   Category    : {d.get('category','')}
-   Price       : {d.get('suggested_price_range','')}
-   Demand      : {d.get('predicted_demand','')}
-   Food Cost   : {d.get('food_cost_level','')} ({d.get('estimated_food_cost_inr','')})
-   Margin      : {d.get('gross_margin_pct','')}
-   Inspired By : {d.get('inspired_by','')}
-   Key Ingred. : {d.get('key_trending_ingredient','')}
-   Best Served : {d.get('best_served','')}
-
-   Description:
-   {d.get('description','')}
-
-   Plating Tip:
-   {d.get('plating_tip','')}
-
-   Reels Tip:
-   {d.get('reels_tip','')}
-
-   Why It'll Trend:
-   {d.get('why_it_will_trend','')}
-{"─"*60}"""
-
-    strategic = f"\n\nSTRATEGIC INSIGHT:\n{specials.get('strategic_insight','')}\n"
-    revenue   = f"\nREVENUE PROJECTION:\n{specials.get('revenue_projection','')}\n"
-    footer    = f"\n{'═'*65}\nGenerated by 🇮🇳 India Food Trend Agent · Python + Claude AI\n{'═'*65}\n"
-
-    full = header + ing_section + "\n\n" + report_text + dish_section + strategic + revenue + footer
-
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(full)
-    print(f"  📄 TXT report saved: {path}")
+    atomic_write(path, full)
+    if verbose: print(f"  📄 TXT report saved: {path}")
     return str(path)
 
 
-def save_csv(specials: dict, city: str) -> str:
+def save_csv(specials: dict, city: str, verbose: bool = True, run_id: str | None = None) -> str:
     """Save dishes as CSV (opens in Excel / Google Sheets)."""
-    slug = city.split(",")[0].strip().lower().replace(" ", "_")
-    ts   = datetime.now().strftime("%Y%m%d_%H%M")
-    path = REPORTS_DIR / f"{slug}_{ts}_dishes.csv"
+    path = report_path(city, run_id or new_run_id(), "csv")
 
     dishes = specials.get("weekend_specials", [])
     if not dishes:
@@ -106,26 +71,111 @@ def save_csv(specials: dict, city: str) -> str:
         "why_it_will_trend",
     ]
 
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
-        writer.writeheader()
-        writer.writerows(dishes)
+    buf    = io.StringIO(newline="")
+    writer = csv.DictWriter(buf, fieldnames=fieldnames, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(dishes)
+    atomic_write(path, buf.getvalue())
 
-    print(f"  📊 CSV saved: {path}")
+    if verbose: print(f"  📊 CSV saved: {path}")
     return str(path)
 
 
-def save_all(pipeline_output: dict) -> dict:
+def save_all(pipeline_output: dict, verbose: bool = True) -> dict:
     """Save all report formats and return file paths."""
     city     = pipeline_output.get("city", "India")
     specials = pipeline_output.get("specials", {})
     report   = pipeline_output.get("weekly_report", "")
 
-    print(f"\n📁 Saving reports for {city}...")
+    run_id   = new_run_id()
+
+    if verbose: print(f"\n📁 Saving reports for {city}...")
     paths = {
-        "json": save_json(pipeline_output, city),
-        "txt":  save_txt_report(report, city, specials),
-        "csv":  save_csv(specials, city),
+        "json": save_json(pipeline_output, city, verbose, run_id),
+        "txt":  save_txt_report(report, city, specials, verbose, run_id),
+        "csv":  save_csv(specials, city, verbose, run_id),
     }
-    print(f"  ✅ All reports saved to: {REPORTS_DIR}")
+    add_report(city, paths, pipeline_output.get("config"), run_id=run_id)
+    if HISTORY_ENABLED:
+        record_run(pipeline_output)
+    if verbose: print(f"  ✅ All reports saved to: {REPORTS_DIR}")
     return paths
+
+
+# ══════════════════════════════════════════
+#  BACKGROUND WRITER
+# ══════════════════════════════════════════
+class ReportWriter:
+    """
+    Queues save_all() jobs for a pool of background worker threads.
+
+    submit() returns at once with a Future of the saved paths; flush() (or
+    `await flush_async()`) waits for everything queued so far and returns
+    the (city, exception) pairs of saves that failed. Outputs are copied on
+    submit, so callers can keep modifying theirs. Jobs still queued at exit
+    are finished before the interpreter shuts down.
+    """
+
+    def __init__(self, save=None, max_workers: int = REPORT_WORKERS):
+        self._save     = save or save_all
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-writer")
+        self._lock     = threading.Lock()
+        self._pending  = {}        # Future → city
+        self._errors   = []
+
+    def submit(self, pipeline_output: dict, verbose: bool = False) -> Future:
+        city     = pipeline_output.get("city", "India")
+        snapshot = copy.deepcopy(pipeline_output)
+        with self._lock:
+            future = self._executor.submit(self._save, snapshot, verbose)
+            self._pending[future] = city
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future: Future) -> None:
+        with self._lock:
+            city = self._pending.pop(future, "?")
+            if not future.cancelled() and future.exception() is not None:
+                self._errors.append((city, future.exception()))
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def pop_errors(self) -> list[tuple[str, BaseException]]:
+        """Failed saves since the last call, oldest first."""
+        with self._lock:
+            errors, self._errors = self._errors, []
+        return errors
+
+    def flush(self, timeout: float | None = None) -> list[tuple[str, BaseException]]:
+        """Block until every save queued so far is done; returns pop_errors()."""
+        with self._lock:
+            futures = list(self._pending)
+        wait(futures, timeout)
+        return self.pop_errors()
+
+    async def flush_async(self) -> list[tuple[str, BaseException]]:
+        """flush() for async callers — waits without blocking the event loop."""
+        with self._lock:
+            futures = list(self._pending)
+        await asyncio.gather(*(asyncio.wrap_future(f) for f in futures), return_exceptions=True)
+        return self.pop_errors()
+
+    def close(self) -> list[tuple[str, BaseException]]:
+        errors = self.flush()
+        self._executor.shutdown()
+        return errors
+
+
+_writer      = None
+_writer_lock = threading.Lock()
+
+
+def report_writer() -> ReportWriter:
+    """The process-wide background ReportWriter."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ReportWriter()
+    return _writer
@@ -0,0 +1,196 @@
+"""
+reports/retention.py
+━━━━━━━━━━━━━━━━━━━━
+Keeps reports/output/ from growing without bound:
+
+  • save_all() shards runs as output/{city}/{YYYY-MM}/, so no directory
+    holds more than one city-month of files
+  • compact() keeps the newest KEEP_LATEST runs of every city as plain files
+    and rolls every older run into one zip per month, output/_archive/YYYY-MM.zip,
+    with an index.json member listing the runs it holds
+  • the catalog rows of archived runs point into their archive, so
+    latest() / reports_between() still find them and read_report() opens them
+
+An archive is rewritten to a temp file and renamed into place, and the
+plain files are only deleted once the archive and the catalog both have
+the run — an interrupted compaction loses nothing.
+
+  python -m reports.retention                # compact with the defaults
+  python -m reports.retention --keep 4 --dry-run
+  python -m reports.retention --drop-months 24   # also delete archives older than 2 years
+
+Configure via environment variables:
+  FOOD_AGENT_KEEP_LATEST   runs per city kept as plain files (default 8)
+"""
+
+import argparse
+import json
+import os
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from reports import catalog
+from reports.catalog import ARCHIVE_INDEX, KINDS, _db, mark_archived
+from reports.serialization import FSYNC, decode_json
+
+load_dotenv()
+
+KEEP_LATEST = int(os.getenv("FOOD_AGENT_KEEP_LATEST", "8"))
+
+
+def _dirs(path: Path | None = None) -> tuple[Path, Path]:
+    """Reports root and archive directory of the catalog at `path` (the default catalog's for None)."""
+    if path is None:
+        return catalog.REPORTS_DIR, catalog.ARCHIVE_DIR
+    root = Path(path).parent
+    return root, root / catalog.ARCHIVE_DIR.name
+
+
+def _archive_candidates(keep_latest: int, path: Path | None = None) -> list[dict]:
+    """Catalog rows of plain-file runs beyond the newest `keep_latest` of their city."""
+    with _db(path) as db:
+        return [dict(r) for r in db.execute(
+            "SELECT * FROM (SELECT *, ROW_NUMBER() OVER (PARTITION BY city_slug ORDER BY ts DESC, report_id DESC) "
+            "AS rank FROM reports) WHERE rank > ? AND archive IS NULL ORDER BY ts",
+            (keep_latest,),
+        )]
+
+
+def _write_archive(archive: Path, rows: list[dict]) -> list[tuple[int, str, dict]]:
+    """
+    Add `rows`' files to `archive` (created if missing) via a rewritten temp
+    copy; returns [(report_id, archive, {kind: member})] for mark_archived().
+    """
+    runs, archived, names = [], [], set()
+    tmp = archive.with_name(f".{archive.name}.{os.getpid()}.tmp")
+    try:
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as out:
+            if archive.exists():
+                with zipfile.ZipFile(archive) as old:
+                    runs = json.loads(old.read(ARCHIVE_INDEX))["runs"]
+                    for info in old.infolist():
+                        if info.filename != ARCHIVE_INDEX:
+                            out.writestr(info, old.read(info))
+                            names.add(info.filename)
+            for row in rows:
+                members = {}
+                for kind in KINDS:
+                    src = row[f"{kind}_path"]
+                    if not src:
+                        continue
+                    member = f"{row['city_slug']}/{Path(src).name}"
+                    if member in names:         # archived by a compaction that stopped before the catalog update
+                        members[kind] = member
+                    elif Path(src).exists():
+                        out.write(src, member)
+                        members[kind] = member
+                archived.append((row["report_id"], str(archive), members))
+                if any(m in names for m in members.values()):
+                    continue
+                runs.append({
+                    "city":      row["city"],
+                    "city_slug": row["city_slug"],
+                    "ts":        row["ts"],
+                    "config":    {k: row[k] for k in ("restaurant_type", "price_range", "season")},
+                    "files":     members,
+                    "bytes":     {k: row[f"{k}_bytes"] for k in members},
+                })
+            out.writestr(ARCHIVE_INDEX, json.dumps({"month": archive.stem, "runs": runs}, ensure_ascii=False, indent=1))
+        if FSYNC != "none":
+            with open(tmp, "rb") as f:
+                os.fsync(f.fileno())
+        os.replace(tmp, archive)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return archived
+
+
+def _remove_empty_shards(root: Path, archive_dir: Path) -> None:
+    for d in sorted((p for p in root.rglob("*") if p.is_dir()), key=lambda p: len(p.parts), reverse=True):
+        if d != archive_dir and not any(d.iterdir()):
+            d.rmdir()
+
+
+def compact(keep_latest: int = KEEP_LATEST, dry_run: bool = False, path: Path | None = None,
+            verbose: bool = True) -> dict:
+    """
+    Roll every run beyond the newest `keep_latest` per city into its month's
+    archive. Archives go next to the catalog at `path` (default: the
+    reports/output one). Returns {"runs", "archives", "bytes_freed"}.
+    """
+    rows = _archive_candidates(keep_latest, path)
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(row["ts"][:7], []).append(row)
+    freed = sum(row[f"{k}_bytes"] or 0 for row in rows for k in KINDS)
+
+    if verbose:
+        print(f"  🗜  {len(rows)} runs → {len(by_month)} monthly archives"
+              f" ({freed / 1024:.0f} KB of plain files){' — dry run' if dry_run else ''}")
+    if dry_run or not rows:
+        return {"runs": len(rows), "archives": len(by_month), "bytes_freed": freed}
+
+    reports_dir, archive_dir = _dirs(path)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    for month, month_rows in sorted(by_month.items()):
+        archived = _write_archive(archive_dir / f"{month}.zip", month_rows)
+        mark_archived(archived, path)
+        for row in month_rows:
+            for kind in KINDS:
+                if row[f"{kind}_path"]:
+                    Path(row[f"{kind}_path"]).unlink(missing_ok=True)
+        if verbose: print(f"     {month}.zip  +{len(month_rows)} runs")
+
+    _remove_empty_shards(reports_dir, archive_dir)
+    return {"runs": len(rows), "archives": len(by_month), "bytes_freed": freed}
+
+
+def drop_archives(older_than_months: int, path: Path | None = None, verbose: bool = True) -> list[str]:
+    """Delete monthly archives (and their catalog rows) older than `older_than_months`."""
+    now     = datetime.now()
+    month   = now.year * 12 + now.month - 1 - older_than_months
+    cutoff  = f"{month // 12:04d}-{month % 12 + 1:02d}"
+    dropped = [str(a) for a in sorted(_dirs(path)[1].glob("*.zip")) if a.stem < cutoff]
+    for archive in dropped:
+        with _db(path) as db:
+            db.execute("DELETE FROM reports WHERE archive = ?", (archive,))
+        Path(archive).unlink(missing_ok=True)
+    if verbose and dropped: print(f"  🧹 Dropped {len(dropped)} archives older than {cutoff}")
+    return dropped
+
+
+# ══════════════════════════════════════════
+#  READ
+# ══════════════════════════════════════════
+def read_report(row: dict, kind: str = "json") -> bytes:
+    """Raw bytes of one report of a catalog row, whether plain or archived."""
+    member = row[f"{kind}_path"]
+    if not member:
+        raise FileNotFoundError(f"Run {row.get('report_id')} has no {kind} report")
+    if row.get("archive"):
+        with zipfile.ZipFile(row["archive"]) as zf:
+            return zf.read(member)
+    return Path(member).read_bytes()
+
+
+def load_report_json(row: dict):
+    """The pipeline output of a catalog row, decompressed and decoded."""
+    return decode_json(read_report(row, "json"), row["json_path"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report retention and monthly compaction")
+    parser.add_argument("--keep",        type=int, default=KEEP_LATEST, help="Runs per city kept as plain files")
+    parser.add_argument("--dry-run",     action="store_true")
+    parser.add_argument("--drop-months", type=int, help="Also delete archives older than N months")
+    args = parser.parse_args()
+
+    if not catalog.CATALOG_DB.exists():
+        parser.error("no catalog yet — run `python -m reports.catalog --rebuild` first")
+    compact(args.keep, dry_run=args.dry_run)
+    if args.drop_months and not args.dry_run:
+        drop_archives(args.drop_months)
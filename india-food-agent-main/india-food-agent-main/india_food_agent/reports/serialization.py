@@ -0,0 +1,199 @@
+"""
+reports/serialization.py
+━━━━━━━━━━━━━━━━━━━━━━━━
+How pipeline outputs are written to and read back from disk:
+
+  • style        pretty (indent=2, the original format) | compact (no whitespace)
+  • compression  none | gzip (.json.gz) | zstd (.json.zst)
+  • orjson is used for encoding / decoding when it is installed, else json
+
+Readers go by the file suffix, so every format can be mixed in one
+directory. open_json() decompresses as a stream; read_json() /
+iter_outputs() then hold one decompressed document in memory at a time
+(the JSON decoders need all of it), never the compressed and
+decompressed copies together.
+
+Every file is written with atomic_write(): to a temp file in the same
+directory, then renamed over the target, so readers and crashes never see a
+half-written report. FOOD_AGENT_FSYNC sets how durable the rename is:
+  none  — leave flushing to the OS (fastest)
+  file  — fsync the file before the rename (default; survives power loss)
+  full  — also fsync the directory, so the rename itself is on disk
+
+Configure via environment variables:
+  FOOD_AGENT_JSON_STYLE         pretty | compact     (default pretty)
+  FOOD_AGENT_JSON_COMPRESSION   none | gzip | zstd   (default none)
+  FOOD_AGENT_FSYNC              none | file | full   (default file)
+
+  pip install orjson zstandard      # optional: faster JSON, zstd support
+
+Compare the formats on real outputs with `python -m reports.benchmark_formats`.
+"""
+
+import gzip
+import io
+import json
+import os
+import threading
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+load_dotenv()
+
+STYLES       = ("pretty", "compact")
+COMPRESSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+JSON_STYLE       = os.getenv("FOOD_AGENT_JSON_STYLE", "pretty")
+JSON_COMPRESSION = os.getenv("FOOD_AGENT_JSON_COMPRESSION", "none")
+FSYNC_POLICIES   = ("none", "file", "full")
+FSYNC            = os.getenv("FOOD_AGENT_FSYNC", "file")
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+def _check(style: str, compression: str) -> None:
+    if style not in STYLES:
+        raise ValueError(f"Unknown JSON style {style!r} (expected one of {', '.join(STYLES)})")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r} (expected one of {', '.join(COMPRESSIONS)})")
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstd compression needs the zstandard package (pip install zstandard)")
+
+
+def json_suffix(compression: str | None = None) -> str:
+    """'.json', '.json.gz' or '.json.zst'."""
+    return ".json" + COMPRESSIONS[compression or JSON_COMPRESSION]
+
+
+# ══════════════════════════════════════════
+#  ATOMIC WRITES
+# ══════════════════════════════════════════
+def atomic_write(path: str | Path, content: bytes | str, fsync: str | None = None) -> str:
+    """
+    Write `content` to `path` through a temp file + os.replace; `path`
+    either keeps its old contents or gets all of the new ones.
+    """
+    fsync = fsync or FSYNC
+    if fsync not in FSYNC_POLICIES:
+        raise ValueError(f"Unknown fsync policy {fsync!r} (expected one of {', '.join(FSYNC_POLICIES)})")
+    path = Path(path)
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    tmp  = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            if fsync != "none":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    if fsync == "full" and hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    return str(path)
+
+
+# ══════════════════════════════════════════
+#  ENCODE / WRITE
+# ══════════════════════════════════════════
+def encode_json(data, style: str | None = None, fast: bool = True) -> bytes:
+    """
+    UTF-8 JSON bytes in `style` (non-ASCII kept as-is, like ensure_ascii=False).
+    fast=False forces the stdlib encoder even when orjson is installed.
+    """
+    style = style or JSON_STYLE
+    if fast and orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if style == "pretty" else 0)
+    if style == "pretty":
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def compress(raw: bytes, compression: str | None = None) -> bytes:
+    compression = compression or JSON_COMPRESSION
+    if compression == "gzip":
+        return gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return raw
+
+
+def write_json(data, path: str | Path, style: str | None = None, compression: str | None = None,
+               fast: bool = True, fsync: str | None = None) -> str:
+    """
+    Atomically write `data` to `path` (e.g. x_full.json) — with .gz / .zst
+    appended when compressed. Returns the path written.
+    """
+    style, compression = style or JSON_STYLE, compression or JSON_COMPRESSION
+    _check(style, compression)
+    path = Path(str(path).removesuffix(".json") + json_suffix(compression))
+    return atomic_write(path, compress(encode_json(data, style, fast), compression), fsync)
+
+
+# ══════════════════════════════════════════
+#  READ
+# ══════════════════════════════════════════
+def open_json(path: str | Path):
+    """Binary file object over the decompressed JSON of `path`, chosen by suffix."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise ValueError(f"{path.name} is zstd-compressed — pip install zstandard to read it")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+    return open(path, "rb")
+
+
+def read_json(path: str | Path, fast: bool = True):
+    """
+    Decoded contents of a .json / .json.gz / .json.zst file. Decompression
+    streams, but the decompressed JSON is read into memory whole — use
+    open_json() to hand the stream to an incremental parser instead.
+    """
+    with open_json(path) as f:
+        raw = f.read()
+    return orjson.loads(raw) if fast and orjson is not None else json.loads(raw)
+
+
+def decode_json(raw: bytes, name: str, fast: bool = True):
+    """Decode JSON bytes read from somewhere other than a file path (e.g. an archive member)."""
+    if name.endswith(".gz"):
+        raw = gzip.decompress(raw)
+    elif name.endswith(".zst"):
+        if zstandard is None:
+            raise ValueError(f"{name} is zstd-compressed — pip install zstandard to read it")
+        raw = zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+    return orjson.loads(raw) if fast and orjson is not None else json.loads(raw)
+
+
+def is_json_file(path: str | Path) -> bool:
+    return any(str(path).endswith(json_suffix(c)) for c in COMPRESSIONS)
+
+
+def iter_outputs(paths: list[str | Path], pattern: str = "*_full.json*"):
+    """
+    Yield (path, data) for every JSON output in `paths` (files, or directories
+    searched recursively with `pattern`), one file in memory at a time.
+    """
+    for p in map(Path, paths):
+        files = sorted(f for f in p.rglob(pattern) if is_json_file(f)) if p.is_dir() else [p]
+        for file in files:
+            yield file, read_json(file)
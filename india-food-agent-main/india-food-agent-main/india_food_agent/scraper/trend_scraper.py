@@ -508,7 +508,8 @@ def get_instagram_hashtags(city: str) -> list[dict]:
 # ══════════════════════════════════════════════════════════════════
 #  5. MASTER SCRAPER
 # ══════════════════════════════════════════════════════════════════
-def scrape_all_trends(city: str, verbose: bool = True) -> dict:
+def scrape_all_trends(city: str, verbose: bool = True, on_stage=None) -> dict:
+    """All four sources for `city`; on_stage(stage, step, total) is called as each starts."""
     city_clean = city.split(",")[0].strip()
     if verbose:
         print(f"\n{'━'*50}")
@@ -524,6 +525,7 @@ def scrape_all_trends(city: str, verbose: bool = True) -> dict:
         "hashtags":       [],
     }
 
+    if on_stage: on_stage("food trends", 1, 4)
     if verbose: print("  🔍 [1/4] Scraping food trends (DuckDuckGo + curated)...")
     try:
         data["google_results"] = scrape_google_food_trends(city_clean)
@@ -532,6 +534,7 @@ def scrape_all_trends(city: str, verbose: bool = True) -> dict:
         if verbose: print(f"       ⚠ Falling back to curated: {e}")
         data["google_results"] = _get_curated_food_data(city_clean)
 
+    if on_stage: on_stage("zomato", 2, 4)
     if verbose: print("  🍽 [2/4] Scraping Zomato trending...")
     try:
         data["zomato_data"] = scrape_zomato_trending(city_clean)
@@ -540,6 +543,7 @@ def scrape_all_trends(city: str, verbose: bool = True) -> dict:
         if verbose: print(f"       ⚠ Falling back to curated: {e}")
         data["zomato_data"] = ZOMATO_CURATED.get(city_clean, [])
 
+    if on_stage: on_stage("articles", 3, 4)
     if verbose: print("  📰 [3/4] Scraping food-specific articles...")
     try:
         data["articles"] = scrape_food_articles(city_clean)
@@ -548,6 +552,7 @@ def scrape_all_trends(city: str, verbose: bool = True) -> dict:
         if verbose: print(f"       ⚠ Falling back to curated: {e}")
         data["articles"] = _get_curated_articles(city_clean)
 
+    if on_stage: on_stage("hashtags", 4, 4)
     if verbose: print("  📸 [4/4] Loading Instagram hashtag data...")
     try:
         data["hashtags"] = get_instagram_hashtags(city_clean)
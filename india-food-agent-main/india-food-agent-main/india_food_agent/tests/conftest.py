@@ -0,0 +1,35 @@
+"""
+Shared test setup: the project root on sys.path, no governor / telemetry
+side files, and every runtime artifact written under tmp_path.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("FOOD_AGENT_GOVERNOR", "0")
+os.environ.setdefault("FOOD_AGENT_TELEMETRY", "0")
+os.environ.setdefault("FOOD_AGENT_HISTORY", "0")
+
+from llm import backends, batch_pipeline, output_budget, trend_delta  # noqa: E402
+from reports import catalog                                          # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_data(tmp_path, monkeypatch):
+    """Point every data/ path at tmp_path and start on the mock backend."""
+    monkeypatch.setattr(backends,       "FIXTURES_DIR",      tmp_path / "llm_fixtures")
+    monkeypatch.setattr(batch_pipeline, "BATCH_DIR",         tmp_path / "batches")
+    monkeypatch.setattr(output_budget,  "OUTPUT_STATS_PATH", tmp_path / "output_tokens.sqlite")
+    monkeypatch.setattr(output_budget,  "LEGACY_STATS_JSON", tmp_path / "output_tokens.json")
+    monkeypatch.setattr(output_budget,  "_samples",          None)
+    monkeypatch.setattr(trend_delta,    "HISTORY_DIR",       tmp_path / "trend_history")
+    monkeypatch.setattr(catalog,        "REPORTS_DIR",       tmp_path / "reports")
+    monkeypatch.setattr(catalog,        "CATALOG_DB",        tmp_path / "reports" / "catalog.sqlite")
+    monkeypatch.setattr(catalog,        "ARCHIVE_DIR",       tmp_path / "reports" / "_archive")
+    monkeypatch.setitem(backends._config, "backend", "mock")
+    yield tmp_path
+    output_budget.flush()       # samples queued by this test land in its own store
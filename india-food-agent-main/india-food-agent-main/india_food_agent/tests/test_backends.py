@@ -0,0 +1,28 @@
+import asyncio
+
+from llm.backends import MockBackend, RecordingBackend, ReplayBackend, fixture_path, prompt_key
+from llm.dish_generator import analysis_request
+
+
+def _record(params: dict, fixtures_dir):
+    async def main():
+        recorder = RecordingBackend(MockBackend(), fixtures_dir)
+        async with recorder.stream(**params) as stream:
+            return await stream.get_final_message()
+    return asyncio.run(main())
+
+
+def test_record_then_replay_round_trips(tmp_path):
+    params   = analysis_request({"city": "Pune"})
+    recorded = _record(params, tmp_path)
+
+    assert fixture_path(params, tmp_path).name == f"{prompt_key(params)}.json"
+    replayed = ReplayBackend(fixtures_dir=tmp_path).message_for(params)
+    assert replayed == recorded
+
+
+def test_max_tokens_does_not_change_the_key(tmp_path):
+    params = analysis_request({"city": "Pune"})
+    _record(params, tmp_path)
+    assert ReplayBackend(fixtures_dir=tmp_path).message_for({**params, "max_tokens": 123}) is not None
+    assert prompt_key({**params, "max_tokens": 123}) == prompt_key(params)
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from llm.batch_pipeline import LocalBatchEndpoint, batch_state_path, load_batch_state, run_batch_pipeline
+
+CITIES = [{"city": c} for c in ("Hyderabad", "Chennai", "Pune")]
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptingEndpoint(LocalBatchEndpoint):
+    """Raises once on the first poll of `batch_id`, as if the process died there."""
+
+    def __init__(self, batch_id: str, **kwargs):
+        super().__init__(**kwargs)
+        self.interrupt_on = batch_id
+
+    def retrieve(self, batch_id: str):
+        if batch_id == self.interrupt_on:
+            self.interrupt_on = None
+            raise Interrupted(batch_id)
+        return super().retrieve(batch_id)
+
+
+def test_resume_repolls_the_submitted_batch():
+    endpoint = InterruptingEndpoint("msgbatch_local_0002")
+    with pytest.raises(Interrupted):
+        run_batch_pipeline(CITIES, run_id="resume", batches=endpoint, poll_interval_s=0, verbose=False)
+
+    state = load_batch_state("resume")
+    assert len(state["stages"]["analysis"]["results"]) == len(CITIES)
+    assert state["stages"]["specials"]["batch_id"] == "msgbatch_local_0002"
+    assert state["stages"]["specials"]["results"] == {}
+
+    out = run_batch_pipeline([], run_id="resume", batches=endpoint, poll_interval_s=0, verbose=False)
+    assert [o["city"] for o in out] == [c["city"] for c in CITIES]
+    assert len(endpoint._batches) == 3      # specials was re-polled, not submitted again
+    with open(batch_state_path("resume"), encoding="utf-8") as f:
+        assert all(not s["errors"] for s in json.load(f)["stages"].values())
+
+
+def test_failed_items_are_retried_in_a_fresh_batch():
+    def flaky(params):
+        if "Chennai" in json.dumps(params["messages"]):
+            raise RuntimeError("overloaded")
+        return LocalBatchEndpoint().respond(params)
+
+    with pytest.raises(RuntimeError, match="failed for 1 cities"):
+        run_batch_pipeline(CITIES, run_id="retry", batches=LocalBatchEndpoint(respond=flaky),
+                           poll_interval_s=0, verbose=False)
+    analysis = load_batch_state("retry")["stages"]["analysis"]
+    assert len(analysis["results"]) == 2
+    assert analysis["batch_id"] is None
+
+    endpoint = LocalBatchEndpoint()
+    out = run_batch_pipeline([], run_id="retry", batches=endpoint, poll_interval_s=0, verbose=False)
+    assert len(out) == len(CITIES)
+    assert len(endpoint._batches[next(iter(endpoint._batches))]["requests"]) == 1
@@ -0,0 +1,21 @@
+import pytest
+
+from llm import backends
+from llm.benchmark_matrix import run_matrix
+
+SNAPSHOTS = [{"city": "Pune", "scraped": {"city": "Pune"}, "trend_analysis": None}]
+
+
+def test_two_by_two_matrix_has_one_row_per_cell():
+    rows = run_matrix(SNAPSHOTS, stages=("analysis",), models=("fast", "strong"),
+                      variants=("default", "terse"), verbose=False)
+    assert [(r["model"], r["variant"]) for r in rows] == [
+        ("fast", "default"), ("fast", "terse"), ("strong", "default"), ("strong", "terse"),
+    ]
+    assert all(r["calls"] == 1 and r["errors"] == 0 and r["valid_pct"] == 100 for r in rows)
+
+
+def test_replay_refuses_a_max_tokens_sweep(monkeypatch):
+    monkeypatch.setitem(backends._config, "backend", "replay")
+    with pytest.raises(ValueError, match="max_tokens"):
+        run_matrix(SNAPSHOTS, stages=("analysis",), max_tokens=("auto", "1500"), verbose=False)
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import pytest
+
+from reports import catalog, report_generator
+from reports.report_generator import save_all
+
+OUTPUT = {
+    "city":           "Pune",
+    "trend_analysis": {"city": "Pune"},
+    "specials":       {"city": "Pune", "weekend_specials": []},
+    "weekly_report":  "Report.",
+    "config":         {"restaurant_type": "Fine Dining", "price_range": "₹₹₹", "season": "Monsoon"},
+}
+
+
+def test_live_save_and_rebuild_agree_on_ts(monkeypatch):
+    monkeypatch.setattr(report_generator, "new_run_id", lambda now=None: "20250301_020304-abcdef")
+    save_all(OUTPUT, verbose=False)
+    live = catalog.latest("Pune")
+    assert live["ts"] == "2025-03-01T02:03:04"
+
+    catalog.rebuild(catalog.REPORTS_DIR, verbose=False)
+    rebuilt = catalog.latest("Pune")
+    assert rebuilt["ts"] == live["ts"]
+    assert rebuilt["restaurant_type"] == "Fine Dining"
+
+
+def test_run_ids_in_the_same_second_are_distinct():
+    now = datetime(2026, 10, 19, 2, 45, 12)
+    ids = {catalog.new_run_id(now) for _ in range(50)}
+    assert len(ids) == 50
+    assert all(i.startswith("20261019_024512-") for i in ids)
+    assert len({catalog.report_name("Pune", i, "json") for i in ids}) == 50
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("pune_20261019_024512-9f3a1c_full.json",
+     {"slug": "pune", "run_id": "20261019_024512-9f3a1c", "kind": "json", "ts": "2026-10-19T02:45:12"}),
+    ("new_delhi_20261019_024512-9f3a1c_report.txt",
+     {"slug": "new_delhi", "run_id": "20261019_024512-9f3a1c", "kind": "txt", "ts": "2026-10-19T02:45:12"}),
+    ("pune_20261019_024512-9f3a1c_full.json.gz",
+     {"slug": "pune", "run_id": "20261019_024512-9f3a1c", "kind": "json", "ts": "2026-10-19T02:45:12"}),
+    ("pune_20250301_0200_dishes.csv",            # legacy HHMM names
+     {"slug": "pune", "run_id": "20250301_0200", "kind": "csv", "ts": "2025-03-01T02:00:00"}),
+    ("pune_20250301_0200_full.json",
+     {"slug": "pune", "run_id": "20250301_0200", "kind": "json", "ts": "2025-03-01T02:00:00"}),
+    ("pune_notadate_0200_full.json", None),
+    ("catalog.sqlite",               None),
+    ("full.json",                    None),
+])
+def test_parse_report_name(name, expected):
+    assert catalog.parse_report_name(name) == expected
+
+
+def test_report_name_round_trips_through_the_parser():
+    run_id = catalog.new_run_id()
+    parsed = catalog.parse_report_name(catalog.report_name("Navi Mumbai", run_id, "txt"))
+    assert parsed["run_id"] == run_id and parsed["slug"] == "navi_mumbai"
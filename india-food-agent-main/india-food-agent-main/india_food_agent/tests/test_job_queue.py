@@ -0,0 +1,79 @@
+import sqlite3
+import threading
+import time
+
+from jobs import job_queue
+from jobs.job_queue import JobQueue, claim_save, current_job, report_stage
+from jobs.singleflight import SingleFlight
+
+
+def test_base_exception_marks_the_job_failed(tmp_path):
+    def exits():
+        raise SystemExit(1)
+
+    queue = JobQueue(max_workers=1, path=tmp_path / "jobs.sqlite")
+    job   = queue.wait(queue.submit("exit", exits), timeout=5)
+    queue.close()
+    assert job["status"] == "failed"
+    assert job["error"] == "interrupted: SystemExit"
+
+
+def test_one_job_claims_each_output(tmp_path):
+    queue = JobQueue(max_workers=2, path=tmp_path / "jobs.sqlite")
+    ids   = [queue.submit("save", lambda: claim_save("output-1")) for _ in range(3)]
+    wins  = [queue.result(queue.wait(i, timeout=5)["job_id"]) for i in ids]
+    queue.close()
+    assert sorted(wins) == [False, False, True]
+    assert claim_save("output-1")           # outside a job there is nothing to dedupe against
+
+
+def test_adds_the_saved_column_to_an_older_database(tmp_path):
+    path = tmp_path / "jobs.sqlite"
+    with sqlite3.connect(path) as db:
+        db.execute("CREATE TABLE jobs (job_id TEXT PRIMARY KEY, kind TEXT NOT NULL, key TEXT, status TEXT NOT NULL, "
+                   "stage TEXT, step INTEGER NOT NULL DEFAULT 0, steps INTEGER NOT NULL DEFAULT 0, params TEXT, "
+                   "result BLOB, error TEXT, pid INTEGER NOT NULL, created TEXT NOT NULL, started TEXT, finished TEXT)")
+    queue = JobQueue(max_workers=1, path=path)
+    assert queue.result(queue.wait(queue.submit("save", lambda: claim_save("k")), timeout=5)["job_id"]) is True
+    queue.close()
+
+
+def test_coalesced_job_follows_the_leaders_stages(tmp_path):
+    flight  = SingleFlight("test")
+    queue   = JobQueue(max_workers=2, path=tmp_path / "jobs.sqlite")
+    stage_2 = threading.Event()
+    release = threading.Event()
+
+    def pipeline():
+        report_stage("analysis", 1, 3)
+        stage_2.wait(5)
+        report_stage("specials", 2, 3)
+        release.wait(5)
+        return "output"
+
+    leader = queue.submit("generate", lambda: flight.do("Pune", pipeline)[0])
+    while queue.status(leader)["stage"] != "analysis":
+        time.sleep(0.005)
+    waiter = queue.submit("generate", lambda: flight.do("Pune", pipeline)[0])
+    while flight.stats()["coalesced"] < 1:
+        time.sleep(0.005)
+    while queue.status(waiter)["stage"] != "analysis":      # caught up on joining
+        time.sleep(0.005)
+
+    stage_2.set()
+    while queue.status(waiter)["stage"] != "specials":      # and forwarded afterwards
+        time.sleep(0.005)
+    assert queue.status(waiter)["step"] == 2
+
+    release.set()
+    assert [queue.result(queue.wait(j, timeout=5)["job_id"]) for j in (leader, waiter)] == ["output", "output"]
+    assert job_queue._followers == {}
+    queue.close()
+
+
+def test_worker_thread_forgets_the_job_once_it_ends(tmp_path):
+    queue = JobQueue(max_workers=1, path=tmp_path / "jobs.sqlite")
+    assert queue.wait(queue.submit("noop", lambda: current_job()), timeout=5)["status"] == "done"
+    after = queue._executor.submit(lambda: (current_job(), getattr(job_queue._current, "path", None))).result(5)
+    queue.close()
+    assert after == (None, None)
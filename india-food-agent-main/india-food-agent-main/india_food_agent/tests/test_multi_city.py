@@ -0,0 +1,73 @@
+import pytest
+
+from llm import dish_generator
+from llm.backends import MockBackend, mock_message, stub_response
+from llm.dish_generator import analyze_cities
+from llm.structured_output import ANALYSIS_TOOL
+
+CITIES  = ["Pune", "Goa", "Hyderabad"]
+SCRAPES = [{"city": c, "hashtags": [{"hashtag": f"#{c.lower()}food", "estimated_growth_pct": 10}]} for c in CITIES]
+
+
+def analysis(city: str, **fields) -> dict:
+    return {**stub_response({"tools": [ANALYSIS_TOOL]}).content[0].input, "city": city,
+            "analysis_summary": f"{city} summary", **fields}
+
+
+class CityBackend(MockBackend):
+    """Mock backend answering record_city_analyses with `entries`; single-city calls get a stub for their city."""
+
+    def __init__(self):
+        super().__init__(ttft_s=0, tokens_per_s=0)
+        self.multi, self.single, self.entries = 0, [], []
+
+    def message_for(self, params: dict):
+        message = mock_message(params)
+        if params["tools"][0]["name"] == "record_city_analyses":
+            self.multi += 1
+            message.content[0].input = {"analyses": self.entries}
+        else:
+            city = next(c for c in CITIES if f"#{c.lower()}food" in params["messages"][0]["content"])
+            self.single.append(city)
+            message.content[0].input = analysis(city, analysis_summary=f"{city} alone")
+        return message
+
+
+@pytest.fixture
+def claude(monkeypatch):
+    backend = CityBackend()
+    monkeypatch.setattr(dish_generator, "make_backend", lambda: backend)
+    return backend
+
+
+def test_dropped_city_gets_its_own_call(claude):
+    claude.entries = [analysis("hyderabad", analysis_summary="Hyderabad summary"),   # Goa missing,
+                      analysis(" PUNE ", analysis_summary="Pune summary")]              # order and case differ
+    results = analyze_cities(SCRAPES)
+    assert claude.multi == 1 and claude.single == ["Goa"]
+    assert [r["city"] for r in results] == CITIES
+    assert [r["analysis_summary"] for r in results] == ["Pune summary", "Goa alone", "Hyderabad summary"]
+
+
+def test_incomplete_entry_gets_its_own_call(claude):
+    incomplete = analysis("Goa")
+    del incomplete["viral_hashtags"]
+    claude.entries = [analysis("Pune"), incomplete, analysis("Hyderabad")]
+    results = analyze_cities(SCRAPES)
+    assert claude.single == ["Goa"]
+    assert results[1]["analysis_summary"] == "Goa alone"
+
+
+def test_misspelt_cities_map_by_position_when_all_are_there(claude):
+    claude.entries = [analysis("Poona"), analysis("Panaji"), analysis("Secunderabad")]
+    results = analyze_cities(SCRAPES)
+    assert claude.single == []
+    assert [(r["city"], r["analysis_summary"]) for r in results] == [
+        ("Pune", "Poona summary"), ("Goa", "Panaji summary"), ("Hyderabad", "Secunderabad summary")]
+
+
+def test_unusable_payload_falls_back_city_by_city(claude):
+    claude.entries = "not a list"
+    results = analyze_cities(SCRAPES)
+    assert sorted(claude.single) == sorted(CITIES)
+    assert [r["analysis_summary"] for r in results] == [f"{c} alone" for c in CITIES]
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from llm import output_budget
+from llm.output_budget import MIN_SAMPLES, SHAPES, flush, max_tokens_for, output_stats, record_output
+
+
+def _record(shape: str, sizes, stop_reason=None):
+    for size in sizes:
+        record_output(shape, size, stop_reason)
+
+
+def test_default_until_enough_samples():
+    _record("report", [100] * (MIN_SAMPLES - 1))
+    assert max_tokens_for("report") == SHAPES["report"][0]
+
+
+@pytest.mark.parametrize("shape, size, expected", [
+    ("specials", 2000, 2500),      # p95 2000 × 1.25
+    ("specials", 2010, 2600),      # 2512.5 rounded up to the next 100
+    ("specials", 100,  1500),      # clamped to the floor
+    ("specials", 9000, 6000),      # clamped to the ceiling
+    ("report",   480,  600),
+])
+def test_p95_times_headroom_clamped_and_rounded(shape, size, expected):
+    _record(shape, [size] * MIN_SAMPLES)
+    assert max_tokens_for(shape) == expected
+
+
+def test_units_scale_the_per_unit_budget():
+    _record("city_analysis", [1000] * MIN_SAMPLES)
+    assert max_tokens_for("city_analysis", units=3) == 3800            # 1250 per city × 3, rounded up
+
+
+def test_truncated_outputs_count_one_and_a_half_times():
+    _record("report", [400] * MIN_SAMPLES, stop_reason="max_tokens")
+    assert output_stats()["report"]["p50"] == 600
+    assert max_tokens_for("report") == 800                              # 600 × 1.25 = 750 → 800
+
+
+def test_samples_are_shared_through_the_store(monkeypatch):
+    _record("analysis", [1000] * MIN_SAMPLES)
+    flush()
+    monkeypatch.setattr(output_budget, "_samples", None)                # another process's first look
+    assert max_tokens_for("analysis") == 1300
+
+
+def test_store_keeps_the_newest_window(monkeypatch):
+    monkeypatch.setattr(output_budget, "WINDOW", 5)
+    _record("analysis", range(1, 9))
+    flush()
+    monkeypatch.setattr(output_budget, "_samples", None)
+    assert output_budget._load()["analysis"] == [4, 5, 6, 7, 8]
+
+
+def test_legacy_json_is_imported_once():
+    with open(output_budget.LEGACY_STATS_JSON, "w", encoding="utf-8") as f:
+        json.dump({"report": [480] * MIN_SAMPLES}, f)
+    assert max_tokens_for("report") == 600
@@ -0,0 +1,83 @@
+import json
+
+from llm import backends, dish_generator, telemetry
+from llm.dish_generator import analysis_request, analyze_scraped_data
+from llm.prompt_budget import count_request_tokens, count_tokens, pack_scraped_context
+from llm.structured_output import ANALYSIS_TOOL
+
+
+WORDS = ("biryani haleem kebab paya nihari korma pulao lukhmi marag khichdi qubani falooda mirchi "
+         "chai osmania samosa dosa idli vada pongal upma payasam kulfi rabri jalebi").split()
+
+
+def rich_scrape(n: int = 40) -> dict:
+    """n distinct items per section (each one's words barely overlap with the others')."""
+    word = lambda i, k: f"{WORDS[(i * 3 + k) % len(WORDS)]}{i}"
+    return {
+        "city": "Hyderabad",
+        "google_results": [{"title": f"{word(i, 0)} {word(i, 1)}", "snippet": f"{word(i, 2)} queues", "query": "live"}
+                           for i in range(n)],
+        "zomato_data":    [{"type": "restaurant", "name": f"{word(i, 1)} house"} for i in range(n)],
+        "articles":       [{"headline": f"{word(i, 2)} season", "source": "Times Food"} for i in range(n)],
+        "hashtags":       [{"hashtag": f"#Hyderabad{word(i, 0).title()}", "estimated_growth_pct": i, "type": "rising"}
+                           for i in range(n)],
+    }
+
+
+def test_packing_stays_within_budget_and_grows_with_it():
+    small = pack_scraped_context(rich_scrape(), 300)
+    large = pack_scraped_context(rich_scrape(), 1500)
+    assert small["tokens"] <= 300 and large["tokens"] <= 1500
+    assert small["kept"] < large["kept"] < large["total"] == 160
+    assert small["tokens"] == count_tokens(small["text"])
+
+
+def test_best_item_of_every_section_survives_a_tiny_budget():
+    packed = pack_scraped_context(rich_scrape(), 0)
+    assert packed["kept"] == 4
+    assert f"#Hyderabad{WORDS[39 * 3 % len(WORDS)].title()}39" in packed["text"]     # fastest-growing hashtag
+
+
+def test_corroborated_items_are_picked_first():
+    scraped = {
+        "google_results": [{"title": "Office canteen menus", "snippet": "salads and wraps"},
+                           {"title": "Kokum sherbet everywhere", "snippet": "kokum coolers sell out"},
+                           {"title": "Bank holiday traffic", "snippet": "roads jammed"}],
+        "articles":       [{"headline": "Why kokum is this summer's flavour"}],
+    }
+    packed = pack_scraped_context(scraped, 60)
+    assert "Kokum sherbet" in packed["text"]
+    assert "Office canteen" not in packed["text"] and "Bank holiday" not in packed["text"]
+
+
+def test_near_duplicates_lose_to_novel_items():
+    scraped = {"google_results": [
+        {"title": "Best mutton biryani Hyderabad", "snippet": "mutton biryani dum style"},
+        {"title": "Best mutton biryani Hyderabad list", "snippet": "mutton biryani dum style"},
+        {"title": "Rooftop cafes serving Irani chai", "snippet": "osmania biscuits"},
+    ]}
+    one_more = count_tokens("• Best mutton biryani Hyderabad: mutton biryani dum style") + 30
+    packed   = pack_scraped_context(scraped, 2 * one_more)
+    assert packed["kept"] == 2
+    assert "Irani chai" in packed["text"] and "list:" not in packed["text"]
+
+
+def test_request_budget_includes_the_tool_schema():
+    params = analysis_request(rich_scrape(), "claude-test", input_budget=2500)
+    assert params["tools"] == [ANALYSIS_TOOL]
+    assert 2300 < count_request_tokens(params) <= 2500
+
+
+def test_packed_context_size_is_logged_with_the_call(tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetry, "TELEMETRY_ENABLED", True)
+    monkeypatch.setattr(telemetry, "TELEMETRY_PATH", tmp_path / "llm_calls.jsonl")
+    monkeypatch.setitem(backends._config, "ttft_s", 0)
+    monkeypatch.setitem(backends._config, "tokens_per_s", 0)
+    scraped = rich_scrape()
+    params  = analysis_request(scraped, "claude-test")
+    context = dish_generator._context_of(params)
+
+    analyze_scraped_data(scraped)
+    [record] = [json.loads(line) for line in open(telemetry.TELEMETRY_PATH, encoding="utf-8")]
+    assert record["context_tokens"] == context > 0
+    assert record["prompt_tokens"] == count_request_tokens({**params, "model": record["model"]})
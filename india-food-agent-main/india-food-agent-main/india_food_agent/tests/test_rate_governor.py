@@ -0,0 +1,99 @@
+import asyncio
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import anthropic
+import pytest
+
+from llm import rate_governor
+from llm.rate_governor import RateGovernor
+
+
+@pytest.fixture
+def governor_db(tmp_path, monkeypatch):
+    path = tmp_path / "rate_governor.sqlite"
+    monkeypatch.setattr(rate_governor, "GOVERNOR_DB", path)
+    return path
+
+
+def _governor(path, rpm=0, itpm=0, otpm=0) -> RateGovernor:
+    return RateGovernor(path, requests_per_min=rpm, input_tpm=itpm, output_tpm=otpm)
+
+
+def test_tickets_are_served_in_fifo_order(governor_db):
+    gov = _governor(governor_db)
+    first, second = gov._new_ticket(), gov._new_ticket()
+    assert gov._try_acquire(second, 10, 10)[0] is None          # not at the head of the queue
+    assert gov._try_acquire(first, 10, 10)[0] is not None
+    assert gov._try_acquire(second, 10, 10)[0] is not None
+
+
+@pytest.mark.parametrize("limits, first, second", [
+    ({"rpm": 1},    (10, 10), (10, 10)),
+    ({"itpm": 100}, (80, 10), (30, 10)),
+    ({"otpm": 100}, (10, 80), (10, 30)),
+])
+def test_admission_respects_each_limit(governor_db, limits, first, second):
+    gov = _governor(governor_db, **limits)
+    assert gov._try_acquire(gov._new_ticket(), *first)[0] is not None
+    reservation, wait, _ = gov._try_acquire(gov._new_ticket(), *second)
+    assert reservation is None and wait > 0
+
+
+def test_oversized_request_goes_through_on_an_empty_window(governor_db):
+    gov = _governor(governor_db, itpm=100)
+    assert gov._try_acquire(gov._new_ticket(), 500, 10)[0] is not None
+
+
+def test_settle_replaces_the_estimate(governor_db):
+    gov = _governor(governor_db, otpm=100)
+    reservation = gov._try_acquire(gov._new_ticket(), 10, 90)[0]
+    waiting     = gov._new_ticket()
+    assert gov._try_acquire(waiting, 10, 20)[0] is None
+    gov.settle(reservation, 12, 5)
+    assert gov.status()["output_tokens"] == 5
+    assert gov._try_acquire(waiting, 10, 20)[0] is not None
+
+
+def test_rate_limit_error_pauses_every_caller(governor_db):
+    gov      = _governor(governor_db)
+    response = SimpleNamespace(status_code=429, headers={"retry-after": "7"}, request=None)
+
+    async def call():
+        async with gov.slot(10, 10):
+            raise anthropic.RateLimitError("429", response=response, body=None)
+
+    with pytest.raises(anthropic.RateLimitError):
+        asyncio.run(call())
+    assert 6 < gov.status()["paused_s"] <= 7
+    reservation, wait, _ = gov._try_acquire(gov._new_ticket(), 10, 10)
+    assert reservation is None and wait > 6
+
+
+def test_stale_tickets_are_reaped(governor_db):
+    gov   = _governor(governor_db)
+    stale = gov._new_ticket()
+    with sqlite3.connect(governor_db) as db:
+        db.execute("UPDATE queue SET heartbeat = 0 WHERE ticket = ?", (stale,))
+    assert gov._try_acquire(gov._new_ticket(), 10, 10)[0] is not None
+    assert gov.status()["queued"] == 0
+
+
+def test_concurrent_callers_wait_their_turn(governor_db, monkeypatch):
+    monkeypatch.setattr(rate_governor, "WINDOW_S", 0.3)
+    gov   = _governor(governor_db, rpm=1)
+    order = []
+
+    async def caller(name):
+        await gov.acquire(10, 10)
+        order.append((name, time.monotonic()))
+
+    async def main():
+        first = asyncio.create_task(caller("first"))
+        await asyncio.sleep(0.05)
+        await asyncio.gather(first, caller("second"))
+
+    asyncio.run(main())
+    assert [name for name, _ in order] == ["first", "second"]
+    assert order[1][1] - order[0][1] >= 0.2          # held until the first request left the window
@@ -0,0 +1,77 @@
+import pytest
+
+from reports import report_generator
+from reports.renderer import render_cached
+
+SPECIALS = {
+    "generated_at":            "2026-10-17T09:30:00",
+    "top_weekend_ingredients": ["Kokum", "Raw mango"],
+    "weekend_specials": [{
+        "dish_name": "Kokum Panna Cotta", "category": "Dessert", "suggested_price_range": "₹350-420",
+        "predicted_demand": "High", "food_cost_level": "Low", "estimated_food_cost_inr": "₹80",
+        "gross_margin_pct": "78%", "inspired_by": "Instagram", "key_trending_ingredient": "Kokum",
+        "best_served": "Dinner", "description": "Tart & <creamy>", "plating_tip": "Slate plate",
+        "reels_tip": "Slow pour", "why_it_will_trend": "Konkan flavours are everywhere",
+    }],
+    "strategic_insight":  "Lean into coastal sour notes.",
+    "revenue_projection": "₹40k over the weekend",
+}
+
+
+def legacy_txt(report_text: str, city: str, specials: dict) -> str:
+    """The TXT layout save_txt_report built inline before reports/renderer.py."""
+    full  = f"\n{'═'*65}\n  🇮🇳  INDIA FOOD TREND AGENT — WEEKLY REPORT\n  City: {city}\n"
+    full += f"  Generated: Saturday, 17 October 2026 at 09:30 AM\n{'═'*65}\n\n"
+    full += "\nTOP WEEKEND INGREDIENTS:\n" + "".join(f"  {i}. {ing}\n" for i, ing in enumerate(specials["top_weekend_ingredients"], 1))
+    full += "\n\n" + report_text + "\n\nWEEKEND SPECIALS:\n" + "─"*60 + "\n"
+    for i, d in enumerate(specials["weekend_specials"], 1):
+        full += f"""
+{i}. {d.get('dish_name','').upper()}
+   Category    : {d.get('category','')}
+   Price       : {d.get('suggested_price_range','')}
+   Demand      : {d.get('predicted_demand','')}
+   Food Cost   : {d.get('food_cost_level','')} ({d.get('estimated_food_cost_inr','')})
+   Margin      : {d.get('gross_margin_pct','')}
+   Inspired By : {d.get('inspired_by','')}
+   Key Ingred. : {d.get('key_trending_ingredient','')}
+   Best Served : {d.get('best_served','')}
+
+   Description:
+   {d.get('description','')}
+
+   Plating Tip:
+   {d.get('plating_tip','')}
+
+   Reels Tip:
+   {d.get('reels_tip','')}
+
+   Why It'll Trend:
+   {d.get('why_it_will_trend','')}
+{"─"*60}"""
+    full += f"\n\nSTRATEGIC INSIGHT:\n{specials.get('strategic_insight','')}\n"
+    full += f"\nREVENUE PROJECTION:\n{specials.get('revenue_projection','')}\n"
+    full += f"\n{'═'*65}\nGenerated by 🇮🇳 India Food Trend Agent · Python + Claude AI\n{'═'*65}\n"
+    return full
+
+
+def test_saved_txt_keeps_the_legacy_layout():
+    path = report_generator.save_txt_report("Kokum is up 40% this week.", "Goa", SPECIALS, verbose=False)
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == legacy_txt("Kokum is up 40% this week.", "Goa", SPECIALS)
+
+
+def test_cached_rendering_is_read_only():
+    output   = {"city": "Goa", "specials": SPECIALS, "weekly_report": "Report"}
+    rendered = render_cached(output)
+    with pytest.raises(TypeError):
+        rendered["txt"] = "tampered"
+    with pytest.raises(AttributeError):
+        rendered["dish_cards"].append("<div>tampered</div>")
+    assert render_cached(dict(output)) is rendered
+    assert "&lt;creamy&gt;" in rendered["dish_cards"][0]
+
+
+def test_rendering_follows_the_outputs_city():
+    goa  = render_cached({"city": "Goa",  "specials": SPECIALS, "weekly_report": "Report"})
+    pune = render_cached({"city": "Pune", "specials": SPECIALS, "weekly_report": "Report"})
+    assert "City: Goa" in goa["txt"] and "City: Pune" in pune["txt"]
@@ -0,0 +1,148 @@
+import asyncio
+from types import SimpleNamespace
+
+import anthropic
+import pytest
+
+from llm import request_policy
+from llm.request_policy import DeadlineExceeded, backoff_delay, call_with_policy, is_retryable
+
+
+@pytest.fixture(autouse=True)
+def fresh_policy(monkeypatch):
+    monkeypatch.setattr(request_policy, "_ttft",   {})
+    monkeypatch.setattr(request_policy, "_counts", {"calls": 0, "hedges": 0})
+
+
+def _status_error(status: int, retry_after: str | None = None):
+    headers  = {"retry-after": retry_after} if retry_after is not None else {}
+    response = SimpleNamespace(status_code=status, headers=headers, request=None)
+    return anthropic.APIStatusError("boom", response=response, body=None)
+
+
+def _prime_hedging(calls: int, ttft_s: float = 0.01):
+    """Enough TTFT samples for a p95 of ~`ttft_s`, and `calls` earlier calls for the hedge ratio."""
+    for _ in range(request_policy.HEDGE_MIN_SAMPLES):
+        request_policy.record_ttft("analysis", ttft_s)
+    request_policy._counts["calls"] = calls
+
+
+@pytest.mark.parametrize("exc, retryable", [
+    (_status_error(429), True),
+    (_status_error(529), True),
+    (_status_error(500), True),
+    (_status_error(408), True),
+    (_status_error(400), False),
+    (_status_error(401), False),
+    (anthropic.APIConnectionError(request=None), True),
+    (ValueError("bad"), False),
+])
+def test_is_retryable(exc, retryable):
+    assert is_retryable(exc) is retryable
+
+
+def test_backoff_honours_retry_after_and_caps_it():
+    assert backoff_delay(0, _status_error(429, "3")) == 3.0
+    assert backoff_delay(0, _status_error(429, "999")) == request_policy.RETRY_MAX_DELAY_S
+    assert 0 <= backoff_delay(3, _status_error(429)) <= request_policy.RETRY_BASE_DELAY_S * 2 ** 3
+
+
+def test_retries_then_succeeds():
+    failures = [_status_error(529, "0"), _status_error(429, "0")]
+
+    async def attempt(timer):
+        timer.sent()
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    result, stats = asyncio.run(call_with_policy(attempt, "analysis", deadline_s=5, hedge=False))
+    assert result == "ok"
+    assert stats["retries"] == 2
+
+
+def test_non_retryable_error_is_raised_at_once():
+    calls = []
+
+    async def attempt(timer):
+        calls.append(1)
+        raise _status_error(400)
+
+    with pytest.raises(anthropic.APIStatusError):
+        asyncio.run(call_with_policy(attempt, "analysis", deadline_s=5, hedge=False))
+    assert len(calls) == 1
+
+
+def test_deadline_raises_deadline_exceeded():
+    async def attempt(timer):
+        await asyncio.sleep(5)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(call_with_policy(attempt, "analysis", deadline_s=0.05, hedge=False))
+
+
+def test_timeout_inside_the_attempt_is_not_a_deadline_miss():
+    async def attempt(timer):
+        raise TimeoutError("sqlite busy")
+
+    with pytest.raises(TimeoutError) as info:
+        asyncio.run(call_with_policy(attempt, "analysis", deadline_s=5, hedge=False))
+    assert not isinstance(info.value, DeadlineExceeded)
+
+
+def _slow_then_fast():
+    """First attempt never streams; later ones answer straight away."""
+    launched = []
+
+    async def attempt(timer):
+        launched.append(1)
+        timer.sent()
+        if len(launched) == 1:
+            await asyncio.sleep(5)
+        timer.first_token()
+        return len(launched)
+
+    return attempt, launched
+
+
+def test_hedge_fires_and_wins_when_allowed():
+    _prime_hedging(calls=100)
+    attempt, launched = _slow_then_fast()
+    result, stats = asyncio.run(call_with_policy(attempt, "analysis", deadline_s=5, hedge=True))
+    assert result == 2
+    assert stats["hedged"] and request_policy._counts["hedges"] == 1
+
+
+def test_hedge_ratio_cap_holds():
+    _prime_hedging(calls=0)        # 0.05 × 1 call < 1 hedge
+    attempt, launched = _slow_then_fast()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(call_with_policy(attempt, "analysis", deadline_s=0.2, hedge=True))
+    assert len(launched) == 1
+    assert request_policy._counts["hedges"] == 0
+
+
+def test_held_attempt_neither_hedges_nor_spins(monkeypatch):
+    _prime_hedging(calls=1000)
+    waits = []
+    real_wait = asyncio.wait
+
+    async def counting_wait(*args, **kwargs):
+        waits.append(kwargs.get("timeout"))
+        return await real_wait(*args, **kwargs)
+
+    monkeypatch.setattr(request_policy.asyncio, "wait", counting_wait)
+    launched = []
+
+    async def attempt(timer):
+        launched.append(1)
+        timer.hold()                   # queued in the rate governor
+        await asyncio.sleep(0.3)
+        timer.sent()
+        timer.first_token()
+        return "ok"
+
+    result, stats = asyncio.run(call_with_policy(attempt, "analysis", deadline_s=5, hedge=True))
+    assert result == "ok"
+    assert len(launched) == 1 and not stats["hedged"]
+    assert len(waits) < 10
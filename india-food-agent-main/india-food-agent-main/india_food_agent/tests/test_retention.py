@@ -0,0 +1,57 @@
+from reports import catalog
+from reports.retention import compact, drop_archives, load_report_json, read_report
+from reports.serialization import write_json
+
+RUNS = ["20250105_101500-aaaaaa", "20250212_101500-bbbbbb", "20250301_101500-cccccc", "20250302_101500-dddddd"]
+
+
+def _tree(root):
+    """A catalog at root/catalog.sqlite with four Pune runs, files sharded under root."""
+    db = root / "catalog.sqlite"
+    for run_id in RUNS:
+        shard = root / "pune" / f"{run_id[:4]}-{run_id[4:6]}"
+        shard.mkdir(parents=True, exist_ok=True)
+        paths = {
+            "json": write_json({"city": "Pune", "run": run_id}, shard / f"pune_{run_id}_full.json", compression="none"),
+            "txt":  str(shard / f"pune_{run_id}_report.txt"),
+            "csv":  None,
+        }
+        (shard / f"pune_{run_id}_report.txt").write_text(f"report {run_id}", encoding="utf-8")
+        catalog.add_report("Pune", paths, {"restaurant_type": "Fine Dining"}, path=db, run_id=run_id)
+    return db
+
+
+def test_compaction_stays_inside_a_non_default_catalog(tmp_path):
+    root = tmp_path / "elsewhere"
+    db   = _tree(root)
+
+    result = compact(keep_latest=1, path=db, verbose=False)
+    assert result["runs"] == 3 and result["archives"] == 3
+    assert sorted(p.name for p in (root / "_archive").iterdir()) == ["2025-01.zip", "2025-02.zip", "2025-03.zip"]
+    assert not catalog.ARCHIVE_DIR.exists()                 # the default tree was never touched
+    assert not (root / "pune" / "2025-01").exists()         # emptied shards are removed
+
+    rows = catalog.reports_between(city="Pune", path=db)
+    assert [bool(r["archive"]) for r in rows] == [True, True, True, False]
+    for run_id, row in zip(RUNS, rows):
+        assert load_report_json(row) == {"city": "Pune", "run": run_id}
+        assert read_report(row, "txt") == f"report {run_id}".encode()
+
+
+def test_rebuild_finds_archived_runs(tmp_path):
+    root = tmp_path / "elsewhere"
+    db   = _tree(root)
+    compact(keep_latest=1, path=db, verbose=False)
+
+    assert catalog.rebuild(root, path=db, verbose=False) == len(RUNS)
+    rows = catalog.reports_between(city="Pune", path=db)
+    assert [r["ts"][:10] for r in rows] == ["2025-01-05", "2025-02-12", "2025-03-01", "2025-03-02"]
+    assert load_report_json(rows[0]) == {"city": "Pune", "run": RUNS[0]}
+
+
+def test_drop_archives_only_looks_next_to_its_catalog(tmp_path):
+    db = _tree(tmp_path / "elsewhere")
+    compact(keep_latest=1, path=db, verbose=False)
+    dropped = drop_archives(0, path=db, verbose=False)
+    assert len(dropped) == 3
+    assert [r["archive"] for r in catalog.reports_between(path=db)] == [None]
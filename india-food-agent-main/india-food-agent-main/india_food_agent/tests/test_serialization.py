@@ -0,0 +1,65 @@
+import pytest
+
+from reports import serialization
+from reports.serialization import decode_json, iter_outputs, read_json, write_json
+
+DATA = {"city": "Kochi", "specials": {"weekend_specials": [{"dish_name": "Kappa biryani", "price": 450}]},
+        "weekly_report": "Karimeen pollichathu — ₹650"}
+
+
+@pytest.mark.parametrize("style", ["pretty", "compact"])
+@pytest.mark.parametrize("compression", ["none", "gzip", "zstd"])
+@pytest.mark.parametrize("fast", [True, False])
+def test_round_trip(tmp_path, style, compression, fast):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    path = write_json(DATA, tmp_path / "kochi_full.json", style=style, compression=compression, fast=fast)
+    assert path.endswith(serialization.json_suffix(compression))
+    assert read_json(path, fast=fast) == DATA
+    with open(path, "rb") as f:
+        assert decode_json(f.read(), path, fast=fast) == DATA
+
+
+def test_compact_has_no_whitespace_and_keeps_unicode(tmp_path):
+    path = write_json(DATA, tmp_path / "kochi_full.json", style="compact", compression="none", fast=False)
+    raw  = open(path, encoding="utf-8").read()
+    assert "\n" not in raw and ": " not in raw
+    assert "₹650" in raw
+
+
+def test_iter_outputs_reads_mixed_formats(tmp_path):
+    (tmp_path / "a").mkdir()
+    write_json(DATA, tmp_path / "a" / "x_full.json", compression="none")
+    write_json(DATA, tmp_path / "y_full.json", compression="gzip")
+    found = sorted(p.name for p, data in iter_outputs([tmp_path]) if data == DATA)
+    assert found == ["x_full.json", "y_full.json.gz"]
+
+
+def test_unknown_format_is_refused(tmp_path):
+    with pytest.raises(ValueError):
+        write_json(DATA, tmp_path / "x_full.json", style="yaml")
+
+
+@pytest.mark.parametrize("fail_at", ["fsync", "replace"])
+def test_failed_atomic_write_leaves_no_partial_or_temp_file(tmp_path, monkeypatch, fail_at):
+    target = tmp_path / "report.txt"
+    target.write_text("old", encoding="utf-8")
+
+    def boom(*args):
+        raise OSError(f"disk gone at {fail_at}")
+
+    monkeypatch.setattr(serialization.os, fail_at, boom)
+    with pytest.raises(OSError):
+        serialization.atomic_write(target, "new contents", fsync="file")
+    assert target.read_text(encoding="utf-8") == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["report.txt"]
+
+
+def test_failed_first_write_creates_nothing(tmp_path, monkeypatch):
+    def full(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(serialization.os, "replace", full)
+    with pytest.raises(OSError):
+        serialization.atomic_write(tmp_path / "new.json", b"{}")
+    assert list(tmp_path.iterdir()) == []
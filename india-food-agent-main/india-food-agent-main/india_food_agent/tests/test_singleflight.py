@@ -0,0 +1,79 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from jobs.singleflight import SingleFlight
+
+CALLERS = 5
+
+
+def _run_together(flight, fn, key="Pune"):
+    """CALLERS threads calling flight.do(key, fn) while the first call is held open."""
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        futures = [pool.submit(flight.do, key, fn, timeout=5)]
+        assert fn.entered.wait(5)
+        futures += [pool.submit(flight.do, key, fn, timeout=5) for _ in range(CALLERS - 1)]
+        while flight.stats()["coalesced"] < CALLERS - 1:
+            time.sleep(0.001)
+        fn.release.set()
+        return futures
+
+
+class SlowFn:
+    def __init__(self, error: Exception | None = None):
+        self.calls   = 0
+        self.error   = error
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.entered.set()
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return {"city": "Pune", "call": self.calls}
+
+
+def test_concurrent_callers_share_one_run():
+    flight, fn = SingleFlight("test"), SlowFn()
+    results = [f.result() for f in _run_together(flight, fn)]
+    assert fn.calls == 1
+    assert [shared for _, shared in results] == [False] + [True] * (CALLERS - 1)
+    assert all(result is results[0][0] for result, _ in results)
+    assert flight.stats() == {"name": "test", "in_flight": 0, "started": 1, "coalesced": CALLERS - 1}
+
+
+def test_waiters_get_the_leaders_exception():
+    flight, fn = SingleFlight("test"), SlowFn(error=RuntimeError("zomato is down"))
+    futures = _run_together(flight, fn)
+    for future in futures:
+        with pytest.raises(RuntimeError, match="zomato is down"):
+            future.result()
+    assert fn.calls == 1
+
+
+def test_key_is_released_once_the_run_finishes():
+    flight, fn = SingleFlight("test"), SlowFn(error=ValueError("first run fails"))
+    fn.release.set()
+    with pytest.raises(ValueError):
+        flight.do("Pune", fn)
+    assert flight.in_flight() == []
+
+    fn.error = None
+    assert flight.do("Pune", fn) == ({"city": "Pune", "call": 2}, False)
+    assert flight.do("Pune", fn) == ({"city": "Pune", "call": 3}, False)      # not a cache
+    assert flight.stats()["started"] == 3 and flight.in_flight() == []
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    flight, slow = SingleFlight("test"), SlowFn()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        held = pool.submit(flight.do, "Pune", slow)
+        assert slow.entered.wait(5)
+        assert flight.do("Goa", lambda: "goa") == ("goa", False)
+        assert flight.in_flight() == ["Pune"]
+        slow.release.set()
+        assert held.result(5)[1] is False
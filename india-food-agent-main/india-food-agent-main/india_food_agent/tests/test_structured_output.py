@@ -0,0 +1,114 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from llm import dish_generator
+from llm.backends import stub_response
+from llm.structured_output import (
+    ANALYSIS_TOOL, SPECIALS_SCHEMA, SPECIALS_TOOL, StructuredOutputError,
+    _is_complete_item, clean_arrays, merge_fields, missing_fields, repair_json,
+)
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('{"a": 1}',                                   {"a": 1}),
+    ('```json\n{"a": 1}\n```',                     {"a": 1}),
+    ('```\n{"a": [1, 2]}\n```',                    {"a": [1, 2]}),
+    ('Here is the analysis:\n{"a": 1}\nHope it helps!', {"a": 1}),
+    ('{"a": 1, "b": [1, 2,],}',                    {"a": 1, "b": [1, 2]}),
+    ('{"a": 1, "b": {"c": 2}, "d": [3',             {"a": 1, "b": {"c": 2}}),
+], ids=["plain", "json fence", "bare fence", "prose", "trailing commas", "truncated object"])
+def test_repair_json(raw, expected):
+    assert repair_json(raw) == expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('{"a": "x", "b": "half a sent',                 {"a": "x"}),
+    ('{"a": [{"n": 1}, {"n": 2}, {"n": ',            {"a": [{"n": 1}, {"n": 2}]}),
+    ('{"a": 1, "b": [1, 2',                          {"a": 1, "b": [1]}),
+    ('{"s": "brace } and \\" quote", "t": "cut',     {"s": 'brace } and " quote'}),
+], ids=["mid string", "mid array of objects", "mid array", "escaped quote"])
+def test_truncated_json_is_cut_to_the_last_complete_element(raw, expected):
+    assert repair_json(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["no json here", '{"a": "never closed', ""])
+def test_unrepairable_json_raises(raw):
+    with pytest.raises(StructuredOutputError):
+        repair_json(raw)
+
+
+@pytest.mark.parametrize("item, schema, complete", [
+    (3,       {"type": "number"},  True),
+    (2.5,     {"type": "number"},  True),
+    (True,    {"type": "number"},  False),
+    (False,   {"type": "integer"}, False),
+    (True,    {"type": "boolean"}, True),
+    ("x",     {"type": "string"},  True),
+    ({"a": 1}, {"type": "object", "required": ["a", "b"]}, False),
+])
+def test_is_complete_item(item, schema, complete):
+    assert _is_complete_item(item, schema) is complete
+
+
+def test_missing_fields_and_merge():
+    partial = {"city": "Pune", "top_weekend_ingredients": True, "weekend_specials": [{"dish_name": "x"}] * 3}
+    missing = missing_fields(partial, SPECIALS_SCHEMA)
+    assert missing == {"top_weekend_ingredients": 0, "weekend_specials": 2,
+                       "strategic_insight": 0, "revenue_projection": 0}
+
+    patch  = {"top_weekend_ingredients": ["jackfruit"], "weekend_specials": [{"dish_name": "y"}] * 4,
+              "strategic_insight": "s", "revenue_projection": "r", "city": "ignored"}
+    merged = merge_fields(partial, patch, missing)
+    assert merged["city"] == "Pune"
+    assert len(merged["weekend_specials"]) == 5
+    assert merged["top_weekend_ingredients"] == ["jackfruit"]
+
+
+def _text_response(text: str):
+    return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)], stop_reason="max_tokens")
+
+
+@pytest.fixture
+def continuation_calls(monkeypatch):
+    calls = []
+
+    async def fake_acreate(**params):
+        calls.append(params)
+        return stub_response(params)
+
+    monkeypatch.setattr(dish_generator, "_acreate", fake_acreate)
+    return calls
+
+
+def test_complete_payload_needs_no_continuation(continuation_calls):
+    full = stub_response({"tools": [ANALYSIS_TOOL]})
+    data = asyncio.run(dish_generator.complete_structured_async(full, ANALYSIS_TOOL, "model"))
+    assert not missing_fields(data, ANALYSIS_TOOL["input_schema"])
+    assert continuation_calls == []
+
+
+def test_missing_fields_cost_exactly_one_continuation(continuation_calls):
+    response = _text_response('Sure! ```json\n{"city": "Pune", "strategic_insight": "x", "weekend_specials": [')
+    data = asyncio.run(dish_generator.complete_structured_async(response, SPECIALS_TOOL, "model"))
+
+    assert len(continuation_calls) == 1
+    asked = continuation_calls[0]["tools"][0]["input_schema"]["properties"]
+    assert set(asked) == {"top_weekend_ingredients", "weekend_specials", "revenue_projection"}
+    assert data["city"] == "Pune" and data["strategic_insight"] == "x"
+    assert not missing_fields(clean_arrays(data, SPECIALS_SCHEMA), SPECIALS_SCHEMA)
+
+
+def test_still_missing_after_continuation_raises_with_partial(monkeypatch):
+    calls = []
+
+    async def unhelpful(**params):
+        calls.append(params)
+        return _text_response("{}")
+
+    monkeypatch.setattr(dish_generator, "_acreate", unhelpful)
+    with pytest.raises(StructuredOutputError) as info:
+        asyncio.run(dish_generator.complete_structured_async(_text_response('{"city": "Pune"}'), SPECIALS_TOOL, "m"))
+    assert len(calls) == 1
+    assert info.value.partial["city"] == "Pune"
@@ -0,0 +1,103 @@
+import copy
+
+import pytest
+
+from llm import dish_generator
+from llm.backends import stub_response
+from llm.dish_generator import analyze_incremental
+from llm.structured_output import ANALYSIS_TOOL
+from llm.trend_delta import diff_scrapes, load_city_snapshot, save_city_snapshot
+
+SCRAPE = {
+    "city": "Pune",
+    "google_results": [{"title": "Misal pav week", "snippet": "queues at Bedekar"},
+                       {"title": "Monsoon bhajiya", "snippet": "Sinhagad fort stalls"}],
+    "zomato_data":    [{"type": "restaurant", "name": "Vaishali"},
+                       {"type": "cuisine",    "name": "Vaishali"}],        # same key, different items
+    "articles":       [{"headline": "Pune's cafe boom", "source": "Times Food"}],
+    "hashtags":       [{"hashtag": "#punefood", "estimated_growth_pct": 12}, {"hashtag": "#misal", "estimated_growth_pct": 30}],
+}
+ITEMS = 7
+
+
+def test_identical_scrapes_have_no_changes():
+    delta = diff_scrapes(SCRAPE, copy.deepcopy(SCRAPE))
+    assert delta == {"added": {}, "changed": {}, "removed": {},
+                     "unchanged_count": ITEMS, "changed_count": 0, "change_ratio": 0.0}
+
+
+def test_duplicate_keys_are_compared_item_by_item():
+    current = copy.deepcopy(SCRAPE)
+    current["zomato_data"][1]["type"] = "collection"
+    delta = diff_scrapes(SCRAPE, current)
+    assert delta["changed"] == {"zomato_data": [{"type": "collection", "name": "Vaishali"}]}
+    assert delta["unchanged_count"] == ITEMS - 1
+
+    current["zomato_data"].append({"type": "dish", "name": "Vaishali"})
+    delta = diff_scrapes(SCRAPE, current)
+    assert delta["added"] == {"zomato_data": [{"type": "dish", "name": "Vaishali"}]}
+
+    del current["zomato_data"][1:]
+    assert diff_scrapes(SCRAPE, current)["removed"] == {"zomato_data": ["Vaishali"]}
+
+
+def test_items_without_a_key_are_matched_by_content():
+    previous = {"articles": [{"source": "Times Food", "summary": "Kokum is back"}]}
+    assert diff_scrapes(previous, copy.deepcopy(previous))["unchanged_count"] == 1
+
+    delta = diff_scrapes(previous, {"articles": [{"source": "Times Food", "summary": "Kokum is everywhere"}]})
+    assert delta["added"] == {"articles": [{"source": "Times Food", "summary": "Kokum is everywhere"}]}
+    assert [k[0] for k in delta["removed"]["articles"]] == ["#"]
+
+
+def test_change_ratio_counts_added_changed_and_removed():
+    current = copy.deepcopy(SCRAPE)
+    current["google_results"][0]["snippet"] = "new queue record"       # changed
+    current["hashtags"].pop()                                          # removed
+    current["articles"].append({"headline": "Kokum season"})           # added
+    delta = diff_scrapes(SCRAPE, current)
+    assert delta["changed_count"] == 3
+    assert delta["change_ratio"] == pytest.approx(3 / ITEMS)
+
+
+# ── analyze_incremental ──────────────────────────────────────────
+PREVIOUS_ANALYSIS = stub_response({"tools": [ANALYSIS_TOOL]}).content[0].input
+
+
+@pytest.fixture
+def claude_calls(monkeypatch):
+    calls = []
+
+    async def fake_acreate(**params):
+        calls.append(params)
+        return stub_response(params)
+    monkeypatch.setattr(dish_generator, "_acreate", fake_acreate)
+    return calls
+
+
+def test_unchanged_scrape_reuses_last_weeks_analysis(claude_calls):
+    save_city_snapshot("Pune", SCRAPE, PREVIOUS_ANALYSIS)
+    assert analyze_incremental(copy.deepcopy(SCRAPE)) == PREVIOUS_ANALYSIS
+    assert claude_calls == []
+    assert load_city_snapshot("Pune")["trend_analysis"] == PREVIOUS_ANALYSIS
+
+
+def test_small_change_sends_only_the_delta(claude_calls):
+    save_city_snapshot("Pune", SCRAPE, PREVIOUS_ANALYSIS)
+    current = copy.deepcopy(SCRAPE)
+    current["hashtags"][1]["estimated_growth_pct"] = 95
+    analyze_incremental(current)
+
+    [params] = claude_calls
+    assert params["tools"][0]["name"] == "record_trend_analysis_update"
+    prompt = params["messages"][0]["content"]
+    prompt = prompt if isinstance(prompt, str) else "".join(b["text"] for b in prompt)
+    assert "#misal — +95%" in prompt and "Sinhagad" not in prompt
+    assert f"({ITEMS - 1} other items are unchanged" in prompt
+
+
+def test_large_change_falls_back_to_a_full_analysis(claude_calls):
+    save_city_snapshot("Pune", SCRAPE, PREVIOUS_ANALYSIS)
+    current = {**copy.deepcopy(SCRAPE), "hashtags": [{"hashtag": f"#new{i}"} for i in range(8)]}
+    analyze_incremental(current)
+    assert [p["tools"][0]["name"] for p in claude_calls] == ["record_trend_analysis"]